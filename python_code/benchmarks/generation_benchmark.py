@@ -0,0 +1,161 @@
+"""Headless benchmark of the world generation. Run from the python_code folder, for example:
+
+    python -m benchmarks.generation_benchmark --seeds 12 13 --rows 0 1 2 --chunks 4
+
+No window is opened, the SDL dummy video driver is used. The board size is taken from the constants, TESTING in
+utility/constants.py chooses between the test and the full size board"""
+import os
+# has to be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import hashlib
+import time
+import tracemalloc
+from typing import List, Tuple, Dict, Union, Any
+try:
+    import resource
+except ImportError:
+    # not available on windows
+    resource = None
+
+import utility.constants as con
+from utility import game_timing
+import interfaces.windows.interface_utility as interface_util
+import block_classes.block_utility as block_util
+import board_generation.generation as generation
+
+
+LAYER_NAMES: List[str] = ["biomes", "caves", "structures", "special blocks", "predefined blocks", "biome likelyhoods",
+                          "filler", "border"]
+
+
+def chunk_toplefts(
+    rows: List[int],
+    nr_chunks: int
+) -> List[Tuple[int, int]]:
+    """Toplefts of nr_chunks consecutive chunks around the start chunk for every row that is on the board"""
+    total_columns = interface_util.p_to_cc(con.ORIGINAL_BOARD_SIZE.width)
+    total_rows = interface_util.p_to_cr(con.ORIGINAL_BOARD_SIZE.height)
+    first_column = min(max(0, con.START_CHUNK_POS[0] - nr_chunks // 2), max(0, total_columns - nr_chunks))
+    columns = range(first_column, min(first_column + nr_chunks, total_columns))
+    return [(column * con.CHUNK_SIZE.width, row * con.CHUNK_SIZE.height) for row in rows if 0 <= row < total_rows
+            for column in columns]
+
+
+def chunk_checksum(
+    matrix: List[List[block_util.MCD]],
+    back_matrix: List[List[block_util.MCD]]
+) -> str:
+    """Checksum of the material names of the foreground and background of a chunk"""
+    checksum = hashlib.md5()
+    for material_matrix in (matrix, back_matrix):
+        for row in material_matrix:
+            checksum.update(",".join(material.name() for material in row).encode())
+            checksum.update(b"\n")
+    return checksum.hexdigest()
+
+
+def layer_timings() -> Dict[str, float]:
+    """Total time spent per generation layer since the BACKGROUND_TIMINGS were configured"""
+    timings = game_timing.BACKGROUND_TIMINGS.get_named_timings().get("world generation", None)
+    if timings is None:
+        return {}
+    # the frame number is never increased so every layer has one accumulated value
+    return timings.get_average_values()
+
+
+def run_benchmark(
+    seed: int,
+    toplefts: List[Tuple[int, int]],
+    trace_memory: bool
+) -> Dict[str, Any]:
+    """Create a generator for seed and generate all chunks at toplefts"""
+    con.USE_SEED = True
+    con.SEED = seed
+    game_timing.config_timings_value()
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    generator = generation.BoardGenerator()
+    creation_time = time.perf_counter() - start
+    start = time.perf_counter()
+    chunks = generator.generate_chunks(toplefts)
+    chunk_time = time.perf_counter() - start
+
+    peak_memory = None
+    if trace_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    checksums = [chunk_checksum(matrix, back_matrix) for matrix, back_matrix in chunks]
+    return {
+        "seed": seed,
+        "creation time": creation_time,
+        "chunk time": chunk_time,
+        "layers": layer_timings(),
+        "peak memory": peak_memory,
+        "checksums": checksums,
+        "checksum": hashlib.md5("".join(checksums).encode()).hexdigest()
+    }
+
+
+def print_result(
+    result: Dict[str, Any],
+    toplefts: List[Tuple[int, int]],
+    verbose: bool
+) -> None:
+    print(f"seed {result['seed']}:")
+    print(f"  generator creation: {result['creation time']:.3f}s")
+    print(f"  {len(toplefts)} chunks: {result['chunk time']:.3f}s "
+          f"({result['chunk time'] / max(1, len(toplefts)) * 1000:.1f}ms per chunk)")
+    print("  layers (generator creation and chunks):")
+    for name in LAYER_NAMES + [name for name in result["layers"] if name not in LAYER_NAMES]:
+        if name not in result["layers"]:
+            print(f"    {name}: not timed")
+            continue
+        print(f"    {name}: {result['layers'][name]:.3f}s")
+    if result["peak memory"] is not None:
+        print(f"  peak traced memory: {result['peak memory'] / 1_000_000:.2f}MB")
+    print(f"  checksum: {result['checksum']}")
+    if verbose:
+        for topleft, checksum in zip(toplefts, result["checksums"]):
+            print(f"    chunk {interface_util.p_to_cp(topleft)}: {checksum}")
+
+
+def max_resident_memory() -> Union[float, None]:
+    """Peak resident memory of this process in MB"""
+    if resource is None:
+        return None
+    # kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1000
+
+
+def main(arguments: Union[List[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Time the world generation without opening a window")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[con.SEED], help="seeds to generate a world for")
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=list(range(interface_util.p_to_cr(con.ORIGINAL_BOARD_SIZE.height))),
+                        help="chunk rows (depths) to generate chunks at")
+    parser.add_argument("--chunks", type=int, default=4, help="number of chunks generated per row")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="processes for the filler layer, filler and border are not timed when more then 1")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="report the peak memory traced by python, this makes generation slower")
+    parser.add_argument("--verbose", action="store_true", help="print the checksum of every chunk")
+    args = parser.parse_args(arguments)
+
+    con.DEBUG.WARNINGS = False
+    block_util.configure_material_collections()
+    generation.BoardGenerator.NR_GENERATION_PROCESSES = args.processes
+    toplefts = chunk_toplefts(args.rows, args.chunks)
+    print(f"board {con.ORIGINAL_BOARD_SIZE}, {len(toplefts)} chunks per seed, {args.processes} process(es)")
+    for seed in args.seeds:
+        print_result(run_benchmark(seed, toplefts, args.trace_memory), toplefts, args.verbose)
+    resident_memory = max_resident_memory()
+    if resident_memory is not None:
+        print(f"peak resident memory: {resident_memory:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
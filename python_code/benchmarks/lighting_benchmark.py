@@ -0,0 +1,151 @@
+"""Headless benchmark of adding and removing light sources on the board. Run from the python_code folder, for example:
+
+    python -m benchmarks.lighting_benchmark --sources 200 --repeats 3
+
+The light of every source is first checked against spreading the light block by block from the source to the 4 blocks
+around every block, and removing the source has to give back the light from before. The time of adding and removing a
+source is compared with the block by block spread. No window is opened, the SDL dummy video driver is used"""
+import os
+# has to be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import heapq
+import random
+from typing import List, Tuple, Union, Dict
+
+import pygame
+
+import utility.constants as con
+import utility.utilities as util
+from utility import game_timing, image_handling
+import interfaces.windows.interface_utility as interface_util
+import block_classes.block_utility as block_util
+import recipes.recipe_utility as recipe_utility
+# imported before the board the same way as in main, otherwise the imports are circular
+import scenes
+import board.board as board_module
+import entities
+from benchmarks.neighbourhood_benchmark import create_board, time_call
+
+
+def block_at(
+    board: board_module.Board,
+    column: int,
+    row: int
+) -> Union[None, util.BlockPointer]:
+    """The block at a column and row, None for blocks outside the board"""
+    if column < 0 or row < 0:
+        return None
+    point = (column * con.BLOCK_SIZE.width, row * con.BLOCK_SIZE.height)
+    chunk = board.chunk_from_point(point)
+    return chunk.get_block(point) if chunk is not None else None
+
+
+def block_spread(
+    board: board_module.Board,
+    point: Tuple[int, int],
+    radius: int,
+    light: int
+) -> Dict[Tuple[int, int], int]:
+    """Light levels by (column, row) of all blocks lit from point. The light is spread from the brightest block to the 4
+    blocks around it within the diamond of radius around point, looking up every block separately"""
+    column, row = interface_util.p_to_c(point[0]), interface_util.p_to_r(point[1])
+    if block_at(board, column, row) is None:
+        return {}
+    levels = {(column, row): min(light, con.MAX_LIGHT)}
+    brightest = [(-levels[(column, row)], column, row)]
+    while len(brightest) > 0:
+        negative_level, block_column, block_row = heapq.heappop(brightest)
+        if -negative_level < levels[(block_column, block_row)]:
+            continue
+        block = block_at(board, block_column, block_row)
+        next_level = -negative_level - (con.DECREASE_SPEED_SOLID if block.is_solid() else con.DECREASE_SPEED)
+        for column_offset, row_offset in board.NEIGHBOUR_OFFSETS:
+            coord = (block_column + column_offset, block_row + row_offset)
+            if abs(coord[0] - column) * con.BLOCK_SIZE.width + abs(coord[1] - row) * con.BLOCK_SIZE.height > radius \
+                    or next_level <= levels.get(coord, 0) or block_at(board, *coord) is None:
+                continue
+            levels[coord] = next_level
+            heapq.heappush(brightest, (-next_level, *coord))
+    return levels
+
+
+def light_levels(
+    board: board_module.Board,
+    point: Tuple[int, int],
+    radius: int
+) -> Dict[Tuple[int, int], int]:
+    """Light level by (column, row) of the blocks in the square around point that can be reached by light"""
+    column, row = interface_util.p_to_c(point[0]), interface_util.p_to_r(point[1])
+    column_radius, row_radius = radius // con.BLOCK_SIZE.width, radius // con.BLOCK_SIZE.height
+    levels = {}
+    for block_row in range(row - row_radius, row + row_radius + 1):
+        for block_column in range(column - column_radius, column + column_radius + 1):
+            block = block_at(board, block_column, block_row)
+            if block is not None:
+                levels[(block_column, block_row)] = block.light_level
+    return levels
+
+
+def add_and_remove_source(
+    board: board_module.Board,
+    point: Tuple[int, int],
+    radius: int,
+    light: int
+):
+    board.remove_light_source(board.add_light_source(point, radius, light))
+
+
+def main(arguments: Union[List[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Time light sources without opening a window")
+    parser.add_argument("--sources", type=int, default=200, help="number of light sources at random points")
+    parser.add_argument("--radius", type=int, default=entities.Worker.VISON_RADIUS, help="radius in pixels")
+    parser.add_argument("--light", type=int, default=entities.Worker.EMITTED_LIGTH, help="light at the point")
+    parser.add_argument("--repeats", type=int, default=3, help="the best time of this many repeats is reported")
+    args = parser.parse_args(arguments)
+
+    con.DEBUG.WARNINGS = False
+    con.USE_SEED = True
+    pygame.display.set_mode((1, 1))
+    image_handling.load_images()
+    block_util.configure_material_collections()
+    game_timing.config_timings_value()
+    recipe_utility.create_recipe_book()
+    board = create_board()
+
+    rng = random.Random(con.SEED)
+    loaded_chunks = list(board.loaded_chunks)
+    points = []
+    for _ in range(args.sources):
+        chunk = rng.choice(loaded_chunks)
+        points.append((rng.randrange(chunk.rect.left, chunk.rect.right),
+                       rng.randrange(chunk.rect.top, chunk.rect.bottom)))
+
+    # make sure that the light of a source is right and goes away again before timing it
+    lit_blocks = 0
+    for point in points:
+        before = light_levels(board, point, args.radius)
+        spread = block_spread(board, point, args.radius, args.light)
+        source_id = board.add_light_source(point, args.radius, args.light)
+        if light_levels(board, point, args.radius) != {coord: max(level, spread.get(coord, 0))
+                                                        for coord, level in before.items()}:
+            raise util.GameException(f"Light of the source at {point} is different")
+        board.remove_light_source(source_id)
+        if light_levels(board, point, args.radius) != before:
+            raise util.GameException(f"Light of the source at {point} is not removed")
+        lit_blocks += len(spread)
+    board.changed_light_coordinates = set()
+
+    print(f"board {con.ORIGINAL_BOARD_SIZE}, {len(loaded_chunks)} chunks, {args.sources} sources of radius "
+          f"{args.radius} and light {args.light} lighting {lit_blocks / args.sources:.1f} blocks on average, best of "
+          f"{args.repeats}")
+    block_time = time_call(block_spread, [(board, point, args.radius, args.light) for point in points], args.repeats)
+    board_time = time_call(add_and_remove_source, [(board, point, args.radius, args.light) for point in points],
+                           args.repeats)
+    print(f"  per source: block by block spread {block_time / args.sources * 1000:.2f}ms, board add and remove "
+          f"{board_time / args.sources * 1000:.2f}ms ({block_time / board_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Headless benchmark of looking up the blocks around a block and the blocks in a rectangle on the board. Run from the
+python_code folder, for example:
+
+    python -m benchmarks.neighbourhood_benchmark --repeats 5 --blocks 5000
+
+The board accessors are compared with looking up every block separately by point, the way the board used to do it. No
+window is opened, the SDL dummy video driver is used"""
+import os
+# has to be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import random
+import time
+from typing import List, Tuple, Union, Callable, Any
+
+import pygame
+
+import utility.constants as con
+import utility.utilities as util
+from utility import game_timing, image_handling
+import block_classes.block_utility as block_util
+import recipes.recipe_utility as recipe_utility
+# imported before the board the same way as in main, otherwise the imports are circular
+import scenes
+import board.board as board_module
+import board.sprite_groups as sprite_groups
+import board_generation.generation as generation
+import block_classes.blocks as block_classes
+import entities
+
+
+def point_neighbourhood(
+    board: board_module.Board,
+    block: block_classes.Block,
+    offsets: Tuple[Tuple[int, int], ...]
+) -> List[Union[None, util.BlockPointer]]:
+    """Blocks around a block by looking up the chunk and block for every neighbour separately"""
+    blocks = []
+    for column_offset, row_offset in offsets:
+        point = (block.rect.x + column_offset * con.BLOCK_SIZE.width, block.rect.y + row_offset * con.BLOCK_SIZE.height)
+        if point[0] > con.ORIGINAL_BOARD_SIZE.width or point[0] < 0 or point[1] > con.ORIGINAL_BOARD_SIZE.height or \
+                point[1] < 0:
+            blocks.append(None)
+            continue
+        chunk = board.chunk_from_point(point)
+        blocks.append(chunk.get_block(point) if chunk is not None else None)
+    return blocks
+
+
+def point_window(
+    board: board_module.Board,
+    rect: pygame.Rect
+) -> List[Union[None, util.BlockPointer]]:
+    """Blocks in a rectangle by looking up the chunk and block for every block separately"""
+    blocks = []
+    for y_coord in range(rect.top, rect.bottom, con.BLOCK_SIZE.height):
+        for x_coord in range(rect.left, rect.right, con.BLOCK_SIZE.width):
+            chunk = board.chunk_from_point((x_coord, y_coord))
+            blocks.append(chunk.get_block((x_coord, y_coord)) if chunk is not None else None)
+    return blocks
+
+
+def create_board() -> board_module.Board:
+    """Create a board with all chunks of the start load area generated"""
+    camera = entities.CameraCentre((0, 0), (5, 5))
+    sprite_group = sprite_groups.CameraAwareLayeredUpdates(camera, con.BOARD_SIZE)
+    return board_module.Board(generation.BoardGenerator(), sprite_group, [""])
+
+
+def time_call(
+    function: Callable[..., Any],
+    arguments: List[Tuple],
+    repeats: int
+) -> float:
+    """Best time of calling function for all arguments"""
+    best_time = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for argument in arguments:
+            function(*argument)
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time
+
+
+def main(arguments: Union[List[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Time block neighbourhood lookups without opening a window")
+    parser.add_argument("--blocks", type=int, default=5000, help="number of random blocks to look around")
+    parser.add_argument("--window", type=int, default=6, help="width and height in blocks of the rectangles")
+    parser.add_argument("--repeats", type=int, default=5, help="the best time of this many repeats is reported")
+    args = parser.parse_args(arguments)
+
+    con.DEBUG.WARNINGS = False
+    con.USE_SEED = True
+    pygame.display.set_mode((1, 1))
+    image_handling.load_images()
+    block_util.configure_material_collections()
+    game_timing.config_timings_value()
+    recipe_utility.create_recipe_book()
+    board = create_board()
+
+    rng = random.Random(con.SEED)
+    loaded_chunks = list(board.loaded_chunks)
+    blocks = []
+    rects = []
+    for _ in range(args.blocks):
+        chunk = rng.choice(loaded_chunks)
+        point = (rng.randrange(chunk.rect.left, chunk.rect.right), rng.randrange(chunk.rect.top, chunk.rect.bottom))
+        blocks.append(chunk.get_block(point).block)
+        # rectangles that are aligned with the blocks, that is how buildings and selections overlap blocks
+        rects.append(pygame.Rect(blocks[-1].rect.left, blocks[-1].rect.top, args.window * con.BLOCK_SIZE.width,
+                                 args.window * con.BLOCK_SIZE.height))
+
+    # make sure that both ways give the same blocks before timing them, views of the same block share an id
+    for block, rect in zip(blocks, rects):
+        for diagonal, offsets in ((False, board.NEIGHBOUR_OFFSETS), (True, board.DIAGONAL_NEIGHBOUR_OFFSETS)):
+            if [pointer and pointer.id for pointer in board.block_neighbourhood(block, diagonal)] != \
+                    [pointer and pointer.id for pointer in point_neighbourhood(board, block, offsets)]:
+                raise util.GameException(f"Neighbourhood of {block} is different")
+        if [pointer and pointer.id for row in board.block_window(rect) for pointer in row] != \
+                [pointer and pointer.id for pointer in point_window(board, rect)]:
+            raise util.GameException(f"Blocks in {rect} are different")
+
+    print(f"board {con.ORIGINAL_BOARD_SIZE}, {len(loaded_chunks)} chunks, {args.blocks} blocks, best of "
+          f"{args.repeats}")
+    timings = [
+        ("4-neighbourhood", time_call(point_neighbourhood, [(board, block, board.NEIGHBOUR_OFFSETS)
+                                                            for block in blocks], args.repeats),
+         time_call(board.block_neighbourhood, [(block,) for block in blocks], args.repeats)),
+        ("8-neighbourhood", time_call(point_neighbourhood, [(board, block, board.DIAGONAL_NEIGHBOUR_OFFSETS)
+                                                            for block in blocks], args.repeats),
+         time_call(board.block_neighbourhood, [(block, True) for block in blocks], args.repeats)),
+        (f"{args.window}x{args.window} window", time_call(point_window, [(board, rect) for rect in rects],
+                                                          args.repeats),
+         time_call(board.block_window, [(rect,) for rect in rects], args.repeats))
+    ]
+    for name, point_time, board_time in timings:
+        print(f"  {name}: per point {point_time / args.blocks * 1_000_000:.2f}us, board "
+              f"{board_time / args.blocks * 1_000_000:.2f}us ({point_time / board_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Headless benchmark of finding paths through the caves of a generated board. Run from the python_code folder, for
+example:
+
+    python -m benchmarks.pathfinding_benchmark --queries 300 --repeats 3 --chunks 8
+
+The heap based search of the pathfinder is compared with searching the open list with min() and the closed list by
+comparing every rectangle, the way the pathfinder used to do it. All rows of chunks of the board are generated, TESTING
+in utility/constants.py chooses between the test and the full size board. No window is opened, the SDL dummy video
+driver is used"""
+import os
+# has to be set before pygame is imported
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import gc
+import random
+import time
+from typing import List, Tuple, Union, Callable, Any
+
+import pygame
+
+import utility.constants as con
+import utility.utilities as util
+from utility import game_timing, image_handling
+import interfaces.windows.interface_utility as interface_util
+import block_classes.block_utility as block_util
+import recipes.recipe_utility as recipe_utility
+# imported before the board the same way as in main, otherwise the imports are circular
+import scenes
+import board.chunks as chunks
+import board.flora as flora
+import board.pathfinding as pathfinding
+import board.sprite_groups as sprite_groups
+import board_generation.generation as generation
+from benchmarks.generation_benchmark import chunk_toplefts
+
+
+def list_pathfind(
+    start: pathfinding.AirRectangle,
+    end: pygame.Rect
+) -> Union[None, pathfinding.Node]:
+    """A* search that picks the next node from the open list with min() and checks the closed and open list by
+    comparing every node"""
+    start_node = pathfinding.Node(None, start, None)
+    end_node = pathfinding.Node(None, end, None)
+    start_node.distance_to_end = util.manhattan_distance(start_node.position, end_node.position)
+    open_list = [start_node]
+    closed_list = []
+    while len(open_list) > 0:
+        current_node = min(open_list, key=lambda node: node.total_for_both)
+        open_list.remove(current_node)
+        closed_list.append(current_node)
+        connection_direction = util.side_by_side(current_node.rect, end_node.rect)
+        if connection_direction is not None:
+            end_node.parent = current_node
+            end_node.direction_index = connection_direction
+            return end_node
+        for direction_index, direction in enumerate(current_node.rect.connecting_rects):
+            for rect in direction:
+                child = pathfinding.Node(current_node, rect, direction_index)
+                if len([closed_node for closed_node in closed_list if closed_node.rect == child.rect]) > 0:
+                    continue
+                child.distance_from_start = current_node.distance_from_start + \
+                    util.manhattan_distance(child.position, current_node.position)
+                child.distance_to_end = util.manhattan_distance(child.position, end_node.position)
+                child.total_for_both = child.distance_from_start + child.distance_to_end
+                if len([open_node for open_node in open_list if child.rect == open_node.rect]) > 0:
+                    continue
+                open_list.append(child)
+    return None
+
+
+def create_path_finder(nr_chunks: int) -> pathfinding.PathFinder:
+    """Generate nr_chunks consecutive chunks around the start chunk for every row of the board and add them to the
+    rectangle network of a pathfinder"""
+    generator = generation.BoardGenerator()
+    sprite_group = sprite_groups.CameraAwareLayeredUpdates(None, con.BOARD_SIZE)
+    plants = flora.Flora()
+    toplefts = chunk_toplefts(list(range(interface_util.p_to_cr(con.ORIGINAL_BOARD_SIZE.height))), nr_chunks)
+    path_finder = pathfinding.PathFinder()
+    for topleft, (matrix, back_matrix) in zip(toplefts, generator.generate_chunks(toplefts)):
+        chunk = chunks.Chunk(topleft, matrix, back_matrix, sprite_group, plants)
+        path_finder.pathfinding_tree.add_chunk(chunk.pathfinding_chunk)
+    return path_finder
+
+
+def air_rectangles(path_finder: pathfinding.PathFinder) -> List[pathfinding.AirRectangle]:
+    """All rectangles of the rectangle network ordered by position"""
+    rectangles = set()
+    for direction in path_finder.pathfinding_tree.rectangle_network:
+        for rects in direction.values():
+            rectangles.update(rects)
+    return sorted(rectangles, key=lambda rect: (rect.top, rect.left, rect.width, rect.height))
+
+
+def time_query(
+    function: Callable[..., Any],
+    arguments: Tuple,
+    repeats: int
+) -> float:
+    """Best time of calling function with arguments, the garbage collector is disabled while timing like timeit does"""
+    best_time = float("inf")
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            function(*arguments)
+            best_time = min(best_time, time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return best_time
+
+
+def path_distance(end_node: Union[None, pathfinding.Node]) -> Union[None, int]:
+    return end_node.parent.distance_from_start if end_node is not None else None
+
+
+def main(arguments: Union[List[str], None] = None) -> None:
+    parser = argparse.ArgumentParser(description="Time path queries through generated caves without opening a window")
+    parser.add_argument("--queries", type=int, default=300, help="number of random path queries")
+    parser.add_argument("--repeats", type=int, default=3, help="the best time of this many repeats is used per query")
+    parser.add_argument("--chunks", type=int, default=4, help="number of chunks generated per row")
+    args = parser.parse_args(arguments)
+
+    con.DEBUG.WARNINGS = False
+    con.USE_SEED = True
+    pygame.display.set_mode((1, 1))
+    image_handling.load_images()
+    block_util.configure_material_collections()
+    game_timing.config_timings_value()
+    recipe_utility.create_recipe_book()
+    path_finder = create_path_finder(args.chunks)
+    rectangles = air_rectangles(path_finder)
+
+    rng = random.Random(con.SEED)
+    queries = []
+    for _ in range(args.queries):
+        start = rng.choice(rectangles)
+        end_rectangle = rng.choice(rectangles)
+        # the block below the air rectangle, like a worker that has to mine the floor of a cave
+        queries.append((start, pygame.Rect((end_rectangle.left, end_rectangle.bottom, con.BLOCK_SIZE.width,
+                                            con.BLOCK_SIZE.height))))
+
+    # the search without looking up the start rectangle, that is the part that list_pathfind does
+    heap_pathfind = path_finder._PathFinder__pathfind
+    found = shorter = longer = 0
+    for start, end in queries:
+        heap_distance, list_distance = path_distance(heap_pathfind(start, end)), path_distance(list_pathfind(start, end))
+        if (heap_distance is None) != (list_distance is None):
+            raise util.GameException(f"Path from {start} to {end} is only found by one of the searches")
+        if heap_distance is None:
+            continue
+        found += 1
+        # the distance to the end is not exact, so neither search always finds the shortest path
+        shorter += heap_distance < list_distance
+        longer += heap_distance > list_distance
+
+    print(f"board {con.ORIGINAL_BOARD_SIZE}, {len(path_finder.pathfinding_tree.pathfinding_chunks)} chunks, "
+          f"{len(rectangles)} air rectangles, {args.queries} queries of which "
+          f"{found} have a path, best of {args.repeats}")
+    print(f"  paths with the heap search: {shorter} shorter, {longer} longer")
+    list_times = [time_query(list_pathfind, query, args.repeats) for query in queries]
+    heap_times = [time_query(heap_pathfind, query, args.repeats) for query in queries]
+    for name, list_time, heap_time in (("mean", sum(list_times) / len(queries), sum(heap_times) / len(queries)),
+                                       ("worst", max(list_times), max(heap_times))):
+        print(f"  {name} query: lists {list_time * 1000:.2f}ms, heap {heap_time * 1000:.2f}ms "
+              f"({list_time / heap_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
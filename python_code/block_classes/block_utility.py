@@ -2,7 +2,7 @@
 
 # library imports
 import inspect
-from typing import Set, Union, Type, Dict, Any
+from typing import Set, Union, Type, Dict, Any, List
 
 # own imports
 import block_classes.materials.materials as base_materials
@@ -16,6 +16,12 @@ from utility import utilities as util, loading_saving
 fuel_materials: Set = set()
 environment_materials: Set = set()
 
+# all material classes linked to their name and to a number. The numbers are the same as long as the same material
+# classes exist, 0 is never used so it can mean no material
+material_classes: Dict[str, Type[base_materials.BaseMaterial]] = {}
+material_ids: Dict[str, int] = {}
+material_classes_by_id: List[Union[Type[base_materials.BaseMaterial], None]] = [None]
+
 
 class MCD(loading_saving.Savable, loading_saving.Loadable):
     """Allows to define a MaterialClassDefinition where you can save a material class linked to arguments needed for
@@ -78,26 +84,43 @@ class MCD(loading_saving.Savable, loading_saving.Loadable):
     ) -> base_materials.BaseMaterial:
         if self.__is_string:
             return material_instance_from_string(self.material, **self.kwargs, **additional_kwargs)
-        return self.material(**self.kwargs, **additional_kwargs)
+        return self.material.shared(**self.kwargs, **additional_kwargs)
 
     def name(self) -> str:
         if self.__is_string:
             return self.material
         return self.material.name()
 
+    def material_class(self) -> Type[base_materials.BaseMaterial]:
+        if self.__is_string:
+            return material_class_from_string(self.material)
+        return self.material
+
+    def is_plain(self) -> bool:
+        """If this definition is nothing more then the material, meaning that all plain definitions of the same
+        material create identical blocks"""
+        return not self.needs_board_update and len(self.kwargs) == 0 and len(self.block_kwargs) == 0
+
 
 def material_class_from_string(string: str) -> Type[base_materials.BaseMaterial]:
-    if string in dir(ground_m):
-        material = getattr(ground_m, string)
-    elif string in dir(env_m):
-        material = getattr(env_m, string)
-    elif string in dir(build_m):
-        material = getattr(build_m, string)
-    elif string in dir(machine_m):
-        material = getattr(machine_m, string)
-    else:
-        material = getattr(base_materials, string)
-    return material
+    try:
+        return material_classes[string]
+    except KeyError:
+        raise util.GameException(f"There is no material with name {string}")
+
+
+def material_id(string: str) -> int:
+    """Number of the material with the given name"""
+    try:
+        return material_ids[string]
+    except KeyError:
+        raise util.GameException(f"There is no material with name {string}")
+
+
+def material_class_from_id(id_: int) -> Type[base_materials.BaseMaterial]:
+    if not 0 < id_ < len(material_classes_by_id):
+        raise util.GameException(f"There is no material with number {id_}")
+    return material_classes_by_id[id_]
 
 
 def material_instance_from_string(
@@ -105,7 +128,7 @@ def material_instance_from_string(
     **kwargs
 ) -> base_materials.BaseMaterial:
     material_class = material_class_from_string(string)
-    return material_class(**kwargs)
+    return material_class.shared(**kwargs)
 
 
 def configure_material_collections() -> None:
@@ -121,3 +144,18 @@ def configure_material_collections() -> None:
                 selected_sets.append(environment_materials)
             if len(selected_sets) > 0:
                 [set_.add(cls) for set_ in selected_sets]
+
+
+def configure_material_registry() -> None:
+    """Link all material classes to their name and a number. Names are looked up in the material modules in the order
+    ground, environment, building, machine and base materials"""
+    for module in (base_materials, machine_m, build_m, env_m, ground_m):
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if issubclass(cls, (base_materials.BaseMaterial, base_materials.MaterialCollection)):
+                material_classes[name] = cls
+    for name in sorted(material_classes):
+        material_ids[name] = len(material_classes_by_id)
+        material_classes_by_id.append(material_classes[name])
+
+
+configure_material_registry()
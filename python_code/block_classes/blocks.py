@@ -11,6 +11,7 @@ import utility.utilities as util
 from utility import inventories, game_timing, loot_pools
 import interfaces.windows.base_window as base_interface
 if TYPE_CHECKING:
+    from numpy import ndarray
     import block_classes.materials.materials as base_materials
     import block_classes.materials.building_materials as building_materials
 
@@ -19,7 +20,7 @@ class Block(loading_saving.Savable, loading_saving.Loadable, ABC):
     """
     Base class for the block_classes in image matrices
     """
-    __slots__ = "rect", "material", "_action_function", "id", "light_level"
+    __slots__ = "rect", "material", "_action_function", "id", "__light_level", "__light_cell"
 
     SIZE: ClassVar[util.Size] = con.BLOCK_SIZE
 
@@ -27,7 +28,8 @@ class Block(loading_saving.Savable, loading_saving.Loadable, ABC):
     material: "base_materials.BaseMaterial"
     _action_function: Callable
     id: str
-    light_level: int
+    __light_level: int
+    __light_cell: Union[None, Tuple["ndarray", int, int]]
 
     def __init__(
         self,
@@ -41,7 +43,9 @@ class Block(loading_saving.Savable, loading_saving.Loadable, ABC):
         self.material = material
         self._action_function = action
         self.id = id_ if id_ else util.unique_id()
-        self.light_level = light_level
+        self.__light_level = light_level
+        # the light levels array, row and column of the block when it is part of a block matrix
+        self.__light_cell = None
 
     def __getattr__(self, item):
         return getattr(self.material, item)
@@ -79,6 +83,34 @@ class Block(loading_saving.Savable, loading_saving.Loadable, ABC):
         mcd = block_utility.MCD.from_dict(dct)
         return mcd
 
+    @property
+    def light_level(self) -> int:
+        """The light level of the block, blocks in a block matrix read it from the light levels of the matrix"""
+        if self.__light_cell is not None:
+            light_levels, row, column = self.__light_cell
+            return int(light_levels[row, column])
+        return self.__light_level
+
+    @light_level.setter
+    def light_level(
+        self,
+        value: int
+    ):
+        if self.__light_cell is not None:
+            light_levels, row, column = self.__light_cell
+            light_levels[row, column] = value
+        else:
+            self.__light_level = value
+
+    def set_light_cell(
+        self,
+        light_levels: "ndarray",
+        row: int,
+        column: int
+    ):
+        """Read and write the light level of this block in light_levels at row and column from now on"""
+        self.__light_cell = (light_levels, row, column)
+
     @property
     def surface(self) -> pygame.Surface:
         """Make inheritance more apparent"""
@@ -108,6 +140,7 @@ class Block(loading_saving.Savable, loading_saving.Loadable, ABC):
         self,
         value: int
     ):
+        self.material = self.material.private_copy()
         self.material.transparant_group = value
 
     def is_task_allowded(
@@ -137,15 +170,20 @@ class Block(loading_saving.Savable, loading_saving.Loadable, ABC):
         different this does not directly reflect on the board, that has to be done separately"""
         if isinstance(self, VariableSurfaceBlock):
             self._set_changed(True)
+        self.material = self.material.private_copy()
         self.material.set_active(value)
 
 
 class VariableSurfaceBlock(loading_saving.Savable, ABC):
+    # blocks that changed their surface since the queue was last emptied, a block is only added once until it is
+    # redrawn
+    _changed_queue: ClassVar[List["VariableSurfaceBlock"]] = []
 
     __changed: bool
 
     def __init__(self, changed: bool = False):
-        self.__changed = changed
+        self.__changed = False
+        self._set_changed(changed)
 
     def to_dict(self):
         return {
@@ -160,8 +198,22 @@ class VariableSurfaceBlock(loading_saving.Savable, ABC):
         self,
         value: bool
     ):
+        if value and not self.__changed:
+            VariableSurfaceBlock._changed_queue.append(self)
         self.__changed = value
 
+    def requeue(self):
+        """Put the block back in the queue of changed blocks when it changed while it was not tracked"""
+        if self.__changed:
+            VariableSurfaceBlock._changed_queue.append(self)
+
+    @staticmethod
+    def pop_changed_blocks() -> List["VariableSurfaceBlock"]:
+        """Get all blocks that where queued because their surface changed and empty the queue"""
+        changed_blocks = VariableSurfaceBlock._changed_queue
+        VariableSurfaceBlock._changed_queue = []
+        return changed_blocks
+
     @property
     def changed(self):
         """Check if the block image has changed and flip the flag if that is the case"""
@@ -2,8 +2,8 @@
 
 # library imports
 from abc import ABC, abstractmethod
-from typing import Tuple, ClassVar, Dict, List
-from random import randint
+from typing import Tuple, ClassVar, Dict, List, Union
+from random import randint, Random
 
 # own imports
 import block_classes.materials.materials as base_materials
@@ -199,9 +199,10 @@ class OreMaterial(base_materials.DepthMaterial, base_materials.TransportableMate
         pass
 
     @classmethod
-    def get_cluster_size(cls) -> int:
+    def get_cluster_size(cls, rng: Union[Random, None] = None) -> int:
+        random_randint = rng.randint if rng is not None else randint
         # noinspection PyArgumentList
-        return randint(*cls.CLUSTER_SIZE)
+        return random_randint(*cls.CLUSTER_SIZE)
 
 
 class Burnable(ABC):
@@ -69,7 +69,8 @@ class UnbuildableMachineComponent(MultiImageMachineComponent, base_materials.Unb
 
 
 class NormalMachineComponent(base_materials.ImageMaterial, MachineComponent, ABC):
-    pass
+    # components are identified by their instance
+    SHAREABLE: ClassVar[bool] = False
 
 
 class MachineConnector(NormalMachineComponent):
@@ -2,9 +2,10 @@
 """Base material methods"""
 
 # library imports
+import inspect
 import pygame
 from abc import ABC, abstractmethod
-from random import randint, choices, choice
+from random import randint, choices, choice, Random
 from typing import Set, Tuple, ClassVar, List, Dict, Any, Union
 
 # own imports
@@ -18,7 +19,7 @@ class BaseMaterial(loading_saving.Savable, loading_saving.Loadable, ABC):
     """
     Base material class that defines the behaviour of a block
     """
-    __slots__ = "_surface", "_active_surface", "__transparant_group", "_active"
+    __slots__ = "_surface", "_active_surface", "__transparant_group", "_active", "_shared", "_shared_kwargs"
     HARDNESS: ClassVar[int] = 1
     WHEIGHT: ClassVar[int] = 1
 
@@ -32,9 +33,13 @@ class BaseMaterial(loading_saving.Savable, loading_saving.Loadable, ABC):
 
     _BLOCK_TYPE: ClassVar[blocks.Block] = blocks.Block
     BUILDABLE: ClassVar[bool] = True
+    # materials without state of their own can share one instance between all blocks
+    SHAREABLE: ClassVar[bool] = False
 
     _surface: pygame.Surface
     __transparant_group: int
+    _shared: bool
+    _shared_kwargs: Dict[str, Any]
 
     def __init__(
         self,
@@ -49,6 +54,9 @@ class BaseMaterial(loading_saving.Savable, loading_saving.Loadable, ABC):
 
         # flag that controls if the active or the normal surfaces are returned. Surfaces have to actively be redrawn
         self._active = active
+        self._shared = False
+        # the arguments the shared instance was created with, to be able to create a private copy
+        self._shared_kwargs = {}
 
     def __init_load__(self, **kwargs):
         self.__init__(**kwargs)
@@ -83,6 +91,9 @@ class BaseMaterial(loading_saving.Savable, loading_saving.Loadable, ABC):
 
     @transparant_group.setter
     def transparant_group(self, value: int) -> None:
+        if self._shared:
+            raise util.GameException(f"Material {type(self)} is shared and can not change its transparant group. Use "
+                                     f"a private copy instead")
         self.__transparant_group = value
 
     @property
@@ -137,6 +148,63 @@ class BaseMaterial(loading_saving.Savable, loading_saving.Loadable, ABC):
     def copy(self, **kwargs):
         return type(self)(**kwargs)
 
+    @classmethod
+    def shared(cls, active: bool = False, **kwargs) -> "BaseMaterial":
+        """Get the instance of this material that is shared between blocks. Materials that are not SHAREABLE return a
+        new instance. Materials with arguments that can not be hashed are never shared"""
+        if not cls.SHAREABLE:
+            return cls(active=active, **kwargs)
+        # arguments that no __init__ uses, like the depth of a block, would otherwise give an instance per value
+        used_arguments = cls._init_arguments()
+        kwargs = {name: value for name, value in kwargs.items() if name in used_arguments}
+        key = (cls, active, tuple(sorted(kwargs.items())))
+        try:
+            material = _shared_materials.get(key, None)
+        except TypeError:
+            return cls(active=active, **kwargs)
+        if material is None:
+            material = cls(active=active, **kwargs)
+            material._shared = True
+            material._shared_kwargs = kwargs
+            _shared_materials[key] = material
+        return material
+
+    @classmethod
+    def _init_arguments(cls) -> Set[str]:
+        """Names of the arguments that the __init__ methods of this material use. Arguments that end up in the kwargs
+        of BaseMaterial are not used"""
+        if cls not in _init_arguments:
+            names = set()
+            for class_ in cls.__mro__:
+                if "__init__" not in vars(class_):
+                    continue
+                parameters = inspect.signature(vars(class_)["__init__"]).parameters.values()
+                names.update(parameter.name for parameter in parameters
+                             if parameter.kind in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY))
+                if class_ is BaseMaterial or all(parameter.kind != parameter.VAR_KEYWORD for parameter in parameters):
+                    break
+            names.discard("self")
+            _init_arguments[cls] = names
+        return _init_arguments[cls]
+
+    def private_copy(self) -> "BaseMaterial":
+        """Get a material that can be changed for a single block, this is a copy if this material is shared"""
+        if not self._shared:
+            return self
+        material = type(self)(active=self._active, **self._shared_kwargs)
+        material.transparant_group = self.transparant_group
+        return material
+
+    def is_shared(self) -> bool:
+        """If this instance is shared between blocks, shared instances can not be changed"""
+        return self._shared
+
+    def shared_arguments(self) -> Dict[str, Any]:
+        """The arguments that return this instance from the shared method, the active state is only added when set"""
+        if self._active:
+            return {**self._shared_kwargs, "active": True}
+        return dict(self._shared_kwargs)
+
     @property
     def active(self) -> bool:
         return self._active
@@ -145,12 +213,21 @@ class BaseMaterial(loading_saving.Savable, loading_saving.Loadable, ABC):
         self,
         value: bool
     ):
+        if self._shared:
+            raise util.GameException(f"Material {type(self)} is shared and can not be set active. Use a private copy "
+                                     f"instead")
         if self._active_surface is None and value is True:
             raise util.GameException(f"Material {type(self)} has no ACTIVE_IMAGE_DEFINITION and as a result can not "
                                      f"be set active")
         self._active = value
 
 
+# instances of SHAREABLE materials linked to their type, active state and creation arguments
+_shared_materials: Dict[Tuple[type, bool, Tuple[Tuple[str, Any], ...]], BaseMaterial] = {}
+# names of the arguments used by the __init__ methods of a material type
+_init_arguments: Dict[type, Set[str]] = {}
+
+
 class ColorDefinition:
     """Defines a range of colors based on input parameters, is optimized in order to prevent repeated color image
     creation"""
@@ -235,6 +312,7 @@ class ColorMaterial(BaseMaterial, ABC):
     """
     COLOR_DEFINITIONS: ClassVar[ColorDefinition]
     ACTIVE_COLOR_DEFINITIONS: ClassVar[Union[ColorDefinition, None]] = None
+    SHAREABLE: ClassVar[bool] = True
 
     _surface: List[pygame.Surface]
 
@@ -282,6 +360,7 @@ class ImageMaterial(BaseMaterial, ABC):
     __slots__ = "_active_surface", "_active"
     IMAGE_DEFINITIONS: ClassVar[ImageDefinition]
     ACTIVE_IMAGE_DEFINITIONS: ClassVar[Union[ImageDefinition, None]] = None
+    SHAREABLE: ClassVar[bool] = True
 
     _surface: List[pygame.Surface]
     _active_surface: List[pygame.Surface]
@@ -318,6 +397,8 @@ class MultiImageMaterial(ImageMaterial, ABC):
     __slots__ = "image_key"
     IMAGE_DEFINITIONS: ClassVar[Dict[Any, ImageDefinition]]
     ACTIVE_IMAGE_DEFINITIONS: ClassVar[Union[Dict[Any, ImageDefinition], None]] = None
+    # the image key can differ per block
+    SHAREABLE: ClassVar[bool] = False
 
     image_key: Union[int, str]
     _surface: Dict[Any, List[pygame.Surface]]
@@ -406,9 +487,15 @@ class MaterialCollection(ABC):
 
     @classmethod
     def name(cls):
+        return cls.random_name()
+
+    @classmethod
+    def random_name(cls, rng: Union[Random, None] = None):
+        """Choose a name at random, use rng instead of the global random state for reproducible choices"""
+        random_choices = rng.choices if rng is not None else choices
         # noinspection PyUnresolvedReferences
-        return choices([k for k in cls.MATERIAL_PROBABILITIES.keys()],
-                       cls.MATERIAL_PROBABILITIES.values(), k=1)[0]
+        return random_choices([k for k in cls.MATERIAL_PROBABILITIES.keys()],
+                              cls.MATERIAL_PROBABILITIES.values(), k=1)[0]
 
     def __getattr__(self, item):
         """Allow inheritting methods to get a property from something shared by a collection"""
@@ -426,11 +513,20 @@ class MaterialDepthCollection(DepthMaterial, MaterialCollection, ABC):
     MATERIAL_PROBABILITIES: ClassVar[Dict[DepthMaterial, float]]
 
     @classmethod
-    def name(cls) -> str:
+    def random_name(cls, rng: Union[Random, None] = None) -> str:
         """Choose a name at random from the collection using wheight defined in this collection"""
+        random_choices = rng.choices if rng is not None else choices
         # noinspection PyUnresolvedReferences
-        return choices([k.name() for k in cls.MATERIAL_PROBABILITIES.keys()],
-                       cls.MATERIAL_PROBABILITIES.values(), k=1)[0]
+        return random_choices([material_name(k, rng) for k in cls.MATERIAL_PROBABILITIES.keys()],
+                              cls.MATERIAL_PROBABILITIES.values(), k=1)[0]
+
+
+def material_name(material, rng: Union[Random, None] = None) -> str:
+    """Name of a material, material collections choose their name using rng when given"""
+    if isinstance(material, MaterialCollection) or \
+            (isinstance(material, type) and issubclass(material, MaterialCollection)):
+        return material.random_name(rng)
+    return material.name()
 
 
 class InventoryMaterial:
@@ -0,0 +1,326 @@
+import pygame
+from itertools import count
+from typing import List, Dict, Tuple, Union, Hashable, Iterator, ClassVar, Set, Any
+from numpy import ndarray, array, zeros, uint8, uint16, iinfo
+
+import block_classes.block_utility as block_util
+import block_classes.blocks as blocks
+import block_classes.materials.environment_materials as environment_materials
+import block_classes.materials.building_materials as building_materials
+import block_classes.materials.machine_materials as machine_materials
+import block_classes.materials.materials as base_materials
+import utility.constants as con
+import utility.utilities as util
+
+
+class BlockMatrix:
+    """Blocks of one layer of a chunk. Every block is saved as an id in a numpy array. Blocks of only a material are
+    saved as the registry id of the material, blocks of a definition with arguments as an id above the registry ids
+    that points to a side table of these definitions. Block instances are only kept for blocks with behaviour, like buildings, conveyors and plants, for
+    blocks that where changed and for blocks that are requested to be kept. Other requested blocks are temporary views
+    that are created from the definition. The light levels of all blocks are saved in an array that the blocks read
+    their light level from"""
+    # block arguments that do not give a block behaviour
+    STATELESS_BLOCK_KWARGS: ClassVar[Set[str]] = {"id_", "light_level"}
+    # versions are never reused, not even between matrices
+    VERSIONS: ClassVar[Iterator[int]] = count()
+
+    topleft: Tuple[int, int]
+    __material_ids: ndarray
+    __definitions: Dict[int, block_util.MCD]
+    __argument_definitions: List[block_util.MCD]
+    __argument_definition_ids: Dict[Hashable, int]
+    __definition_behaviour: Dict[int, bool]
+    __definition_materials: Dict[int, base_materials.BaseMaterial]
+    __blocks: Dict[Tuple[int, int], util.BlockPointer]
+    __kept_pointers: Set[Tuple[int, int]]
+    __light_levels: ndarray
+    __solid_mask: Union[ndarray, None]
+    __version: int
+
+    def __init__(
+        self,
+        topleft: Union[Tuple[int, int], List[int]],
+        material_definitions: List[List[block_util.MCD]]
+    ):
+        self.topleft = tuple(topleft)
+        # the definitions of all ids in this matrix
+        self.__definitions = {}
+        # definitions with arguments, their id is the number of registry ids plus the index in this list
+        self.__argument_definitions = []
+        self.__argument_definition_ids = {}
+        self.__definition_behaviour = {}
+        # one instance per definition for drawing blocks and reading material properties
+        self.__definition_materials = {}
+        self.__blocks = {}
+        # (row, column) of pointers that are kept outside the matrix and have to follow changes of the block
+        self.__kept_pointers = set()
+        # saved after the first time it is requested until a block changes
+        self.__solid_mask = None
+        self.__version = next(self.VERSIONS)
+        # loaded blocks can have a light level
+        self.__light_levels = array([[min(max(0, definition.block_kwargs.get("light_level", 0)), con.MAX_LIGHT)
+                                      for definition in row] for row in material_definitions], dtype=uint8)
+        material_ids = []
+        for row_i, row in enumerate(material_definitions):
+            id_row = []
+            for column_i, definition in enumerate(row):
+                definition_id = self.__definition_id(definition)
+                id_row.append(definition_id)
+                # the saved id of a block without behaviour is not used, views get an id from their position
+                if self.__definition_behaviour[definition_id]:
+                    self.__blocks[(row_i, column_i)] = \
+                        util.BlockPointer(self.__create_block(row_i, column_i, definition))
+            material_ids.append(id_row)
+        self.__material_ids = array(material_ids, dtype=uint16)
+
+    @property
+    def rows(self) -> int:
+        return self.__material_ids.shape[0]
+
+    @property
+    def columns(self) -> int:
+        return self.__material_ids.shape[1]
+
+    @property
+    def version(self) -> int:
+        """Number that changes every time a block is set"""
+        return self.__version
+
+    def get_block(
+        self,
+        row: int,
+        column: int,
+        keep: bool = False
+    ) -> util.BlockPointer:
+        """Get the block at a row and column. Blocks that are not kept are returned as a temporary view that does not
+        follow changes of the matrix. Changes to a view have to be set with set_block. With keep the pointer is kept
+        and always points to the block at row and column"""
+        rows, columns = self.__material_ids.shape
+        if not 0 <= row < rows or not 0 <= column < columns:
+            raise IndexError(f"Block at row {row} and column {column} is outside the matrix")
+        if (row, column) in self.__blocks:
+            if keep:
+                self.__kept_pointers.add((row, column))
+            return self.__blocks[(row, column)]
+        pointer = util.BlockPointer(self.__create_view(row, column))
+        if keep:
+            self.__blocks[(row, column)] = pointer
+            self.__kept_pointers.add((row, column))
+        return pointer
+
+    def get_blocks(
+        self,
+        row_start: int,
+        row_end: int,
+        column_start: int,
+        column_end: int
+    ) -> List[List[util.BlockPointer]]:
+        """Get the blocks between the start and end rows and columns. The start and end values follow the rules of
+        list slicing"""
+        columns = range(self.columns)[column_start: column_end]
+        return [[self.get_block(row, column) for column in columns] for row in range(self.rows)[row_start: row_end]]
+
+    def set_block(
+        self,
+        row: int,
+        column: int,
+        block: blocks.Block
+    ) -> None:
+        """Set the block at row and column, the light level of the position does not change. Blocks that are the same
+        as the blocks of a definition are only saved as the definition id"""
+        if isinstance(block, util.BlockPointer):
+            block = block.block
+        block.set_light_cell(self.__light_levels, row, column)
+        definition_id = self.__unchanged_definition_id(block)
+        if definition_id is not None:
+            self.__material_ids[row, column] = definition_id
+        if (row, column) in self.__blocks:
+            self.__blocks[(row, column)].set_block(block)
+            if definition_id is not None and (row, column) not in self.__kept_pointers:
+                del self.__blocks[(row, column)]
+        elif definition_id is None:
+            self.__blocks[(row, column)] = util.BlockPointer(block)
+        self.__solid_mask = None
+        self.__version = next(self.VERSIONS)
+
+    def created_blocks(self) -> Iterator[Tuple[Tuple[int, int], util.BlockPointer]]:
+        """All blocks that are kept as ((row, column), block)"""
+        return iter(list(self.__blocks.items()))
+
+    def surface(
+        self,
+        row: int,
+        column: int
+    ) -> pygame.Surface:
+        if (row, column) in self.__blocks:
+            return self.__blocks[(row, column)].surface
+        return self.__definition_material(int(self.__material_ids[row, column])).surface
+
+    def transparant_group(
+        self,
+        row: int,
+        column: int
+    ) -> Any:
+        if (row, column) in self.__blocks:
+            return self.__blocks[(row, column)].transparant_group
+        return self.__definition_material(int(self.__material_ids[row, column])).transparant_group
+
+    def is_solid(
+        self,
+        row: int,
+        column: int
+    ) -> bool:
+        return self.transparant_group(row, column) == 0
+
+    def solid_mask(self) -> ndarray:
+        """Boolean array that is True for every solid block"""
+        if self.__solid_mask is None:
+            definition_solid = zeros(max(self.__definitions) + 1, dtype=bool)
+            for definition_id in self.__definitions:
+                definition_solid[definition_id] = self.__definition_material(definition_id).transparant_group == 0
+            self.__solid_mask = definition_solid[self.__material_ids]
+            for (row, column), block in self.__blocks.items():
+                self.__solid_mask[row, column] = block.transparant_group == 0
+        return self.__solid_mask
+
+    def light_levels(self) -> ndarray:
+        """Array by row and column with the light level of every block. Changing the array changes the light level of
+        the blocks"""
+        return self.__light_levels
+
+    def block_rect(
+        self,
+        row: int,
+        column: int
+    ) -> pygame.Rect:
+        return pygame.Rect((self.topleft[0] + column * con.BLOCK_SIZE.width,
+                            self.topleft[1] + row * con.BLOCK_SIZE.height, con.BLOCK_SIZE.width, con.BLOCK_SIZE.height))
+
+    def to_dict(self) -> List[List[Dict[str, Any]]]:
+        """Dictionaries of all blocks that can be loaded with blocks.Block.from_dict"""
+        block_dicts = []
+        for row_i in range(self.rows):
+            row = []
+            for column_i in range(self.columns):
+                if (row_i, column_i) in self.__blocks:
+                    block = self.__blocks[(row_i, column_i)].block
+                    block_dict = block.to_dict()
+                    if type(block) is blocks.Block and not self.__material_behaviour(type(block.material)):
+                        # blocks without behaviour get an id from their position when loaded
+                        block_dict["block_kwargs"].pop("id_", None)
+                    row.append(block_dict)
+                    continue
+                definition_id = int(self.__material_ids[row_i, column_i])
+                material_dict = self.__definition_material(definition_id).to_dict()
+                row.append({
+                    "material": material_dict.pop("instance_name"),
+                    "pos": self.block_rect(row_i, column_i).topleft,
+                    "needs_board_update": False,
+                    "block_kwargs": {**self.__definitions[definition_id].block_kwargs,
+                                     "light_level": int(self.__light_levels[row_i, column_i])},
+                    "arguments": material_dict
+                })
+            block_dicts.append(row)
+        return block_dicts
+
+    def __create_block(
+        self,
+        row: int,
+        column: int,
+        definition: block_util.MCD
+    ) -> blocks.Block:
+        material_instance = definition.to_instance(depth=row)
+        block_kwargs = {name: value for name, value in definition.block_kwargs.items() if name != "light_level"}
+        block = material_instance.to_block(self.block_rect(row, column).topleft, **block_kwargs)
+        block.set_light_cell(self.__light_levels, row, column)
+        return block
+
+    def __create_view(
+        self,
+        row: int,
+        column: int
+    ) -> blocks.Block:
+        """Create a block that is not kept, the definitions of these blocks have no block arguments. Views of the same
+        block get the same id"""
+        definition_id = int(self.__material_ids[row, column])
+        material_instance = self.__definition_material(definition_id)
+        if not material_instance.is_shared():
+            # materials that are not shared can be changed by the block
+            material_instance = self.__definitions[definition_id].to_instance(depth=row)
+        x = self.topleft[0] + column * con.BLOCK_SIZE.width
+        y = self.topleft[1] + row * con.BLOCK_SIZE.height
+        block = material_instance.to_block((x, y), id_=f"{material_instance.name()}_{x}_{y}")
+        block.set_light_cell(self.__light_levels, row, column)
+        return block
+
+    def __unchanged_definition_id(self, block: blocks.Block) -> Union[int, None]:
+        """Id of the definition that creates the same block as block, None for blocks with behaviour and blocks that
+        are changed, these have to be kept"""
+        material = block.material
+        if type(block) is not blocks.Block or self.__material_behaviour(type(material)) or not material.is_shared():
+            return None
+        definition_id = self.__definition_id(block_util.MCD(type(material), **material.shared_arguments()))
+        if self.__definition_material(definition_id) is not material:
+            return None
+        return definition_id
+
+    def __definition_material(self, definition_id: int) -> base_materials.BaseMaterial:
+        if definition_id not in self.__definition_materials:
+            self.__definition_materials[definition_id] = self.__definitions[definition_id].to_instance()
+        return self.__definition_materials[definition_id]
+
+    def __definition_id(self, definition: block_util.MCD) -> int:
+        """Id of a definition, definitions that create identical blocks share an id. Definitions of only a material
+        get the registry id of the material"""
+        key = self.__definition_key(definition)
+        if isinstance(key, str):
+            definition_id = block_util.material_id(key)
+            if definition_id in self.__definitions:
+                return definition_id
+            # the id of a block is only kept for blocks with behaviour, the light level is saved in the light levels
+            # array
+            definition = block_util.MCD(definition.material)
+        elif key in self.__argument_definition_ids:
+            return self.__argument_definition_ids[key]
+        else:
+            definition_id = len(block_util.material_classes_by_id) + len(self.__argument_definitions)
+            if definition_id > iinfo(uint16).max:
+                raise util.GameException("Too many different materials in one block matrix")
+            if any(name in self.STATELESS_BLOCK_KWARGS for name in definition.block_kwargs):
+                definition = block_util.MCD(definition.material, definition.needs_board_update,
+                                            {name: value for name, value in definition.block_kwargs.items()
+                                             if name not in self.STATELESS_BLOCK_KWARGS}, **definition.kwargs)
+            self.__argument_definitions.append(definition)
+            self.__argument_definition_ids[key] = definition_id
+        self.__definitions[definition_id] = definition
+        self.__definition_behaviour[definition_id] = self.__has_behaviour(definition)
+        return definition_id
+
+    @staticmethod
+    def __definition_key(definition: block_util.MCD) -> Hashable:
+        block_kwargs = {name: value for name, value in definition.block_kwargs.items()
+                        if name not in BlockMatrix.STATELESS_BLOCK_KWARGS}
+        if not definition.needs_board_update and len(definition.kwargs) == 0 and len(block_kwargs) == 0:
+            return definition.name()
+        key = (definition.name(), definition.needs_board_update, tuple(sorted(definition.kwargs.items())),
+               tuple(sorted(block_kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # arguments that can not be compared are never shared
+            return definition
+        return key
+
+    def __has_behaviour(self, definition: block_util.MCD) -> bool:
+        """If blocks of this definition have to exist as an instance from the start"""
+        return definition.needs_board_update or \
+            any(name not in self.STATELESS_BLOCK_KWARGS for name in definition.block_kwargs) or \
+            self.__material_behaviour(definition.material_class())
+
+    @staticmethod
+    def __material_behaviour(material_class: type) -> bool:
+        """If all blocks of a material have behaviour, these blocks are tracked by their id or instance"""
+        return material_class._BLOCK_TYPE is not blocks.Block or \
+            issubclass(material_class, (environment_materials.MultiFloraMaterial, building_materials.Building,
+                                        machine_materials.MachineComponent))
@@ -1,8 +1,7 @@
 from random import uniform
 import pygame
 from math import ceil
-from typing import List, Union, Tuple, Dict, Any
-from threading import Thread
+from typing import List, Union, Tuple, Dict, Any, ClassVar
 
 import block_classes.blocks as block_classes
 import block_classes.buildings as buildings
@@ -10,16 +9,35 @@ import block_classes.materials.building_materials as build_materials
 import block_classes.materials.environment_materials as environment_materials
 import block_classes.materials.machine_materials as machine_materials
 import interfaces.windows.interface_utility as interface_util
-from board import flora, chunks, pathfinding
+from board import flora, chunks, pathfinding, chunk_generation, chunk_paging, chunk_index, spatial_index, lighting
 import block_classes.machine_blocks as machine_blocks
 import network.conveynetwork
 from utility import game_timing, loading_saving, utilities as util, constants as con
 import machines.base_machine as machines
+import entities
 
 
 class Board(loading_saving.Savable, loading_saving.Loadable):
-
-    chunk_matrix: List[List[Union[chunks.Chunk, None]]]
+    # maximum amount of generated chunks that are added to the board every update
+    MAX_CHUNK_MERGES_PER_UPDATE: ClassVar[int] = 1
+    # chunks are generated ahead of the camera for where it is predicted to be after this many seconds
+    PREFETCH_SECONDS: ClassVar[float] = 1.0
+    # minimum speed of the camera in pixels per second before chunks are generated ahead of it
+    MIN_PREFETCH_SPEED: ClassVar[float] = 100
+    # no chunks are generated ahead of the camera while this many chunks are generating. Every chunk holds 4 chunk sized
+    # surfaces so this limits the memory used by chunks that are not needed yet
+    MAX_PREFETCH_CHUNKS: ClassVar[int] = 8
+    # time in ms between checks if the chunks in memory exceed the memory budget
+    PAGING_UPDATE_TIME: ClassVar[int] = 250
+    # maximum amount of chunks that are written to disk or read from disk every update
+    MAX_CHUNK_PAGES_PER_UPDATE: ClassVar[int] = 1
+    # column and row offsets of the blocks around a block in the order N, E, S, W
+    NEIGHBOUR_OFFSETS: ClassVar[Tuple[Tuple[int, int], ...]] = ((0, -1), (1, 0), (0, 1), (-1, 0))
+    # column and row offsets of the blocks around a block in the order N, NE, E, SE, S, SW, W, NW
+    DIAGONAL_NEIGHBOUR_OFFSETS: ClassVar[Tuple[Tuple[int, int], ...]] = \
+        ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+
+    chunk_index: chunk_index.ChunkIndex
 
     def __init__(self, board_generator, main_sprite_group, progress_var):
         # TODO: safe load machines
@@ -37,15 +55,28 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
 
         self.buildings = {}
         self.machines = {}
+        # buildings and machines by location for finding them without checking all of them
+        self.__building_index = spatial_index.SpatialIndex()
+        self.__machine_index = spatial_index.SpatialIndex()
         self.variable_blocks = {}
-        self.changed_light_blocks = set()
+        # (column, row) of the blocks with a light level that is not drawn yet
+        self.changed_light_coordinates = set()
 
         self.board_generator = board_generator
-        self.chunk_matrix = [[None for _ in range(int(con.BOARD_SIZE.width / con.CHUNK_SIZE.width))]
-                             for _ in range(int(con.BOARD_SIZE.height / con.CHUNK_SIZE.height))]
+        self.chunk_index = chunk_index.ChunkIndex(ceil(con.ORIGINAL_BOARD_SIZE.width / con.CHUNK_SIZE.width),
+                                                  ceil(con.ORIGINAL_BOARD_SIZE.height / con.CHUNK_SIZE.height))
+        self.__lighting = lighting.LightingEngine(self.chunk_index)
         self.loaded_chunks = set()
         # chunks that are currently loading to make sure that no double chunks are generated
         self._loading_chunks = set()
+        self.__generation_pool = chunk_generation.ChunkGenerationPool(self.__create_chunk)
+        self.__pager = chunk_paging.ChunkPager(con.CHUNK_MEMORY_BUDGET * 1_000_000)
+        # the pathfinding chunks of paged chunks stay in the pathfinding tree so paths through them keep working
+        self.__paged_pathfinding_chunks = {}
+        self.__paging_update_time = 0
+        # the chunk coordinates in view, only recalculated when the camera moves over a chunk border or zooms
+        self.__visible_chunk_range = None
+        self.__visible_chunk_coords = []
         self.generate_chunks(*con.START_LOAD_AREA, thread_it=False, progress_var=progress_var)
 
         # last placed highlighted rectangle
@@ -54,7 +85,7 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         self.__grow_update_time = 0
         self.terminal = None
 
-    def __init_load__(self, board_generator=None, sprite_group=None, chunk_matrix=None, grow_update_time=None):
+    def __init_load__(self, board_generator=None, sprite_group=None, chunk_list=None, grow_update_time=None):
         self.inventorie_blocks = []
         self.main_sprite_group = sprite_group
 
@@ -66,25 +97,40 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         self.conveyor_network = network.conveynetwork.ConveyorNetwork()
 
         self.buildings = {}
+        self.machines = {}
+        # buildings and machines by location for finding them without checking all of them
+        self.__building_index = spatial_index.SpatialIndex()
+        self.__machine_index = spatial_index.SpatialIndex()
         self.variable_blocks = {}
-        self.changed_light_blocks = set()
+        # (column, row) of the blocks with a light level that is not drawn yet
+        self.changed_light_coordinates = set()
 
         self.board_generator = board_generator
-        self.chunk_matrix = chunk_matrix
+        self.chunk_index = chunk_index.ChunkIndex(ceil(con.ORIGINAL_BOARD_SIZE.width / con.CHUNK_SIZE.width),
+                                                  ceil(con.ORIGINAL_BOARD_SIZE.height / con.CHUNK_SIZE.height))
+        self.__lighting = lighting.LightingEngine(self.chunk_index)
         self.loaded_chunks = set()
+        self.__pager = chunk_paging.ChunkPager(con.CHUNK_MEMORY_BUDGET * 1_000_000)
+        # the pathfinding chunks of paged chunks stay in the pathfinding tree so paths through them keep working
+        self.__paged_pathfinding_chunks = {}
+        self.__paging_update_time = 0
+        # the chunk coordinates in view, only recalculated when the camera moves over a chunk border or zooms
+        self.__visible_chunk_range = None
+        self.__visible_chunk_coords = []
         all_update_blocks = []
-        for row in chunk_matrix:
-            for chunk in row:
-                if chunk is None:
-                    continue
-                self.loaded_chunks.add(chunk)
-                self.pathfinding.pathfinding_tree.add_chunk(chunk.pathfinding_chunk)
-                all_update_blocks.extend(chunk.get_board_update_blocks())
+        for chunk in chunk_list:
+            self.chunk_index.add(*chunk.coord, chunk)
+            self.loaded_chunks.add(chunk)
+            self.__pager.use(chunk.coord)
+            self.pathfinding.pathfinding_tree.add_chunk(chunk.pathfinding_chunk)
+            all_update_blocks.extend(chunk.get_board_update_blocks())
 
         self.add_blocks(*all_update_blocks, update=True)
-        self.changed_light_blocks.update(all_update_blocks)
+        self.changed_light_coordinates.update((interface_util.p_to_c(block.rect.x), interface_util.p_to_r(block.rect.y))
+                                              for block in all_update_blocks)
         # chunks that are currently loading to make sure that no double chunks are generated
         self._loading_chunks = set()
+        self.__generation_pool = chunk_generation.ChunkGenerationPool(self.__create_chunk)
 
         # last placed highlighted rectangle
         self.__highlight_rectangle = None
@@ -99,8 +145,8 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         # TODO handle chunks currently being loaded
         return {
             "board_generator": self.board_generator.to_dict(),
-            "chunk_matrix": [[chunk.to_dict() if chunk is not None else None for chunk in row]
-                             for row in self.chunk_matrix],
+            "chunks": [chunk.to_dict() for chunk in self.chunk_index] +
+                      [self.__pager.read(coord) for coord in self.__pager.paged_chunks()],
             "buildings": {name: building.to_dict() for name, building in self.buildings.items()},
             "grow_update_time": self.__grow_update_time,
             "plants": self.all_plants.to_dict()
@@ -111,12 +157,20 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         from board_generation import generation
         board_generator = generation.BoardGenerator.from_dict(dct["board_generator"])
         plants = flora.Flora.from_dict(dct["plants"])
-        chunk_matrix = [[chunks.Chunk.from_dict(chunk_d, sprite_group=sprite_group, plants=plants)
-                         if chunk_d is not None else None for chunk_d in row]
-                        for row in dct["chunk_matrix"]]
-        return cls.load(sprite_group=sprite_group, board_generator=board_generator, chunk_matrix=chunk_matrix,
+        if "chunks" in dct:
+            chunk_dicts = dct["chunks"]
+        else:
+            # boards used to be saved as a matrix of chunks
+            chunk_dicts = [chunk_d for row in dct["chunk_matrix"] for chunk_d in row if chunk_d is not None]
+        chunk_list = [chunks.Chunk.from_dict(chunk_d, sprite_group=sprite_group, plants=plants)
+                      for chunk_d in chunk_dicts]
+        return cls.load(sprite_group=sprite_group, board_generator=board_generator, chunk_list=chunk_list,
                         grow_update_time=dct["grow_update_time"])
 
+    def stop(self):
+        """Stop the chunk generation threads, the board should not be updated anymore after this"""
+        self.__generation_pool.stop()
+
     def setup_board(self):
         self.__add_starter_buildings()
         for _ in range(10):
@@ -124,8 +178,9 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
 
     def update_board(self):
 
+        self.__update_lighting()
         self.change_light_levels()
-        self.changed_light_blocks = set()
+        self.changed_light_coordinates = set()
 
         self.pathfinding.update()
 
@@ -138,8 +193,10 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         self.__update_machines()
 
         # chunk updates
-        for chunk in self.loaded_chunks.copy():
-            if not chunk.is_showing():
+        self.__update_visible_chunks()
+        for col_i, row_i in self.__visible_chunk_coords:
+            chunk = self.chunk_index.get(col_i, row_i)
+            if chunk is None or not chunk.is_showing():
                 continue
             # when the first update happens to a chunk meaning the player is there generate new ones.
             if not chunk.changed[1] and chunk.changed[0]:
@@ -147,6 +204,185 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
                 chunk_coord = interface_util.p_to_cp(chunk.rect.topleft)
                 self.generate_chunks(list(range(chunk_coord[0] - 1, chunk_coord[0] + 2)),
                                      list(range(chunk_coord[1] - 1, chunk_coord[1] + 2)))
+        self.__update_chunk_generation()
+        self.__update_chunk_paging()
+
+    @game_timing.time_function("chunk generation update")
+    def __update_chunk_generation(self):
+        """Re-prioritise and cancel chunk generation requests based on the current camera location and add a limited
+        amount of generated chunks to the board"""
+        if self.main_sprite_group.target is not None:
+            keep_rect = self.__generation_keep_rect()
+            cancelled = self.__generation_pool.update_requests(
+                self.__chunk_generation_priority,
+                lambda coord: keep_rect.colliderect(self.__chunk_rect(*coord))
+            )
+            for col_i, row_i in cancelled:
+                self._loading_chunks.remove((col_i, row_i))
+                # make sure that the chunks next to the cancelled chunk request it again when they are updated
+                for _, neighbour in self.chunk_index.in_range(col_i - 1, col_i + 2, row_i - 1, row_i + 2):
+                    neighbour.changed[1] = False
+            self.__prefetch_chunks(keep_rect)
+        for (col_i, row_i), chunk in self.__generation_pool.finished_chunks(self.MAX_CHUNK_MERGES_PER_UPDATE):
+            self.__add_chunk(col_i, row_i, chunk)
+        # failed chunks are not retried directly, they are requested again like any other chunk that is not loaded
+        for coord in self.__generation_pool.failed_chunks():
+            self._loading_chunks.remove(coord)
+
+    def __prefetch_chunks(self, keep_rect: pygame.Rect):
+        """Request chunks in the area the camera moves through within the next PREFETCH_SECONDS so generation is done
+        before the chunks become visible"""
+        camera = self.main_sprite_group.target
+        if camera.velocity.length() < self.MIN_PREFETCH_SPEED or \
+                len(self._loading_chunks) >= self.MAX_PREFETCH_CHUNKS:
+            return
+        view_rect = self.__view_rect()
+        predicted_view_rect = view_rect.copy()
+        predicted_view_rect.center = camera.predicted_center(self.PREFETCH_SECONDS)
+        prefetch_rect = view_rect.union(predicted_view_rect).clip(keep_rect)
+
+        prefetch_coords = []
+        col_start, col_end, row_start, row_end = self.chunk_index.coord_range(prefetch_rect)
+        for row_i in range(row_start, row_end):
+            for col_i in range(col_start, col_end):
+                if (col_i, row_i) not in self.chunk_index and (col_i, row_i) not in self._loading_chunks and \
+                        not self.__pager.is_paged((col_i, row_i)):
+                    prefetch_coords.append((col_i, row_i))
+        prefetch_coords.sort(key=self.__chunk_generation_priority)
+        for col_i, row_i in prefetch_coords[:self.MAX_PREFETCH_CHUNKS - len(self._loading_chunks)]:
+            self.generate_chunks([col_i], [row_i])
+
+    def __update_visible_chunks(self):
+        """Recalculate the coordinates of the chunks in view when the camera moved over a chunk border or the zoom
+        changed"""
+        if self.main_sprite_group.target is None:
+            return
+        # the camera stops at the edges of the board so the view does as well
+        visible_range = self.chunk_index.coord_range(self.__view_rect().clamp(self.chunk_index.rect))
+        if visible_range == self.__visible_chunk_range:
+            return
+        self.__visible_chunk_range = visible_range
+        self.__visible_chunk_coords = [(col_i, row_i) for row_i in range(visible_range[2], visible_range[3])
+                                       for col_i in range(visible_range[0], visible_range[1])]
+
+    def __view_rect(self) -> pygame.Rect:
+        """The area of the board that is visible around the camera at the current zoom"""
+        zoom = con.BOARD_SIZE.width / con.ORIGINAL_BOARD_SIZE.width
+        view_rect = pygame.Rect((0, 0, con.SCREEN_SIZE.width / zoom, con.SCREEN_SIZE.height / zoom))
+        view_rect.center = self.main_sprite_group.target.orig_rect.center
+        return view_rect
+
+    def __generation_keep_rect(self) -> pygame.Rect:
+        """Chunk requests that fall outside this rectangle are cancelled. It covers twice the visible area at the
+        current zoom and a border of 2 chunks so chunks next to visible chunks are never cancelled"""
+        zoom = con.BOARD_SIZE.width / con.ORIGINAL_BOARD_SIZE.width
+        keep_rect = pygame.Rect((0, 0, con.SCREEN_SIZE.width * 2 / zoom + con.CHUNK_SIZE.width * 4,
+                                 con.SCREEN_SIZE.height * 2 / zoom + con.CHUNK_SIZE.height * 4))
+        keep_rect.center = self.main_sprite_group.target.orig_rect.center
+        return keep_rect
+
+    def __chunk_generation_priority(self, coord: Tuple[int, int]) -> float:
+        """Chunks closest to the camera are generated first"""
+        if self.main_sprite_group.target is None:
+            return 0
+        return util.eucledian_distance(self.__chunk_rect(*coord).center,
+                                      self.main_sprite_group.target.orig_rect.center)
+
+    @staticmethod
+    def __chunk_rect(col_i: int, row_i: int) -> pygame.Rect:
+        return pygame.Rect((col_i * con.CHUNK_SIZE.width, row_i * con.CHUNK_SIZE.height,
+                            con.CHUNK_SIZE.width, con.CHUNK_SIZE.height))
+
+    @game_timing.time_function("chunk paging update")
+    def __update_chunk_paging(self):
+        """Read chunks back from disk when the camera gets close to them and write the least recently used chunks to
+        disk when the chunks in memory exceed the memory budget"""
+        if self.main_sprite_group.target is None:
+            return
+        for col_i, row_i in self.__visible_chunk_coords:
+            chunk = self.chunk_index.get(col_i, row_i)
+            if chunk is not None and chunk.is_showing():
+                self.__pager.use((col_i, row_i))
+        if len(self.__pager) > 0:
+            needed_rect = self.__view_rect().inflate(con.CHUNK_SIZE.width * 2, con.CHUNK_SIZE.height * 2)
+            needed_coords = [coord for coord in self.__pager.paged_chunks()
+                             if needed_rect.colliderect(self.__chunk_rect(*coord))]
+            needed_coords.sort(key=self.__chunk_generation_priority)
+            for col_i, row_i in needed_coords[:self.MAX_CHUNK_PAGES_PER_UPDATE]:
+                self.__page_in_chunk(col_i, row_i)
+
+        self.__paging_update_time += con.GAME_TIME.get_time()
+        if self.__paging_update_time < self.PAGING_UPDATE_TIME:
+            return
+        self.__paging_update_time = 0
+        memory_used = sum(chunk.memory_size() for chunk in self.loaded_chunks)
+        if memory_used <= self.__pager.memory_budget:
+            return
+        keep_rect = self.__generation_keep_rect()
+        worker_rects = [sprite.orig_rect for sprite in self.main_sprite_group.sprites()
+                        if isinstance(sprite, entities.Worker)]
+        paged_chunks = 0
+        for col_i, row_i in self.__pager.least_recently_used():
+            if memory_used <= self.__pager.memory_budget or paged_chunks >= self.MAX_CHUNK_PAGES_PER_UPDATE:
+                break
+            chunk = self.chunk_index.get(col_i, row_i)
+            if chunk is None or not self.__can_page_out(chunk, keep_rect, worker_rects):
+                continue
+            memory_used -= chunk.memory_size()
+            self.__page_out_chunk(chunk)
+            paged_chunks += 1
+
+    @staticmethod
+    def __can_page_out(
+        chunk: chunks.Chunk,
+        keep_rect: pygame.Rect,
+        worker_rects: List[pygame.Rect]
+    ) -> bool:
+        """Chunks can be written to disk when they are away from the camera and workers, have nothing selected, have no
+        pathfinding changes to process and have no blocks that the board keeps track of"""
+        if chunk.is_showing() or chunk.rect.colliderect(keep_rect) or chunk.has_selection() or \
+                chunk.pathfinding_chunk.has_changes():
+            return False
+        worker_area = chunk.rect.inflate(con.CHUNK_SIZE.width * 2, con.CHUNK_SIZE.height * 2)
+        if worker_area.collidelist(worker_rects) != -1:
+            return False
+        for block in chunk.created_blocks():
+            if type(block.block) is not block_classes.Block or \
+                    isinstance(block.material, (build_materials.Building, environment_materials.MultiFloraMaterial,
+                                                machine_materials.MachineComponent)):
+                return False
+        return True
+
+    def __page_out_chunk(self, chunk: chunks.Chunk):
+        """Write a chunk to disk and remove it from the board"""
+        col_i, row_i = chunk.coord
+        # pending light changes can reach the chunk
+        self.__update_lighting()
+        chunk_dict = chunk.to_dict()
+        self.main_sprite_group.remove(*chunk.layers)
+        # the air rectangles are kept, the chunk can not change while paged so only the block matrix is released
+        chunk.pathfinding_chunk.sleep()
+        chunk.pathfinding_chunk.matrix = None
+        self.__paged_pathfinding_chunks[(col_i, row_i)] = chunk.pathfinding_chunk
+        self.changed_light_coordinates = {(column, row) for column, row in self.changed_light_coordinates
+                                          if not chunk.rect.collidepoint(column * con.BLOCK_SIZE.width,
+                                                                         row * con.BLOCK_SIZE.height)}
+        self.loaded_chunks.remove(chunk)
+        self.chunk_index.remove(col_i, row_i)
+        self.__lighting.forget_chunk((col_i, row_i))
+        self.__pager.page_out((col_i, row_i), chunk_dict)
+
+    def __page_in_chunk(self, col_i: int, row_i: int) -> chunks.Chunk:
+        """Read a chunk from disk and add it to the board again"""
+        chunk = chunks.Chunk.from_dict(self.__pager.page_in((col_i, row_i)), sprite_group=self.main_sprite_group,
+                                       plants=self.all_plants)
+        self.chunk_index.add(col_i, row_i, chunk)
+        self.loaded_chunks.add(chunk)
+        # reuse the air rectangles that stayed in the pathfinding tree, paths can still point to them
+        pathfinding_chunk = self.__paged_pathfinding_chunks.pop((col_i, row_i))
+        pathfinding_chunk.matrix = chunk.pathfinding_chunk.matrix
+        chunk.pathfinding_chunk = pathfinding_chunk
+        return chunk
 
     @game_timing.time_function("plant update")
     def __update_plants(self):
@@ -167,11 +403,10 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
 
     @game_timing.time_function("variable block updates")
     def __update_variable_blocks(self):
-        """Check all blocks with varaible surfaces that potentially need to be changed if that is the case redraw the
-        surface"""
-        # copy is required because of generation potentially adding blocks while looping
-        for block in self.variable_blocks.copy().values():
-            if block.changed:
+        """Redraw the blocks with variable surfaces that queued themselves because their surface changed"""
+        # blocks that are not on this board are skipped, they are requeued when added to the board
+        for block in block_classes.VariableSurfaceBlock.pop_changed_blocks():
+            if self.variable_blocks.get(block.id) is block and block.changed:
                 self.add_blocks(block, update=False)
 
     def __update_machines(self):
@@ -185,42 +420,68 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         thread_it: bool = True,
         progress_var: Union[List[str], None] = None
     ):
-        for row_li, row_gi in enumerate(row_coords_load):
-            for col_li, col_gi in enumerate(col_coords_load):
-                if progress_var:
-                    current_chunk = (row_li * len(con.START_LOAD_AREA[1])) + col_li + 1
-                    progress_var[0] = f"Generating chunk {current_chunk} out of {con.TOTAL_START_CHUNKS}..."
+        # chunks that are generated directly, these are generated together to generate them in parallel
+        direct_coords = []
+        for row_gi in row_coords_load:
+            for col_gi in col_coords_load:
                 # make sure to not generate chunks outside the board
-                if row_gi < 0 or row_gi > ceil(con.ORIGINAL_BOARD_SIZE.height / con.CHUNK_SIZE.height) - 1 or \
-                        col_gi < 0 or col_gi > ceil(con.ORIGINAL_BOARD_SIZE.width / con.CHUNK_SIZE.width) - 1:
+                if not self.chunk_index.is_inside(col_gi, row_gi):
                     continue
-                # make sure 2 threads are not working on the same thing
-                if self.chunk_matrix[row_gi][col_gi] is not None or (col_gi, row_gi) in self._loading_chunks:
+                # make sure 2 threads are not working on the same thing and paged chunks are not generated again
+                if (col_gi, row_gi) in self.chunk_index or (col_gi, row_gi) in self._loading_chunks or \
+                        self.__pager.is_paged((col_gi, row_gi)):
                     continue
                 self._loading_chunks.add((col_gi, row_gi))
                 if thread_it:
-                    Thread(target=self.generate_chunk, args=(row_gi, col_gi)).start()
+                    self.__generation_pool.request(col_gi, row_gi, self.__chunk_generation_priority((col_gi, row_gi)))
                 else:
-                    self.generate_chunk(row_gi, col_gi)
+                    direct_coords.append((col_gi, row_gi))
+        if len(direct_coords) == 0:
+            return
+        if progress_var:
+            progress_var[0] = f"Generating {len(direct_coords)} chunks..."
+        generated_matrices = self.board_generator.generate_chunks(
+            [(col_i * con.CHUNK_SIZE.width, row_i * con.CHUNK_SIZE.height) for col_i, row_i in direct_coords])
+        for index, ((col_i, row_i), matrices) in enumerate(zip(direct_coords, generated_matrices)):
+            if progress_var:
+                progress_var[0] = f"Creating chunk {index + 1} out of {len(direct_coords)}..."
+            self.__add_chunk(col_i, row_i, self.__chunk_from_matrices(col_i, row_i, *matrices))
 
     def generate_chunk(self, row_i, col_i):
+        """Generate a chunk and directly add it to the board"""
+        self.__add_chunk(col_i, row_i, self.__create_chunk(col_i, row_i))
+
+    def __create_chunk(self, col_i, row_i) -> chunks.Chunk:
+        point_pos = (col_i * con.CHUNK_SIZE.width, row_i * con.CHUNK_SIZE.height)
+        return self.__chunk_from_matrices(col_i, row_i, *self.board_generator.generate_chunk(point_pos))
+
+    def __chunk_from_matrices(
+        self,
+        col_i: int,
+        row_i: int,
+        for_string_matrix: List[List],
+        back_string_matrix: List[List]
+    ) -> chunks.Chunk:
         point_pos = (col_i * con.CHUNK_SIZE.width, row_i * con.CHUNK_SIZE.height)
-        for_string_matrix, back_string_matrix = self.board_generator.generate_chunk(point_pos)
         if (col_i, row_i) == con.START_CHUNK_POS:
             chunk = chunks.StartChunk(point_pos, for_string_matrix, back_string_matrix, self.main_sprite_group,
                                       self.all_plants, changed=(False, True))
         else:
             chunk = chunks.Chunk(point_pos, for_string_matrix, back_string_matrix, self.main_sprite_group,
                                  self.all_plants)
-        self.chunk_matrix[row_i][col_i] = chunk
+        return chunk
+
+    def __add_chunk(self, col_i, row_i, chunk: chunks.Chunk):
+        self.chunk_index.add(col_i, row_i, chunk)
         self.loaded_chunks.add(chunk)
+        self.__pager.use((col_i, row_i))
         self.pathfinding.pathfinding_tree.add_chunk(chunk.pathfinding_chunk)
         self._loading_chunks.remove((col_i, row_i))
         update_blocks = chunk.get_board_update_blocks()
         self.add_blocks(*update_blocks)
 
     def get_start_chunk(self):
-        return self.chunk_matrix[con.START_CHUNK_POS[1]][con.START_CHUNK_POS[0]]
+        return self.chunk_index.get(*con.START_CHUNK_POS)
 
     def get_chunks_from_rect(self, rect):
         affected_chunks = []
@@ -252,37 +513,83 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         return affected_chunks
 
     def get_blocks_from_rect(self, rect):
-        blocks = []
-        for chunk, rect in self.get_chunks_from_rect(rect):
-            for y_coord in range(rect.top, rect.bottom, con.BLOCK_SIZE.height):
-                for x_coord in range(rect.left, rect.right, con.BLOCK_SIZE.width):
-                    point = (x_coord, y_coord)
-                    blocks.append(chunk.get_block(point))
-        return blocks
+        return [block for row in self.block_window(rect) for block in row if block is not None]
+
+    def block_window(
+        self,
+        rect: pygame.Rect
+    ) -> List[List[Union[None, util.BlockPointer]]]:
+        """Get a matrix of all blocks that overlap with a rectangle. Blocks that are outside the board or in chunks that
+        are not loaded are None. The blocks of every chunk are collected at once"""
+        # floor division to make sure that points left and above the board end up outside the board
+        column_start, row_start = rect.left // con.BLOCK_SIZE.width, rect.top // con.BLOCK_SIZE.height
+        column_end = (rect.right - 1) // con.BLOCK_SIZE.width + 1
+        row_end = (rect.bottom - 1) // con.BLOCK_SIZE.height + 1
+        window = [[None for _ in range(column_end - column_start)] for _ in range(row_end - row_start)]
+        chunk_columns = interface_util.p_to_c(con.CHUNK_SIZE.width)
+        chunk_rows = interface_util.p_to_r(con.CHUNK_SIZE.height)
+        for chunk_row in range(row_start // chunk_rows, (row_end - 1) // chunk_rows + 1):
+            for chunk_column in range(column_start // chunk_columns, (column_end - 1) // chunk_columns + 1):
+                chunk = self.chunk_from_point((chunk_column * con.CHUNK_SIZE.width, chunk_row * con.CHUNK_SIZE.height))
+                if chunk is None:
+                    continue
+                # the part of the window that is covered by this chunk in rows and columns of the board
+                first_row = max(row_start, chunk_row * chunk_rows)
+                last_row = min(row_end, (chunk_row + 1) * chunk_rows)
+                first_column = max(column_start, chunk_column * chunk_columns)
+                last_column = min(column_end, (chunk_column + 1) * chunk_columns)
+                chunk_blocks = chunk.get_local_blocks(first_row - chunk_row * chunk_rows,
+                                                      last_row - chunk_row * chunk_rows,
+                                                      first_column - chunk_column * chunk_columns,
+                                                      last_column - chunk_column * chunk_columns)
+                for row_i, row in enumerate(chunk_blocks, start=first_row - row_start):
+                    window[row_i][first_column - column_start: last_column - column_start] = row
+        return window
 
     def surrounding_blocks(
         self,
-        block: block_classes.Block
+        block: block_classes.Block,
+        keep: bool = False
     ) -> List[Union[None, util.BlockPointer]]:
         """
         Calculate the surrounding block_classes of a certain block in the order NESW and None if there is no block
         (edge of the playing field).
 
-        It is important to note that this function returns pointers to the matrix blocks, this means that if the block
-        in the matrix changes the pointer will change.
+        It is important to note that with keep this function returns pointers to the matrix blocks, this means that if
+        the block in the matrix changes the pointer will change. Otherwise blocks without behaviour are temporary views.
         """
-        blocks = [None for _ in range(4)]
-        for index, new_position in enumerate([(0, -1), (1, 0), (0, 1), (-1, 0)]):
-            surrounding_pos = (block.rect.x + new_position[0] * con.BLOCK_SIZE.width,
-                               block.rect.y + new_position[1] * con.BLOCK_SIZE.height)
-            # Make sure within range
-            if surrounding_pos[0] > con.ORIGINAL_BOARD_SIZE.width or surrounding_pos[0] < 0 or \
-                    surrounding_pos[1] > con.ORIGINAL_BOARD_SIZE.height or surrounding_pos[1] < 0:
+        return self.block_neighbourhood(block, keep=keep)
+
+    def block_neighbourhood(
+        self,
+        block: block_classes.Block,
+        diagonal: bool = False,
+        keep: bool = False
+    ) -> List[Union[None, util.BlockPointer]]:
+        """Get the blocks around a block in the order N, E, S, W or N, NE, E, SE, S, SW, W, NW when diagonal is True.
+        Blocks that are outside the board or in chunks that are not loaded are None. The chunk of the block is looked
+        up once, only neighbours in other chunks require another chunk lookup. With keep the pointers follow changes of
+        the blocks"""
+        chunk = self.chunk_from_point(block.rect.topleft)
+        column, row = interface_util.p_to_c(block.rect.x), interface_util.p_to_r(block.rect.y)
+        chunk_columns = interface_util.p_to_c(con.CHUNK_SIZE.width)
+        chunk_rows = interface_util.p_to_r(con.CHUNK_SIZE.height)
+        if chunk is not None:
+            local_column = column - interface_util.p_to_c(chunk.rect.x)
+            local_row = row - interface_util.p_to_r(chunk.rect.y)
+        blocks = []
+        for column_offset, row_offset in self.DIAGONAL_NEIGHBOUR_OFFSETS if diagonal else self.NEIGHBOUR_OFFSETS:
+            if chunk is not None and 0 <= local_column + column_offset < chunk_columns and \
+                    0 <= local_row + row_offset < chunk_rows:
+                blocks.append(chunk.get_local_block(local_row + row_offset, local_column + column_offset, keep))
                 continue
-            chunk = self.chunk_from_point(surrounding_pos)
-            if chunk:
-                surrounding_block = chunk.get_block(surrounding_pos)
-                blocks[index] = surrounding_block
+            neighbour_point = ((column + column_offset) * con.BLOCK_SIZE.width,
+                               (row + row_offset) * con.BLOCK_SIZE.height)
+            if not self.chunk_index.rect.collidepoint(neighbour_point):
+                blocks.append(None)
+                continue
+            neighbour_chunk = self.chunk_from_point(neighbour_point)
+            blocks.append(neighbour_chunk.get_block(neighbour_point, keep) if neighbour_chunk is not None else None)
         return blocks
 
     def surrounding_chunks(self, chunk):
@@ -354,6 +661,7 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         building_instance = self.buildings.pop(block.id, None)
         if building_instance is None:
             return []
+        self.__building_index.remove(building_instance.id)
         blocks = building_instance.blocks
         removed_items = building_instance.destroy()
         for row in blocks:
@@ -363,13 +671,14 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         return removed_items
 
     def remove_machine_component(self, block):
-        for machine in self.machines.values():
+        for machine in self.__machine_index.overlapping(block.rect):
             if block in machine:
                 machine.remove_block(block)
                 chunk = self.chunk_from_point(block.rect.topleft)
                 chunk.remove_blocks(block)
                 if machine.size <= 0:
                     del self.machines[machine.id]
+                    self.__machine_index.remove(machine.id)
                 break
         return block.destroy()
 
@@ -384,7 +693,7 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
                 block = block.block
             if isinstance(block.material, build_materials.Building):
                 if update and isinstance(block, block_classes.VariableSurfaceBlock):
-                    self.variable_blocks[block.id] = block
+                    self.__add_variable_block(block)
                 self.add_building(block)
                 continue
             if isinstance(block.material, machine_materials.MachineComponent):
@@ -392,26 +701,37 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
             if isinstance(block, block_classes.ConveyorNetworkBlock):
                 self.conveyor_network.add(block)
             if update and isinstance(block, block_classes.VariableSurfaceBlock):
-                self.variable_blocks[block.id] = block
+                self.__add_variable_block(block)
             if update and isinstance(block, block_classes.SurroundableBlock):
-                block.surrounding_blocks = self.surrounding_blocks(block)
+                block.surrounding_blocks = self.surrounding_blocks(block, keep=True)
             chunk = self.chunk_from_point(block.coord)
             if update:
                 self.__set_block_lighting(block)
             chunk.add_blocks(block)
 
+    def __add_variable_block(
+        self,
+        block: block_classes.VariableSurfaceBlock
+    ):
+        self.variable_blocks[block.id] = block
+        # changes that where made before the block was on the board still have to be drawn
+        block.requeue()
+
     def __set_block_lighting(
         self,
         block: block_classes.Block
     ):
         """Set the lighting for one block specifically"""
+        # the light of the surrounding blocks has to be up to date
+        self.__update_lighting()
         surrounding_blocks = self.surrounding_blocks(block)
         valid_surrounding_blocks = [b for b in surrounding_blocks if b is not None]
         if len(valid_surrounding_blocks) == 0:
             return
         max_light_block = max(valid_surrounding_blocks, key=lambda x: x.light_level)
         change = con.DECREASE_SPEED_SOLID if max_light_block.is_solid() else con.DECREASE_SPEED
-        block.light_level = max_light_block.light_level - change
+        block.light_level = max(0, max_light_block.light_level - change)
+        self.__lighting.set_light_level(block.rect.topleft, block.light_level)
 
     def add_building(self, block_of_building: Union[block_classes.Block, buildings.Building]):
         # if the id is already present make sure that the building is not added repeadetly
@@ -427,6 +747,7 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
                 block_of_building = buildings.material_mapping[block_of_building.material.name()](
                     block_of_building.rect.topleft, self.main_sprite_group)
         self.buildings[block_of_building.id] = block_of_building
+        self.__building_index.add(block_of_building.id, block_of_building)
         for row in block_of_building.blocks:
             for block in row:
                 if hasattr(block, "inventory"):
@@ -435,9 +756,11 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
                 chunk.add_blocks(block)
 
     def add_machine(self, block):
-        # collect all neighboring machines to a block
+        # collect all neighboring machines to a block, only machines that overlap the surrounding blocks can be
+        # neighbours
         neighbour_machines = []
-        for machine in self.machines.values():
+        surrounding_rect = block.rect.inflate(con.BLOCK_SIZE.width * 2, con.BLOCK_SIZE.height * 2)
+        for machine in self.__machine_index.overlapping(surrounding_rect):
             if machine.can_add(block.coord):
                 neighbour_machines.append(machine)
 
@@ -448,9 +771,13 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
                 for machine in neighbour_machines[1:]:
                     neighbour_machines[0].add_machine(machine, block.coord)
                     del self.machines[machine.id]
+                    self.__machine_index.remove(machine.id)
+            # the machine grew so it has to be in the buckets of the new rect
+            self.__machine_index.update(neighbour_machines[0].id)
         else:
             new_machine = machines.Machine(block)
             self.machines[new_machine.id] = new_machine
+            self.__machine_index.add(new_machine.id, new_machine)
 
     def adjust_lighting(
         self,
@@ -458,101 +785,64 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         radius: int,
         point_light: int
     ):
-        """extend in a diamond around a center point and assign new light values based on the light point. This is a
-        function for updating the light around a light source"""
-        point_light = min(point_light, con.MAX_LIGHT)
+        """Light up the blocks in a diamond around a center point. This light stays after the point moves, it is used
+        for revealing the board around workers. The light is changed at the next board update together with all
+        other reveals"""
+        self.__lighting.reveal(point, radius, point_light)
 
-        start_block = self.__block_from_point(point)
-        if start_block is None:
-            return
-        if start_block.light_level < point_light:
-            start_block.light_level = point_light
-            self.changed_light_blocks.add(start_block)
-        total_column_blocks = int(radius / con.BLOCK_SIZE.width)
-        total_row_blocks = int(radius / con.BLOCK_SIZE.height)
-
-        light_level = [point_light, point_light]
-        for row_i in range(total_row_blocks):
-            for row_s_i, sign in enumerate((-1, 1)):
-                if light_level[row_s_i] <= 0:
-                    continue
-                if light_level[0] <= 0 and light_level[1] <= 0:
-                    break
-                new_block_y = point[1] + sign * row_i * con.BLOCK_SIZE.height
-                next_block = self.__block_from_point((point[0], new_block_y))
-                if next_block is None:
-                    continue
-                self.__select_col_light_blocks(total_column_blocks + 1 - row_i, [point[0], new_block_y],
-                                               light_level[row_s_i], sign)
-                change = con.DECREASE_SPEED_SOLID if next_block.is_solid() else con.DECREASE_SPEED
-                light_level[row_s_i] -= change
+    def __update_lighting(self):
+        """Do the reveals that where collected since the last update"""
+        self.changed_light_coordinates.update(self.__lighting.update())
 
-    def __select_col_light_blocks(
+    def add_light_source(
         self,
-        extend_total: int,
-        point: Union[Tuple[int, int], List],
-        point_light: int,
-        row_sign: int
-    ):
-        light_level = [point_light, point_light]
-        for col_i in range(extend_total):
-            for col_s_i, sign in enumerate((-1, 1)):
-                if light_level[col_s_i] <= 0:
-                    continue
-                if light_level[0] <= 0 and light_level[1] <= 0:
-                    break
-                new_block_x = point[0] + sign * col_i * con.BLOCK_SIZE.width
-                next_block = self.__block_from_point((new_block_x, point[1]))
-                adjacent_block = self.__block_from_point((new_block_x, point[1] +
-                                                          (row_sign * - 1) * con.BLOCK_SIZE.height))
-                if next_block is None:
-                    continue
-                if light_level[col_s_i] != next_block.light_level:
-                    self.__change_block_light_level(light_level[col_s_i], next_block)
-                change = con.DECREASE_SPEED_SOLID if next_block.is_solid() else con.DECREASE_SPEED
-                if adjacent_block is not None and adjacent_block.light_level > light_level[col_s_i]:
-                    light_level[col_s_i] = adjacent_block.light_level - change
-                else:
-                    light_level[col_s_i] -= change
+        point: Union[Tuple[int, int], List[int]],
+        radius: int,
+        light: int
+    ) -> str:
+        """Light up the blocks in a diamond around a point until the light source is removed. The id of the light
+        source is returned"""
+        source_id = util.unique_id()
+        self.changed_light_coordinates.update(self.__lighting.add_light_source(source_id, point, radius, light))
+        return source_id
 
-    def __change_block_light_level(
-        self,
-        light_level: int,
-        block: block_classes.Block
-    ):
-        if block is not None and block.light_level < light_level:
-            block.light_level = light_level
-            self.changed_light_blocks.add(block)
+    def remove_light_source(self, source_id: str):
+        self.changed_light_coordinates.update(self.__lighting.remove_light_source(source_id))
 
     @game_timing.time_function("light updates")
     def change_light_levels(self):
-        for block in self.changed_light_blocks:
-            chunk = self.chunk_from_point(block.rect.topleft)
-            alpha = max(min(255 - block.light_level * int(255 / con.MAX_LIGHT), 255), 0)
-            chunk.add_rectangle(block.rect, (0, 0, 0, alpha), layer=0)
+        """Draw the light of all changed block coordinates, for every chunk the light of the rectangle around its
+        changed coordinates is drawn at once"""
+        chunk_rects = {}
+        for column, row in self.changed_light_coordinates:
+            block_rect = pygame.Rect((column * con.BLOCK_SIZE.width, row * con.BLOCK_SIZE.height, *con.BLOCK_SIZE.size))
+            chunk_coord = interface_util.p_to_cp(block_rect.topleft)
+            if chunk_coord in chunk_rects:
+                chunk_rects[chunk_coord].union_ip(block_rect)
+            else:
+                chunk_rects[chunk_coord] = block_rect
+        for chunk_coord, rect in chunk_rects.items():
+            chunk = self.chunk_index.get(*chunk_coord)
+            if chunk is None:
+                continue
+            column_start = (rect.left - chunk.rect.left) // con.BLOCK_SIZE.width
+            row_start = (rect.top - chunk.rect.top) // con.BLOCK_SIZE.height
+            columns, rows = rect.width // con.BLOCK_SIZE.width, rect.height // con.BLOCK_SIZE.height
+            chunk.draw_light_levels(rect, chunk.light_levels()[row_start: row_start + rows,
+                                                               column_start: column_start + columns])
 
     def closest_inventory(self, start, *item_names, deposit=True):
-        """
-        """
-        #any distance should be shorter possible on the board
-        shortest_distance = con.BOARD_SIZE.width * con.BOARD_SIZE.height
-        closest_block = None
-        for building in self.buildings.values():
+        """Find the building closest to the start rect with an inventory that items can be taken from or deposited
+        into"""
+        def can_use(building):
             if not building.has_inventory():
-                continue
+                return False
             inventory = building.blocks[0][0].inventory
-            if (deposit == False and all([inventory.check_item_get(name) for name in item_names])):
-                pass
-            elif (deposit == True and all([inventory.check_item_deposit(name) for name in item_names])):
-                pass
-            else:
-                continue
+            if deposit:
+                return all([inventory.check_item_deposit(name) for name in item_names])
+            return all([inventory.check_item_get(name) for name in item_names])
 
-            distance = util.manhattan_distance(start.center, building.rect.center)
-            if distance < shortest_distance:
-                shortest_distance = distance
-                closest_block = building
-        return closest_block
+        return self.__building_index.nearest(start.center, can_use)
 
     def add_rectangle(self, rect, color, layer=2, border=0):
         chunk_rectangles = self.get_chunks_from_rect(rect)
@@ -572,12 +862,17 @@ class Board(loading_saving.Savable, loading_saving.Loadable):
         self,
         point: Union[List, Tuple[int, int]]
     ) -> Union[chunks.Chunk, None]:
-        """Get a chunk on the board given a point in pixels. Coordinates outside the board return None"""
+        """Get a chunk on the board given a point in pixels. Coordinates outside the board return None. Chunks that are
+        paged are read from disk"""
         column, row = interface_util.p_to_cp(point)
-        try:
-            return self.chunk_matrix[row][column]
-        except IndexError:
+        if not self.chunk_index.is_inside(column, row):
             return None
+        chunk = self.chunk_index.get(column, row)
+        if chunk is not None:
+            self.__pager.use((column, row))
+        elif self.__pager.is_paged((column, row)):
+            chunk = self.__page_in_chunk(column, row)
+        return chunk
 
     def __block_from_point(
         self,
@@ -0,0 +1,125 @@
+import traceback
+from heapq import heappush, heappop, heapify
+from itertools import count
+from threading import Thread, Condition
+from typing import List, Tuple, Callable, ClassVar, Set, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from board.chunks import Chunk
+
+
+class ChunkGenerationPool:
+    """Fixed number of worker threads that generate chunks. The requested chunk that is closest to the camera is
+    generated first, requests that are no longer relevant can be cancelled before they are started and finished chunks
+    are handed out a limited amount at the time. Chunks that raise an error while generating are handed out as failed"""
+    NR_WORKERS: ClassVar[int] = 2
+
+    __generate_function: Callable[[int, int], "Chunk"]
+    __condition: Condition
+    __request_heap: List[List]
+    __request_counter: count
+    __requested: Set[Tuple[int, int]]
+    __finished: List[Tuple[Tuple[int, int], "Chunk"]]
+    __failed: List[Tuple[int, int]]
+    __stopped: bool
+    __workers: List[Thread]
+
+    def __init__(
+        self,
+        generate_function: Callable[[int, int], "Chunk"],
+        nr_workers: Union[int, None] = None
+    ):
+        self.__generate_function = generate_function
+        self.__condition = Condition()
+        # heap of [priority, request number, (column, row)] the request number makes sure equal priorities are handled
+        # first come first serve
+        self.__request_heap = []
+        self.__request_counter = count()
+        self.__requested = set()
+        self.__finished = []
+        self.__failed = []
+        self.__stopped = False
+        self.__workers = [Thread(target=self.__work, daemon=True)
+                          for _ in range(nr_workers if nr_workers is not None else self.NR_WORKERS)]
+        for worker in self.__workers:
+            worker.start()
+
+    def request(
+        self,
+        column: int,
+        row: int,
+        priority: float
+    ) -> None:
+        """Request a chunk to be generated, lower priority values are generated first"""
+        with self.__condition:
+            if (column, row) in self.__requested:
+                return
+            self.__requested.add((column, row))
+            heappush(self.__request_heap, [priority, next(self.__request_counter), (column, row)])
+            self.__condition.notify()
+
+    def update_requests(
+        self,
+        priority_function: Callable[[Tuple[int, int]], float],
+        keep_function: Callable[[Tuple[int, int]], bool]
+    ) -> List[Tuple[int, int]]:
+        """Recalculate the priority of all requests that are not yet started and cancel the requests that keep_function
+        rejects. Returns the coordinates of the cancelled requests"""
+        with self.__condition:
+            cancelled = []
+            new_heap = []
+            for _, request_nr, coord in self.__request_heap:
+                if keep_function(coord):
+                    new_heap.append([priority_function(coord), request_nr, coord])
+                else:
+                    cancelled.append(coord)
+                    self.__requested.remove(coord)
+            heapify(new_heap)
+            self.__request_heap = new_heap
+        return cancelled
+
+    def finished_chunks(self, max_amount: int) -> List[Tuple[Tuple[int, int], "Chunk"]]:
+        """Take at most max_amount of the chunks that are done generating"""
+        with self.__condition:
+            finished = self.__finished[:max_amount]
+            del self.__finished[:max_amount]
+            for coord, _ in finished:
+                self.__requested.remove(coord)
+        return finished
+
+    def failed_chunks(self) -> List[Tuple[int, int]]:
+        """Take the coordinates of all chunks that raised an error while generating"""
+        with self.__condition:
+            failed = self.__failed
+            self.__failed = []
+            for coord in failed:
+                self.__requested.remove(coord)
+        return failed
+
+    def stop(self) -> None:
+        """Cancel all requests and let the workers stop after the chunk they are generating. The pool can not be used
+        after it is stopped"""
+        with self.__condition:
+            self.__stopped = True
+            self.__request_heap = []
+            self.__condition.notify_all()
+
+    def __work(self) -> None:
+        while True:
+            with self.__condition:
+                while len(self.__request_heap) == 0 and not self.__stopped:
+                    self.__condition.wait()
+                if self.__stopped:
+                    return
+                _, _, coord = heappop(self.__request_heap)
+            try:
+                chunk = self.__generate_function(*coord)
+            except Exception:
+                # the worker has to keep going, the coordinate is handed back so it can be requested again
+                traceback.print_exc()
+                with self.__condition:
+                    self.__failed.append(coord)
+                continue
+            with self.__condition:
+                if not self.__stopped:
+                    self.__finished.append((coord, chunk))
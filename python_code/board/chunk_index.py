@@ -0,0 +1,98 @@
+import pygame
+from typing import Dict, Tuple, List, Iterator, Union, TYPE_CHECKING
+
+import utility.constants as con
+import utility.utilities as util
+import interfaces.windows.interface_utility as interface_util
+
+if TYPE_CHECKING:
+    from board import chunks
+
+
+class ChunkIndex:
+    """Chunks of the board saved by chunk coordinate as (column, row). Only chunks that are on the board take up space so
+    memory and lookups depend on the explored part of the board and not on the size of the board"""
+
+    columns: int
+    rows: int
+    __chunks: Dict[Tuple[int, int], "chunks.Chunk"]
+
+    def __init__(
+        self,
+        columns: int,
+        rows: int
+    ):
+        # the size of the board in chunks, no chunks can be added outside this size
+        self.columns = columns
+        self.rows = rows
+        self.__chunks = {}
+
+    def __len__(self) -> int:
+        return len(self.__chunks)
+
+    def __iter__(self) -> Iterator["chunks.Chunk"]:
+        return iter(list(self.__chunks.values()))
+
+    def __contains__(self, coord: Tuple[int, int]) -> bool:
+        return coord in self.__chunks
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """The area of the board in pixels"""
+        return pygame.Rect((0, 0, self.columns * con.CHUNK_SIZE.width, self.rows * con.CHUNK_SIZE.height))
+
+    def is_inside(
+        self,
+        col_i: int,
+        row_i: int
+    ) -> bool:
+        return 0 <= col_i < self.columns and 0 <= row_i < self.rows
+
+    def get(
+        self,
+        col_i: int,
+        row_i: int
+    ) -> Union["chunks.Chunk", None]:
+        return self.__chunks.get((col_i, row_i), None)
+
+    def add(
+        self,
+        col_i: int,
+        row_i: int,
+        chunk: "chunks.Chunk"
+    ):
+        if not self.is_inside(col_i, row_i):
+            raise util.GameException(f"Chunk at {(col_i, row_i)} is outside the board")
+        self.__chunks[(col_i, row_i)] = chunk
+
+    def remove(
+        self,
+        col_i: int,
+        row_i: int
+    ) -> "chunks.Chunk":
+        return self.__chunks.pop((col_i, row_i))
+
+    def coord_range(self, rect: pygame.Rect) -> Tuple[int, int, int, int]:
+        """The columns and rows of chunks that overlap with a rectangle in pixels as (column start, column end, row
+        start, row end) where the end is exclusive. Chunks outside the board are not included"""
+        return (max(0, interface_util.p_to_cc(rect.left)),
+                min(self.columns, interface_util.p_to_cc(rect.right - 1) + 1),
+                max(0, interface_util.p_to_cr(rect.top)),
+                min(self.rows, interface_util.p_to_cr(rect.bottom - 1) + 1))
+
+    def in_range(
+        self,
+        col_start: int,
+        col_end: int,
+        row_start: int,
+        row_end: int
+    ) -> List[Tuple[Tuple[int, int], "chunks.Chunk"]]:
+        """All chunks with a column and row in the given ranges, where the end is exclusive, as ((column, row), chunk)"""
+        col_start, row_start = max(0, col_start), max(0, row_start)
+        col_end, row_end = min(self.columns, col_end), min(self.rows, row_end)
+        # look up every coordinate for small ranges and filter all chunks for large ones
+        if (col_end - col_start) * (row_end - row_start) <= len(self.__chunks):
+            return [((col_i, row_i), self.__chunks[(col_i, row_i)]) for row_i in range(row_start, row_end)
+                    for col_i in range(col_start, col_end) if (col_i, row_i) in self.__chunks]
+        return [(coord, chunk) for coord, chunk in self.__chunks.items()
+                if col_start <= coord[0] < col_end and row_start <= coord[1] < row_end]
@@ -0,0 +1,111 @@
+import os
+import json
+import zlib
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Tuple, List, ClassVar, Any
+
+import utility.utilities as util
+
+
+class ChunkPager:
+    """Keeps track of the order in which chunks are used and writes chunks to disk when they are not needed.
+
+    Chunks are saved as compressed dictionaries in region files. A region file holds all chunks of REGION_SIZE by
+    REGION_SIZE chunks that are written to disk. The files are removed when the pager is removed"""
+    # width and height of a region in chunks
+    REGION_SIZE: ClassVar[int] = 8
+    # a region file is rewritten when it holds more then this many bytes of chunks that are no longer paged
+    MAX_UNUSED_REGION_BYTES: ClassVar[int] = 1_000_000
+
+    memory_budget: int
+    __directory: tempfile.TemporaryDirectory
+    __last_used: "OrderedDict[Tuple[int, int], None]"
+    __paged_chunks: Dict[Tuple[int, int], Tuple[int, int]]
+    __unused_region_bytes: Dict[Tuple[int, int], int]
+
+    def __init__(self, memory_budget: int):
+        # the amount of bytes chunks in memory are allowed to use
+        self.memory_budget = memory_budget
+        self.__directory = tempfile.TemporaryDirectory(prefix="chunk_regions_")
+        # chunks in memory from least to most recently used
+        self.__last_used = OrderedDict()
+        # location of chunks on disk as offset and size in the region file
+        self.__paged_chunks = {}
+        self.__unused_region_bytes = {}
+
+    def __len__(self) -> int:
+        return len(self.__paged_chunks)
+
+    def use(self, coord: Tuple[int, int]):
+        """Mark a chunk in memory as used"""
+        if coord in self.__last_used:
+            self.__last_used.move_to_end(coord)
+        else:
+            self.__last_used[coord] = None
+
+    def least_recently_used(self) -> List[Tuple[int, int]]:
+        """Coordinates of all chunks in memory starting with the chunk that has not been used the longest"""
+        return list(self.__last_used)
+
+    def is_paged(self, coord: Tuple[int, int]) -> bool:
+        return coord in self.__paged_chunks
+
+    def paged_chunks(self) -> List[Tuple[int, int]]:
+        return list(self.__paged_chunks)
+
+    def page_out(
+        self,
+        coord: Tuple[int, int],
+        chunk_dict: Dict[str, Any]
+    ):
+        """Write the dictionary of a chunk to disk, the chunk is no longer considered in memory"""
+        if coord in self.__paged_chunks:
+            raise util.GameException(f"Chunk at {coord} is already paged")
+        data = zlib.compress(json.dumps(chunk_dict).encode())
+        with open(self.__region_path(coord), "ab") as fp:
+            offset = fp.tell()
+            fp.write(data)
+        self.__paged_chunks[coord] = (offset, len(data))
+        self.__last_used.pop(coord, None)
+
+    def read(self, coord: Tuple[int, int]) -> Dict[str, Any]:
+        """Read the dictionary of a paged chunk without removing it from disk"""
+        offset, size = self.__paged_chunks[coord]
+        with open(self.__region_path(coord), "rb") as fp:
+            fp.seek(offset)
+            return json.loads(zlib.decompress(fp.read(size)).decode())
+
+    def page_in(self, coord: Tuple[int, int]) -> Dict[str, Any]:
+        """Read the dictionary of a paged chunk and remove it from disk, the chunk is considered in memory again"""
+        chunk_dict = self.read(coord)
+        _, size = self.__paged_chunks.pop(coord)
+        self.use(coord)
+        region = self.__region(coord)
+        self.__unused_region_bytes[region] = self.__unused_region_bytes.get(region, 0) + size
+        if not any(self.__region(paged_coord) == region for paged_coord in self.__paged_chunks):
+            os.remove(self.__region_path(coord))
+            del self.__unused_region_bytes[region]
+        elif self.__unused_region_bytes[region] > self.MAX_UNUSED_REGION_BYTES:
+            self.__compact_region(region)
+        return chunk_dict
+
+    def __compact_region(self, region: Tuple[int, int]):
+        """Rewrite a region file with only the chunks that are still paged"""
+        region_coords = [coord for coord in self.__paged_chunks if self.__region(coord) == region]
+        path = self.__region_path(region_coords[0])
+        with open(path, "rb") as fp:
+            data = fp.read()
+        with open(path, "wb") as fp:
+            for coord in region_coords:
+                offset, size = self.__paged_chunks[coord]
+                self.__paged_chunks[coord] = (fp.tell(), size)
+                fp.write(data[offset: offset + size])
+        self.__unused_region_bytes[region] = 0
+
+    def __region(self, coord: Tuple[int, int]) -> Tuple[int, int]:
+        return coord[0] // self.REGION_SIZE, coord[1] // self.REGION_SIZE
+
+    def __region_path(self, coord: Tuple[int, int]) -> str:
+        region = self.__region(coord)
+        return f"{self.__directory.name}{os.sep}region_{region[0]}_{region[1]}.bin"
@@ -1,6 +1,7 @@
 import pygame
 from typing import Tuple, List, Union
 from abc import ABC
+from numpy import ndarray, clip, uint8, int16
 
 import block_classes.materials.environment_materials as environment_materials
 import block_classes.materials.materials as base_materials
@@ -11,6 +12,7 @@ import entities
 import interfaces.windows.interface_utility as interface_util
 import board.pathfinding as pathfinding
 import board.flora as flora
+import board.block_matrix as block_matrix
 from utility import loading_saving
 from block_classes.blocks import Block
 
@@ -45,6 +47,7 @@ class Chunk(loading_saving.Savable, loading_saving.Loadable):
         main_sprite_group.add(background_image)
         main_sprite_group.add(light_image)
         main_sprite_group.add(selection_image)
+        self.__draw_saved_light()
 
     def __init_load__(self, pos=None, plants=None, front_matrix=None, back_matrix=None, main_sprite_group=None,
                       changed=None, id_=None):
@@ -76,12 +79,13 @@ class Chunk(loading_saving.Savable, loading_saving.Loadable):
         main_sprite_group.add(background_image)
         main_sprite_group.add(light_image)
         main_sprite_group.add(selection_image)
+        self.__draw_saved_light()
 
     def to_dict(self):
         return {
             "pos": self.rect.topleft,
-            "matrix": [[block.to_dict() for block in row] for row in self.__matrix],
-            "back_matrix": [[block.to_dict() for block in row] for row in self.__back_matrix],
+            "matrix": self.__matrix.to_dict(),
+            "back_matrix": self.__back_matrix.to_dict(),
             "changed": self.changed,
             "id": self.id
         }
@@ -98,6 +102,11 @@ class Chunk(loading_saving.Savable, loading_saving.Loadable):
     def coord(self):
         return int(self.rect.left / self.rect.width), int(self.rect.top / self.rect.height)
 
+    @property
+    def blocks_version(self) -> int:
+        """Number that changes every time a foreground block of this chunk changes"""
+        return self.__matrix.version
+
     def is_showing(self) -> bool:
         return self.layers[2].is_showing()
 
@@ -105,6 +114,22 @@ class Chunk(loading_saving.Savable, loading_saving.Loadable):
         # TODO make this respond to the location of workers and the player
         return self.changed[1]
 
+    def memory_size(self) -> int:
+        """Estimate of the bytes used by this chunk, this is dominated by the surfaces of the layers"""
+        size = 0
+        for layer in self.layers:
+            for surface in (layer.orig_surface, layer.surface):
+                size += surface.get_bytesize() * surface.get_width() * surface.get_height()
+        return size
+
+    def has_selection(self) -> bool:
+        """If anything is drawn on the selection layer of this chunk"""
+        return self.layers[1].orig_surface.get_bounding_rect().width > 0
+
+    def created_blocks(self) -> List[util.BlockPointer]:
+        """All foreground blocks of this chunk that exist as an instance"""
+        return [block for _, block in self.__matrix.created_blocks()]
+
     def add_rectangle(self, rect, color, layer=2, border=0, trigger_change=True):
         self.changed[0] = trigger_change
         local_rect = self.__local_adjusted_rect(rect)
@@ -128,8 +153,8 @@ class Chunk(loading_saving.Savable, loading_saving.Loadable):
             self.layers[2].add_image(local_block_rect, block.surface)
 
             column, row = self.__local_adusted_block_coordinate(block.rect.topleft)
-            self.__matrix[row][column].set_block(block)
-            self.pathfinding_chunk.added_rects.append(block.rect)
+            self.__matrix.set_block(row, column, block)
+            self.pathfinding_chunk.add_changed_rect(block.rect)
 
     def remove_blocks(self, *blocks):
         removed_items = []
@@ -140,33 +165,77 @@ class Chunk(loading_saving.Savable, loading_saving.Loadable):
             # remove the highlight
             self.add_rectangle(local_block_rect, con.INVISIBLE_COLOR, layer=1, trigger_change=False)
             column, row = self.__local_adusted_block_coordinate(block.rect.topleft)
-            self.__matrix[row][column].set_block(base_materials.Air().to_block(block.rect.topleft))
-            self.pathfinding_chunk.removed_rects.append(block.rect)
+            # the light does not change when a block is removed
+            self.__matrix.set_block(row, column, base_materials.Air.shared().to_block(block.rect.topleft))
+            self.pathfinding_chunk.add_removed_rect(block.rect)
         return removed_items
 
     def update_blocks(self, *blocks):
+        """Save changes of blocks, changes to blocks that are temporary views are lost otherwise"""
         for block in blocks:
-            self.pathfinding_chunk.added_rects.append(block.rect)
+            column, row = self.__local_adusted_block_coordinate(block.rect.topleft)
+            self.__matrix.set_block(row, column, block)
+            self.pathfinding_chunk.add_changed_rect(block.rect)
 
-    def get_block(self, point) -> util.BlockPointer:
+    def get_block(self, point, keep: bool = False) -> util.BlockPointer:
         column, row = self.__local_adusted_block_coordinate(point)
         try:
-            return self.__matrix[row][column]
+            return self.__matrix.get_block(row, column, keep)
         except IndexError:
             raise util.GameException("Point: {} is not within chunk at {}".format(point, self.rect))
 
+    def get_local_block(
+        self,
+        row: int,
+        column: int,
+        keep: bool = False
+    ) -> util.BlockPointer:
+        """Get a block by the row and column within this chunk, with keep the pointer follows changes of the block"""
+        return self.__matrix.get_block(row, column, keep)
+
+    def get_local_blocks(
+        self,
+        row_start: int,
+        row_end: int,
+        column_start: int,
+        column_end: int
+    ) -> List[List[util.BlockPointer]]:
+        """Get the blocks between rows and columns within this chunk, the end is exclusive"""
+        return self.__matrix.get_blocks(row_start, row_end, column_start, column_end)
+
+    def solid_mask(self) -> ndarray:
+        """Boolean array by row and column in this chunk that is True for solid blocks"""
+        return self.__matrix.solid_mask()
+
+    def light_levels(self) -> ndarray:
+        """Array by row and column in this chunk with the light level of every block"""
+        return self.__matrix.light_levels()
+
+    def draw_light_levels(
+        self,
+        rect: pygame.Rect,
+        light_levels: ndarray
+    ):
+        """Draw the light of the blocks in rect at once, light_levels is an array by row and column of the blocks in
+        rect"""
+        self.changed[0] = True
+        alpha = clip(255 - light_levels.astype(int16) * int(255 / con.MAX_LIGHT), 0, 255).astype(uint8)
+        self.layers[0].set_block_alpha(self.__local_adjusted_rect(rect), alpha)
+
     def overlapping_blocks(
         self,
         rect: pygame.Rect
     ) -> List[util.BlockPointer]:
         column_start, row_start = self.__local_adusted_block_coordinate(rect.topleft)
         column_end, row_end = self.__local_adusted_block_coordinate(rect.bottomright)
-        overlapping_blocks = []
-        for row in self.__matrix[row_start: row_end + 1]:
-            add_row = row[column_start: column_end + 1]
-            if len(add_row) > 0:
-                overlapping_blocks.append(add_row)
-        return overlapping_blocks
+        blocks = self.__matrix.get_blocks(row_start, row_end + 1, column_start, column_end + 1)
+        return [row for row in blocks if len(row) > 0]
+
+    def __draw_saved_light(self):
+        """Draw the light of blocks that where lit before the chunk was saved"""
+        light_levels = self.__matrix.light_levels()
+        if light_levels.any():
+            self.draw_light_levels(self.rect, light_levels)
 
     def __local_adusted_block_coordinate(self, point):
         # get the coordinate of a block in the local self.matrix grid
@@ -185,24 +254,16 @@ class Chunk(loading_saving.Savable, loading_saving.Loadable):
 
         :param s_matrix: a string matrix that contains strings corresponding to
         material classes
-        :return: the s_matrix filled with block class instances
+        :return: a BlockMatrix of the s_matrix that only creates the block instances that are needed
         """
-        for row_i, row in enumerate(s_matrix):
-            for column_i, value in enumerate(row):
-                # create position
-                pos = (self.rect.left + column_i * con.BLOCK_SIZE.width,
-                       self.rect.top + row_i * con.BLOCK_SIZE.height)
-                material_class_definition = s_matrix[row_i][column_i]
-                material_instance = material_class_definition.to_instance(depth=row_i)
-                block = material_instance.to_block(pos, **material_class_definition.block_kwargs)
-                if material_class_definition.needs_board_update or block.light_level > 0:
-                    self.__board_update_blocks.append(block)
-                if isinstance(material_instance, environment_materials.MultiFloraMaterial):
-                    plant = flora.Plant(block, self.id)
-                    self.all_plants.add(plant)
-                s_matrix[row_i][column_i] = util.BlockPointer(block)
-
-        return s_matrix
+        matrix = block_matrix.BlockMatrix(self.rect.topleft, s_matrix)
+        for (row_i, column_i), block in matrix.created_blocks():
+            if s_matrix[row_i][column_i].needs_board_update:
+                self.__board_update_blocks.append(block.block)
+            if isinstance(block.material, environment_materials.MultiFloraMaterial):
+                plant = flora.Plant(block.block, self.id)
+                self.all_plants.add(plant)
+        return matrix
 
     def get_board_update_blocks(self):
         try:
@@ -277,7 +338,7 @@ class BoardImage(BaseBoardImage):
         self,
         pos: Union[List[int], Tuple[int, int]],
         offset: Union[List[int], Tuple[int, int]],
-        block_matrix: List[List["Block"]],
+        block_matrix: "block_matrix.BlockMatrix",
         **kwargs
     ):
         self.__offset = offset
@@ -296,11 +357,10 @@ class BoardImage(BaseBoardImage):
         # make sure that surfaces that have alpha channels are blittet as transparant because the background
         # is transparant
         image.fill(con.INVISIBLE_COLOR)
-        for row in self.__block_matrix:
-            for block in row:
-                block_rect = (block.rect.left - self.__offset[0] * con.CHUNK_SIZE.width,
-                              block.rect.top - self.__offset[1] * con.CHUNK_SIZE.height, *block.rect.size)
-                image.blit(block.surface, block_rect)
+        for row_i in range(self.__block_matrix.rows):
+            for column_i in range(self.__block_matrix.columns):
+                image.blit(self.__block_matrix.surface(row_i, column_i),
+                           (column_i * con.BLOCK_SIZE.width, row_i * con.BLOCK_SIZE.height))
         return image
 
 
@@ -341,6 +401,39 @@ class LightImage(TransparantBoardImage):
 
     def add_rect(self, rect, color, border):
         super().add_rect(rect, color, border)
+        self.__extend_update_rect(rect)
+
+    def set_block_alpha(
+        self,
+        rect: pygame.Rect,
+        alpha: ndarray
+    ):
+        """Set the darkness of the blocks in rect, alpha is an array by row and column of the blocks in rect. The alpha
+        values are written at block size and scaled once instead of drawing a rectangle for every block"""
+        block_surface = pygame.Surface((alpha.shape[1], alpha.shape[0]), pygame.SRCALPHA)
+        block_alpha = pygame.surfarray.pixels_alpha(block_surface)
+        block_alpha[:] = alpha.T
+        # the surface is locked as long as the pixel array exists
+        del block_alpha
+        for surface, zoom in ((self.orig_surface, 1), (self.surface, self._zoom)):
+            zoomed_rect = pygame.Rect((round(rect.x * zoom), round(rect.y * zoom), round(rect.width * zoom),
+                                       round(rect.height * zoom)))
+            clipped_rect = zoomed_rect.clip(surface.get_rect())
+            if clipped_rect.width == 0 or clipped_rect.height == 0:
+                continue
+            scaled_surface = pygame.transform.scale(block_surface, zoomed_rect.size)
+            # the color of the surface is black where the light is set
+            surface.fill((0, 0, 0, 0), clipped_rect)
+            surface_alpha = pygame.surfarray.pixels_alpha(surface)
+            scaled_alpha = pygame.surfarray.pixels_alpha(scaled_surface)
+            surface_alpha[clipped_rect.left: clipped_rect.right, clipped_rect.top: clipped_rect.bottom] = \
+                scaled_alpha[clipped_rect.left - zoomed_rect.left: clipped_rect.right - zoomed_rect.left,
+                             clipped_rect.top - zoomed_rect.top: clipped_rect.bottom - zoomed_rect.top]
+            del surface_alpha, scaled_alpha
+        self.__extend_update_rect(rect.copy())
+
+    def __extend_update_rect(self, rect: pygame.Rect):
+        """Grow the rectangle returned by get_update_rect to include rect, that is local to this image"""
         rect.top += self.orig_rect.top
         rect.left += self.orig_rect.left
 
@@ -0,0 +1,325 @@
+from itertools import count
+from typing import Dict, Tuple, List, Union, Iterator
+from numpy import ndarray, zeros, ones, maximum, where, nonzero, abs as np_abs, ogrid, int16
+
+import utility.constants as con
+import utility.utilities as util
+import interfaces.windows.interface_utility as interface_util
+from board import chunk_index
+
+
+class LightingEngine:
+    """Light levels of all blocks on the board. Every chunk has a numpy grid with the light level of its blocks, this is
+    the light levels array of the block matrix of the chunk. Light spreads from a point to the 4 blocks around every
+    block and loses DECREASE_SPEED for every block and DECREASE_SPEED_SOLID for every solid block it passes through.
+
+    Revealed light, from workers looking around, stays. Light sources can be added and removed, the light of a source is
+    kept so the blocks it lit can be set back to the revealed light and the light of the other sources when it is
+    removed. Light sources are not saved. Reveals are collected until update is called to do all reveals of a frame
+    together.
+
+    Revealing the same area twice does not change the light, so reveals are remembered per chunk together with the
+    versions of the blocks and light of the chunks they cover. A reveal is skipped when nothing changed since"""
+
+    __chunk_index: chunk_index.ChunkIndex
+    __revealed: Dict[Tuple[int, int], ndarray]
+    __levels: Dict[Tuple[int, int], ndarray]
+    __sources: Dict[str, Tuple[Tuple[int, int, int, int], ndarray]]
+    __pending_reveals: Dict[Tuple[int, int, int, int], Tuple[int, int]]
+    __reveal_cache: Dict[Tuple[int, int], Dict[Tuple[int, int, int, int], Tuple]]
+    __light_versions: Dict[Tuple[int, int], int]
+    __versions: Iterator[int]
+    __diamonds: Dict[int, ndarray]
+
+    def __init__(self, chunk_index_: chunk_index.ChunkIndex):
+        self.__chunk_index = chunk_index_
+        # light per chunk that is permanent
+        self.__revealed = {}
+        # light per chunk from revealed light and light sources, this is the light level of the blocks
+        self.__levels = {}
+        # light sources by id as (bounds, light map of the source)
+        self.__sources = {}
+        # reveals that are done at the next update by (column, row, radius, light) with the point
+        self.__pending_reveals = {}
+        # reveals by chunk of the point as (column, row, radius, light) with the state of the chunks they covered
+        self.__reveal_cache = {}
+        # a new version is given every time the revealed light of a chunk is set directly
+        self.__light_versions = {}
+        self.__versions = count()
+        # the blocks within a radius around a block by radius
+        self.__diamonds = {}
+
+    def reveal(
+        self,
+        point: Union[Tuple[int, int], List[int]],
+        radius: int,
+        light: int
+    ):
+        """Light up the blocks in a diamond with radius around point permanently. The light changes when update is
+        called, so reveals of the same frame can be done together"""
+        reveal_key = (interface_util.p_to_c(point[0]), interface_util.p_to_r(point[1]), radius, light)
+        # light spreads from the block of the point so reveals from the same block are equal
+        self.__pending_reveals[reveal_key] = tuple(point)
+
+    def update(self) -> List[Tuple[int, int]]:
+        """Do all reveals since the last update. The (column, row) of the blocks with a changed light level are
+        returned"""
+        changed_coordinates = []
+        for reveal_key, point in self.__pending_reveals.items():
+            bounds = self.__source_bounds(point, reveal_key[2])
+            state = self.__reveal_state(bounds)
+            chunk_reveals = self.__reveal_cache.setdefault(interface_util.p_to_cp(point), {})
+            if state is not None and chunk_reveals.get(reveal_key, None) == state:
+                continue
+            light_map = self.__spread_light(bounds, point, reveal_key[2], reveal_key[3])
+            changed_coordinates.extend(self.__raise(bounds, light_map, reveal=True))
+            if state is not None:
+                chunk_reveals[reveal_key] = state
+        self.__pending_reveals = {}
+        return changed_coordinates
+
+    def add_light_source(
+        self,
+        source_id: str,
+        point: Union[Tuple[int, int], List[int]],
+        radius: int,
+        light: int
+    ) -> List[Tuple[int, int]]:
+        """Light up the blocks in a diamond with radius around point until the source is removed. The (column, row) of
+        the blocks with a changed light level are returned"""
+        if source_id in self.__sources:
+            raise util.GameException(f"Light source with id {source_id} already exists")
+        bounds = self.__source_bounds(point, radius)
+        light_map = self.__spread_light(bounds, point, radius, light)
+        self.__sources[source_id] = (bounds, light_map)
+        return self.__raise(bounds, light_map, reveal=False)
+
+    def remove_light_source(self, source_id: str) -> List[Tuple[int, int]]:
+        """Remove a light source. Only the blocks that got their light from the source change, they get the highest
+        light of the revealed light and the other sources. The (column, row) of the blocks with a changed light level
+        are returned"""
+        bounds, light_map = self.__sources.pop(source_id)
+        other_light_map = zeros(light_map.shape, dtype=int16)
+        for other_bounds, other_map in self.__sources.values():
+            overlap = (max(bounds[0], other_bounds[0]), min(bounds[1], other_bounds[1]),
+                       max(bounds[2], other_bounds[2]), min(bounds[3], other_bounds[3]))
+            if overlap[0] >= overlap[1] or overlap[2] >= overlap[3]:
+                continue
+            window = other_light_map[overlap[2] - bounds[2]: overlap[3] - bounds[2],
+                                     overlap[0] - bounds[0]: overlap[1] - bounds[0]]
+            maximum(window, other_map[overlap[2] - other_bounds[2]: overlap[3] - other_bounds[2],
+                                      overlap[0] - other_bounds[0]: overlap[1] - other_bounds[0]], out=window)
+        changed_coordinates = []
+        for chunk_coord, window_slice, chunk_slice in self.__chunk_slices(bounds):
+            levels = self.__grid(chunk_coord, self.__levels)[chunk_slice]
+            source_levels = light_map[window_slice]
+            # blocks with more light then the source are lit by something else
+            lit = (source_levels > 0) & (levels == source_levels)
+            if not lit.any():
+                continue
+            new_levels = maximum(self.__revealed[chunk_coord][chunk_slice], other_light_map[window_slice])
+            changed = lit & (new_levels != levels)
+            levels[changed] = new_levels[changed]
+            changed_coordinates.extend(self.__coordinates(changed, chunk_coord, chunk_slice))
+        return changed_coordinates
+
+    def set_light_level(
+        self,
+        point: Union[Tuple[int, int], List[int]],
+        light: int
+    ):
+        """Set the light of a block that is placed on the board"""
+        column, row = interface_util.p_to_c(point[0]), interface_util.p_to_r(point[1])
+        chunk_coord = interface_util.p_to_cp(point)
+        if chunk_coord not in self.__chunk_index:
+            return
+        local_row, local_column = row % self.__chunk_rows(), column % self.__chunk_columns()
+        for grids in (self.__revealed, self.__levels):
+            self.__grid(chunk_coord, grids)[local_row, local_column] = min(max(0, light), con.MAX_LIGHT)
+        self.__light_versions[chunk_coord] = next(self.__versions)
+
+    def light_level(self, point: Union[Tuple[int, int], List[int]]) -> int:
+        chunk_coord = interface_util.p_to_cp(point)
+        if chunk_coord not in self.__chunk_index:
+            return 0
+        column, row = interface_util.p_to_c(point[0]), interface_util.p_to_r(point[1])
+        return int(self.__grid(chunk_coord, self.__levels)[row % self.__chunk_rows(), column % self.__chunk_columns()])
+
+    def forget_chunk(self, chunk_coord: Tuple[int, int]):
+        """Remove the light grids of a chunk that is removed from the board, they are recreated from the blocks when the
+        chunk is needed again"""
+        self.__revealed.pop(chunk_coord, None)
+        self.__levels.pop(chunk_coord, None)
+        self.__reveal_cache.pop(chunk_coord, None)
+        self.__light_versions[chunk_coord] = next(self.__versions)
+
+    def __grid(
+        self,
+        chunk_coord: Tuple[int, int],
+        grids: Dict[Tuple[int, int], ndarray]
+    ) -> ndarray:
+        if chunk_coord not in grids:
+            # the light level of the blocks is also the revealed light, light sources are not saved
+            levels = self.__chunk_index.get(*chunk_coord).light_levels()
+            self.__revealed[chunk_coord] = levels.copy()
+            self.__levels[chunk_coord] = levels
+        return grids[chunk_coord]
+
+    def __reveal_state(self, bounds: Tuple[int, int, int, int]) -> Union[Tuple, None]:
+        """The versions of the blocks and light of all chunks in bounds. None when not all chunks are on the board,
+        because more light can spread when they are added"""
+        chunk_range = (bounds[0] // self.__chunk_columns(), (bounds[1] - 1) // self.__chunk_columns() + 1,
+                       bounds[2] // self.__chunk_rows(), (bounds[3] - 1) // self.__chunk_rows() + 1)
+        chunks = self.__chunk_index.in_range(*chunk_range)
+        if len(chunks) != (chunk_range[1] - chunk_range[0]) * (chunk_range[3] - chunk_range[2]):
+            return None
+        for coord, _ in chunks:
+            if coord not in self.__light_versions:
+                self.__light_versions[coord] = next(self.__versions)
+        return tuple((coord, chunk.blocks_version, self.__light_versions[coord]) for coord, chunk in chunks)
+
+    def __source_bounds(
+        self,
+        point: Union[Tuple[int, int], List[int]],
+        radius: int
+    ) -> Tuple[int, int, int, int]:
+        """The columns and rows of blocks that can be lit from point as (column start, column end, row start, row end)
+        where the end is exclusive"""
+        column, row = interface_util.p_to_c(point[0]), interface_util.p_to_r(point[1])
+        column_radius, row_radius = int(radius / con.BLOCK_SIZE.width), int(radius / con.BLOCK_SIZE.height)
+        column_start, row_start = max(0, column - column_radius), max(0, row - row_radius)
+        # the end is never before the start for points outside the board
+        return (column_start,
+                max(column_start, min(self.__chunk_index.columns * self.__chunk_columns(), column + column_radius + 1)),
+                row_start,
+                max(row_start, min(self.__chunk_index.rows * self.__chunk_rows(), row + row_radius + 1)))
+
+    def __spread_light(
+        self,
+        bounds: Tuple[int, int, int, int],
+        point: Union[Tuple[int, int], List[int]],
+        radius: int,
+        light: int
+    ) -> ndarray:
+        """Light map of the blocks in bounds lit from point. The light is spread from the brightest blocks to the 4
+        blocks around them with a queue for every light level and stops where it falls off. Only loaded blocks in the
+        diamond of radius around point are lit"""
+        light_map = zeros((bounds[3] - bounds[2], bounds[1] - bounds[0]), dtype=int16)
+        column, row = interface_util.p_to_c(point[0]), interface_util.p_to_r(point[1])
+        light = min(light, con.MAX_LIGHT)
+        if not (bounds[0] <= column < bounds[1] and bounds[2] <= row < bounds[3]) or light <= 0:
+            return light_map
+        solid, loaded = self.__read_solid(bounds)
+        if not loaded[row - bounds[2], column - bounds[0]]:
+            return light_map
+        diamond = self.__diamond(radius)
+        row_radius, column_radius = diamond.shape[0] // 2, diamond.shape[1] // 2
+        reachable = loaded & diamond[bounds[2] - row + row_radius: bounds[3] - row + row_radius,
+                                     bounds[0] - column + column_radius: bounds[1] - column + column_radius]
+        # the light lost when passing a block and 0 for blocks that can not be reached. A border of blocks that can not
+        # be reached makes sure that the blocks around a block are never outside the list
+        costs = zeros((light_map.shape[0] + 2, light_map.shape[1] + 2), dtype=int16)
+        costs[1:-1, 1:-1] = where(solid, con.DECREASE_SPEED_SOLID, con.DECREASE_SPEED) * reachable
+        # reading a flat list block by block is a lot faster then reading the array
+        costs = costs.ravel().tolist()
+        width = light_map.shape[1] + 2
+        levels = [0] * len(costs)
+        start = (row - bounds[2] + 1) * width + column - bounds[0] + 1
+        levels[start] = light
+        queues = [[] for _ in range(light + 1)]
+        queues[light].append(start)
+        for level in range(light, 0, -1):
+            # light only goes to lower levels, so the queue of a level does not change while it is read
+            for index in queues[level]:
+                next_level = level - costs[index]
+                if levels[index] != level or next_level <= 0:
+                    continue
+                next_queue = queues[next_level]
+                for neighbour in (index - width, index + width, index - 1, index + 1):
+                    if costs[neighbour] > 0 and levels[neighbour] < next_level:
+                        levels[neighbour] = next_level
+                        next_queue.append(neighbour)
+        lit = [index for queue in queues for index in queue]
+        padded_light_map = zeros(len(costs), dtype=int16)
+        padded_light_map[lit] = [levels[index] for index in lit]
+        light_map[:] = padded_light_map.reshape((light_map.shape[0] + 2, width))[1:-1, 1:-1]
+        return light_map
+
+    def __diamond(self, radius: int) -> ndarray:
+        """The blocks within radius of the center block of a square of blocks"""
+        if radius not in self.__diamonds:
+            column_radius, row_radius = int(radius / con.BLOCK_SIZE.width), int(radius / con.BLOCK_SIZE.height)
+            rows, columns = ogrid[-row_radius: row_radius + 1, -column_radius: column_radius + 1]
+            self.__diamonds[radius] = \
+                np_abs(rows) * con.BLOCK_SIZE.height + np_abs(columns) * con.BLOCK_SIZE.width <= radius
+        return self.__diamonds[radius]
+
+    def __raise(
+        self,
+        bounds: Tuple[int, int, int, int],
+        light_map: ndarray,
+        reveal: bool
+    ) -> List[Tuple[int, int]]:
+        """Raise the light of the blocks in bounds to light map where it is lower, the revealed light is also raised
+        when reveal is True. The (column, row) of the blocks with a changed light level are returned"""
+        changed_coordinates = []
+        for chunk_coord, window_slice, chunk_slice in self.__chunk_slices(bounds):
+            levels = self.__grid(chunk_coord, self.__levels)[chunk_slice]
+            if reveal:
+                revealed = self.__revealed[chunk_coord][chunk_slice]
+                maximum(revealed, light_map[window_slice], out=revealed, casting="unsafe")
+            changed = light_map[window_slice] > levels
+            if not changed.any():
+                continue
+            levels[changed] = light_map[window_slice][changed]
+            changed_coordinates.extend(self.__coordinates(changed, chunk_coord, chunk_slice))
+        return changed_coordinates
+
+    def __coordinates(
+        self,
+        changed: ndarray,
+        chunk_coord: Tuple[int, int],
+        chunk_slice: Tuple[slice, slice]
+    ) -> List[Tuple[int, int]]:
+        """The (column, row) on the board of the True values in changed that covers chunk_slice of a chunk"""
+        rows, columns = nonzero(changed)
+        first_row = chunk_coord[1] * self.__chunk_rows() + chunk_slice[0].start
+        first_column = chunk_coord[0] * self.__chunk_columns() + chunk_slice[1].start
+        return list(zip((columns + first_column).tolist(), (rows + first_row).tolist()))
+
+    def __read_solid(self, bounds: Tuple[int, int, int, int]) -> Tuple[ndarray, ndarray]:
+        """The solid blocks in bounds and the blocks in bounds that are in a loaded chunk"""
+        solid = ones((bounds[3] - bounds[2], bounds[1] - bounds[0]), dtype=bool)
+        loaded = zeros(solid.shape, dtype=bool)
+        for chunk_coord, window_slice, chunk_slice in self.__chunk_slices(bounds):
+            solid[window_slice] = self.__chunk_index.get(*chunk_coord).solid_mask()[chunk_slice]
+            loaded[window_slice] = True
+        return solid, loaded
+
+    def __chunk_slices(self, bounds: Tuple[int, int, int, int]) -> List[Tuple[Tuple[int, int], Tuple[slice, slice],
+                                                                               Tuple[slice, slice]]]:
+        """The loaded chunks that overlap with bounds as (chunk coordinate, slice of the bounds, slice of the chunk)"""
+        chunk_columns, chunk_rows = self.__chunk_columns(), self.__chunk_rows()
+        chunk_slices = []
+        for (chunk_column, chunk_row), _ in self.__chunk_index.in_range(
+                bounds[0] // chunk_columns, (bounds[1] - 1) // chunk_columns + 1,
+                bounds[2] // chunk_rows, (bounds[3] - 1) // chunk_rows + 1):
+            first_column = max(bounds[0], chunk_column * chunk_columns)
+            last_column = min(bounds[1], (chunk_column + 1) * chunk_columns)
+            first_row = max(bounds[2], chunk_row * chunk_rows)
+            last_row = min(bounds[3], (chunk_row + 1) * chunk_rows)
+            chunk_slices.append(((chunk_column, chunk_row),
+                                 (slice(first_row - bounds[2], last_row - bounds[2]),
+                                  slice(first_column - bounds[0], last_column - bounds[0])),
+                                 (slice(first_row - chunk_row * chunk_rows, last_row - chunk_row * chunk_rows),
+                                  slice(first_column - chunk_column * chunk_columns,
+                                        last_column - chunk_column * chunk_columns))))
+        return chunk_slices
+
+    @staticmethod
+    def __chunk_columns() -> int:
+        return interface_util.p_to_c(con.CHUNK_SIZE.width)
+
+    @staticmethod
+    def __chunk_rows() -> int:
+        return interface_util.p_to_r(con.CHUNK_SIZE.height)
@@ -1,4 +1,7 @@
 import random
+import heapq
+import pygame
+from itertools import count
 from typing import List, Dict, Union, ClassVar, Set, TYPE_CHECKING, Tuple, Any
 
 import utility.constants as con
@@ -6,8 +9,7 @@ import utility.utilities as util
 import interfaces.windows.interface_utility as interface_util
 from utility import loading_saving
 if TYPE_CHECKING:
-    from block_classes import blocks
-    import pygame
+    from board import block_matrix
 
 
 class PathFinder:
@@ -19,14 +21,24 @@ class PathFinder:
     """
     DIRECTIONS: ClassVar[List[str]] = ["N", "E", "S", "W"]
     pathfinding_tree: "PathfindingTree"
+    __nodes: Dict["AirRectangle", "Node"]
+    __closed_rects: Set["AirRectangle"]
+    __open_heap: List[Tuple[int, int, "Node"]]
 
     def __init__(self):
         self.pathfinding_tree = PathfindingTree()
+        # storage of a search that is reused by every search, it is empty between searches
+        self.__nodes = {}
+        self.__closed_rects = set()
+        self.__open_heap = []
 
     def update(self):
-        """Update all the pathfinding chunks"""
-        for pf_chunk in self.pathfinding_tree.pathfinding_chunks:
+        """Update all the pathfinding chunks that have changes waiting, all other chunks are asleep"""
+        self.pathfinding_tree.game_time += con.GAME_TIME.get_time()
+        for pf_chunk in self.pathfinding_tree.awake_chunks.copy():
             pf_chunk.update()
+            if not pf_chunk.has_changes():
+                pf_chunk.sleep()
 
     def get_path(
         self,
@@ -121,7 +133,7 @@ class PathFinder:
     ) -> Union[None, "Node"]:
         """
         Find a path from a starting rectangle to an end rectangle by traversing the rectangle network using the A*
-        pathfinding algorithm aproach
+        pathfinding algorithm aproach. The open nodes are kept in a heap and the closed rectangles in a set
 
         Inspired and derived from:
         https://gist.github.com/Nicholas-Swift/003e1932ef2804bebef2710527008f44#file-astar-py
@@ -135,64 +147,57 @@ class PathFinder:
         start_node.distance_to_end = util.manhattan_distance(start_node.position, end_node.position)
         if start == end:
             return end_node
-        # Initialize both open and closed list
-        open_list = []
-        closed_list = []
-
-        # Add the start node
-        open_list.append(start_node)
-
-        # Loop until you find the end
-        while len(open_list) > 0:
-
-            # Get the current node with lowest f
-            current_node = open_list[0]
-            current_index = 0
-            for index, item in enumerate(open_list):
-                if item.total_for_both < current_node.total_for_both:
-                    current_node = item
-                    current_index = index
-
-            # Pop current off open list, add to closed list
-            open_list.pop(current_index)
-            closed_list.append(current_node)
-
-            # Found the goal on block infront of destination
-            connection_direction = util.side_by_side(current_node.rect, end_node.rect)
-            if connection_direction is not None:
-                end_node.parent = current_node
-                end_node.direction_index = connection_direction
-                return end_node
-
-            # Generate children
-            children = []
-            for direction_index, direction in enumerate(current_node.rect.connecting_rects):
-                for rect in direction:
-                    # Create new node
-                    new_node = Node(current_node, rect, direction_index)
-
-                    # Append
-                    children.append(new_node)
-
-            # Loop through children
-            for child in children:
-
-                # Child is on the closed list
-                if len([closed_child for closed_child in closed_list if closed_child.rect == child.rect]) > 0:
+        # one node per rectangle that is replaced when a shorter way to the rectangle is found
+        nodes = self.__nodes
+        nodes[start] = start_node
+        closed_rects = self.__closed_rects
+        # heap of (total_for_both, insertion number, node), the insertion number picks the oldest node of nodes that
+        # are equally good. A rectangle gets a new node when a shorter way is found, the old node is skipped when popped
+        open_heap = self.__open_heap
+        open_heap.append((start_node.total_for_both, 0, start_node))
+        insertion_number = count(1)
+
+        try:
+            # Loop until you find the end
+            while len(open_heap) > 0:
+
+                # Get the current node with lowest f
+                _, _, current_node = heapq.heappop(open_heap)
+                if current_node.rect in closed_rects or nodes[current_node.rect] is not current_node:
                     continue
-
-                child.distance_from_start = current_node.distance_from_start +\
-                                util.manhattan_distance(child.position, current_node.position) # noqa --> this shit is stupid
-                child.distance_to_end = util.manhattan_distance(child.position, end_node.position)
-                child.total_for_both = child.distance_from_start + child.distance_to_end
-
-                # Child is already in the open list
-                if len([open_node for open_node in open_list if child.rect == open_node.rect]) > 0:
-                    continue
-
-                # Add the child to the open list
-                open_list.append(child)
-        return None
+                closed_rects.add(current_node.rect)
+
+                # Found the goal on block infront of destination
+                connection_direction = util.side_by_side(current_node.rect, end_node.rect)
+                if connection_direction is not None:
+                    end_node.parent = current_node
+                    end_node.direction_index = connection_direction
+                    return end_node
+
+                # Loop through children
+                for direction_index, direction in enumerate(current_node.rect.connecting_rects):
+                    for rect in direction:
+
+                        # Child is on the closed list
+                        if rect in closed_rects:
+                            continue
+                        child = Node(current_node, rect, direction_index)
+                        child.distance_from_start = current_node.distance_from_start + \
+                            util.manhattan_distance(child.position, current_node.position)
+
+                        # Child is already in the open list with a shorter or equal way to it
+                        if rect in nodes and nodes[rect].distance_from_start <= child.distance_from_start:
+                            continue
+                        child.distance_to_end = util.manhattan_distance(child.position, end_node.position)
+                        child.total_for_both = child.distance_from_start + child.distance_to_end
+                        nodes[rect] = child
+                        heapq.heappush(open_heap, (child.total_for_both, next(insertion_number), child))
+            return None
+        finally:
+            # the found path only needs the parents of the end node
+            nodes.clear()
+            closed_rects.clear()
+            open_heap.clear()
 
 
 class Path(loading_saving.Loadable, loading_saving.Savable):
@@ -298,18 +303,32 @@ class PathfindingTree:
     """Collections of all rectangle chunks into one tree to be accessed by the pathfinding class"""
     rectangle_network: List[Dict]
     pathfinding_chunks: List["PathfindingChunk"]
+    awake_chunks: Set["PathfindingChunk"]
+    game_time: int
 
     def __init__(self):
         # shared dictionary that acts as the tree of connections between rectangles in the chunks
         self.rectangle_network = [{}, {}, {}, {}]
         self.pathfinding_chunks = []
+        # chunks with changes that are updated every frame
+        self.awake_chunks = set()
+        # total time of all updates in ms, used to let chunks that wake up catch up on the time they slept
+        self.game_time = 0
 
     def add_chunk(
         self,
         pf_chunk: "PathfindingChunk"
     ):
         self.pathfinding_chunks.append(pf_chunk)
-        pf_chunk.configure(self.rectangle_network)
+        pf_chunk.configure(self)
+
+    def remove_chunk(
+        self,
+        pf_chunk: "PathfindingChunk"
+    ):
+        self.pathfinding_chunks.remove(pf_chunk)
+        self.awake_chunks.discard(pf_chunk)
+        pf_chunk.remove_rectangles()
 
 
 class PathfindingChunk:
@@ -320,37 +339,71 @@ class PathfindingChunk:
      are not consistent enough en will create to many rectangles. On the other hand the performance seems to not be
      affected to much
     """
-    matrix: List[List["blocks.Block"]]
+    matrix: Union["block_matrix.BlockMatrix", None]
     rectangle_network: Union[List[Dict], None]
+    __tree: Union[PathfindingTree, None]
     __local_rectangles: Set["AirRectangle"]
     added_rects: List["pygame.Rect"]
     removed_rects: List["pygame.Rect"]
     __time_passed: List[int]
+    __sleep_time: int
 
     def __init__(
         self,
-        matrix: List[List["blocks.Block"]]
+        matrix: "block_matrix.BlockMatrix"
     ):
-        # matrix of a chunk
+        # matrix of a chunk, None while the chunk is paged
         self.matrix = matrix
         self.rectangle_network = None
+        self.__tree = None
 
         self.__local_rectangles = set()  # rectangles only present in this chunk
         self.added_rects = []  # list where rectangles can be added that need to be updated
         self.removed_rects = []  # list where rectangles can be added that need to be removed
         # make sure that the updates are not synchronized
         self.__time_passed = [random.randint(0, con.PF_UPDATE_TIME), con.PF_UPDATE_TIME]
+        # game time of the tree when this chunk went to sleep
+        self.__sleep_time = 0
 
     def configure(
         self,
-        rectangles: List[Dict]
+        tree: PathfindingTree
     ):
         """Innitially configure this pathfindign chunk"""
-        self.rectangle_network = rectangles
-        covered_coordinates = [[False for _ in range(len(self.matrix[0]))] for _ in range(len(self.matrix))]
+        self.__tree = tree
+        self.rectangle_network = tree.rectangle_network
+        self.__sleep_time = tree.game_time
+        covered_coordinates = [[False for _ in range(self.matrix.columns)] for _ in range(self.matrix.rows)]
 
         # innitial configuration
-        self.get_air_rectangles(self.matrix, covered_coordinates)
+        self.get_air_rectangles(0, 0, covered_coordinates)
+        if self.has_changes():
+            self.__wake()
+
+    def add_changed_rect(self, rect: "pygame.Rect"):
+        """Add a rectangle where blocks were added or changed and wake the chunk up"""
+        self.added_rects.append(rect)
+        self.__wake()
+
+    def add_removed_rect(self, rect: "pygame.Rect"):
+        """Add a rectangle where blocks were removed and wake the chunk up"""
+        self.removed_rects.append(rect)
+        self.__wake()
+
+    def has_changes(self) -> bool:
+        return len(self.added_rects) > 0 or len(self.removed_rects) > 0
+
+    def sleep(self):
+        """Stop updating this chunk until rectangles are added"""
+        self.__sleep_time = self.__tree.game_time
+        self.__tree.awake_chunks.discard(self)
+
+    def __wake(self):
+        if self.__tree is None or self in self.__tree.awake_chunks:
+            return
+        # the time passes as if this chunk was updated while sleeping
+        self.__time_passed[0] += self.__tree.game_time - self.__sleep_time
+        self.__tree.awake_chunks.add(self)
 
     def update(self):
         """Add rectangles when they are available and recalculate the pathfinding chunk every second to fix small
@@ -362,28 +415,33 @@ class PathfindingChunk:
             self.__time_passed[0] = 0
             for rect in self.__local_rectangles.copy():
                 self.__remove_rectangle(rect)
-            covered_coordinates = [[False for _ in range(len(self.matrix[0]))] for _ in range(len(self.matrix))]
+            covered_coordinates = [[False for _ in range(self.matrix.columns)] for _ in range(self.matrix.rows)]
 
             # innitial configuration
-            self.get_air_rectangles(self.matrix, covered_coordinates)
+            self.get_air_rectangles(0, 0, covered_coordinates)
             self.added_rects = []
             self.removed_rects = []
         else:
             if len(self.removed_rects) > 0:
                 for rect in self.removed_rects:
-                    sub_matrix, covered_coordinates = self.__find_removal_sub_matrix(rect)
-                    self.get_air_rectangles(sub_matrix, covered_coordinates)
+                    start_row, start_column, covered_coordinates = self.__find_removal_sub_matrix(rect)
+                    self.get_air_rectangles(start_row, start_column, covered_coordinates)
                     self.removed_rects.remove(rect)
             if len(self.added_rects) > 0:
                 for rect in self.added_rects:
-                    sub_matrix, covered_coordinates = self.__find_add_sub_matrix(rect)
-                    self.get_air_rectangles(sub_matrix, covered_coordinates)
+                    start_row, start_column, covered_coordinates = self.__find_add_sub_matrix(rect)
+                    self.get_air_rectangles(start_row, start_column, covered_coordinates)
                     self.added_rects.remove(rect)
 
+    def remove_rectangles(self):
+        """Remove all rectangles of this chunk from the rectangle network"""
+        for rect in self.__local_rectangles.copy():
+            self.__remove_rectangle(rect)
+
     def __find_add_sub_matrix(
         self,
         rect: "pygame.Rect"
-    ) -> Tuple[List[List], List[List[bool]]]:
+    ) -> Tuple[int, int, List[List[bool]]]:
         adjacent_rectangles = []
 
         corners = [rect.left, rect.top, rect.bottom, rect.right]
@@ -421,7 +479,7 @@ class PathfindingChunk:
     def __find_removal_sub_matrix(
         self,
         rect: "pygame.Rect"
-    ) -> Tuple[List[List], List[List[bool]]]:
+    ) -> Tuple[int, int, List[List[bool]]]:
         adjacent_rectangles = []
 
         # find all adacent rectangles and the box that contains them all
@@ -453,21 +511,20 @@ class PathfindingChunk:
         self,
         corners: List[int],
         all_rectangles: List["pygame.Rect"]
-    ) -> Tuple[List[List], List[List[bool]]]:
+    ) -> Tuple[int, int, List[List[bool]]]:
         start_column, start_row = (int((corners[0] % con.CHUNK_SIZE.width) / con.BLOCK_SIZE.width),
                                    int((corners[1] % con.CHUNK_SIZE.height) / con.BLOCK_SIZE.height))
         row_lenght = interface_util.p_to_r(corners[3] - corners[0])
         column_lenght = interface_util.p_to_c(corners[2] - corners[1])
-        sub_matrix = []
         covered_coordinates = [[False for _ in range(row_lenght)] for _ in range(column_lenght)]
-        for row_index in range(column_lenght):
-            row = self.matrix[start_row + row_index][start_column:start_column + row_lenght]
-            sub_matrix.append(row)
-            for col_index, block in enumerate(row):
+        for row_index in range(min(column_lenght, self.matrix.rows - start_row)):
+            for col_index in range(min(row_lenght, self.matrix.columns - start_column)):
+                row, column = start_row + row_index, start_column + col_index
                 # if transparant block in sub matrix but not adjacent pre ignore it.
-                if block.transparant_group != 0 and block.rect.collidelist(all_rectangles) == -1:
+                if not self.matrix.is_solid(row, column) and \
+                        self.matrix.block_rect(row, column).collidelist(all_rectangles) == -1:
                     covered_coordinates[row_index][col_index] = True
-        return sub_matrix, covered_coordinates
+        return start_row, start_column, covered_coordinates
 
     def __add_rectangle(
         self,
@@ -500,21 +557,25 @@ class PathfindingChunk:
 
     def get_air_rectangles(
         self,
-        block_matrix: List[List["blocks.Block"]],
+        start_row: int,
+        start_column: int,
         covered_coordinates: List[List[bool]]
     ):
+        """Find all air rectangles in the part of the matrix that starts at the start row and column and has the size
+        of the covered coordinates"""
         # covered coordinates is a matrix with the same amount of rows and column coords for all checked coords.
+        rows = min(len(covered_coordinates), self.matrix.rows - start_row)
+        columns = min(len(covered_coordinates[0]), self.matrix.columns - start_column) if rows > 0 else 0
 
         # find all rectangles in the block matrix
-        for n_row, row in enumerate(block_matrix):
-            for n_col, block in enumerate(row):
+        for n_row in range(rows):
+            for n_col in range(columns):
                 # find solid block
-                if block.is_solid() or covered_coordinates[n_row][n_col]:
+                if self.matrix.is_solid(start_row + n_row, start_column + n_col) or covered_coordinates[n_row][n_col]:
                     continue
 
-                sub_matrix = [sub_row[n_col:] for sub_row in block_matrix[n_row:]]
-                sub_covered_matrix = [sub_row[n_col:] for sub_row in covered_coordinates[n_row:]]
-                lm_coord = self.__find_air_rectangle(sub_matrix, sub_covered_matrix)
+                lm_coord = self.__find_air_rectangle(start_row + n_row, start_column + n_col, rows - n_row,
+                                                     columns - n_col, n_row, n_col, covered_coordinates)
 
                 # add newly covered coordinates
                 for x in range(lm_coord[0] + 1):
@@ -522,35 +583,39 @@ class PathfindingChunk:
                         covered_coordinates[n_row + y][n_col + x] = True
 
                 # add the air rectangle to the list of rectangles
-                air_matrix = [sub_row[n_col:n_col + lm_coord[0] + 1] for sub_row in
-                              block_matrix[n_row:n_row + lm_coord[1] + 1]]
-                rect = AirRectangle(util.rect_from_block_matrix(air_matrix))
+                topleft = self.matrix.block_rect(start_row + n_row, start_column + n_col).topleft
+                bottomright = self.matrix.block_rect(start_row + n_row + lm_coord[1],
+                                                     start_column + n_col + lm_coord[0]).bottomright
+                rect = AirRectangle(pygame.Rect((*topleft, bottomright[0] - topleft[0], bottomright[1] - topleft[1])))
                 self.__add_rectangle(rect)
 
     def __find_air_rectangle(
         self,
-        block_matrix: List[List["blocks.Block"]],
+        row: int,
+        column: int,
+        rows: int,
+        columns: int,
+        covered_row: int,
+        covered_column: int,
         covered_coordinates: List[List[bool]]
     ) -> List[int]:
         """Find starting from a transparant block all the same transparant  block_classes in a rectangle given
-         a certain matrix"""
+         a certain amount of rows and columns"""
         # first find how far the column is filled cannot fill on 0 since 0 is guaranteed to be a air block
         x_size = 0
-        group = block_matrix[0][0].transparant_group
-        for n_col, block in enumerate(block_matrix[0][1:]):
-            if block.transparant_group != group or covered_coordinates[0][n_col + 1]:
+        group = self.matrix.transparant_group(row, column)
+        for col_offset in range(1, columns):
+            if self.matrix.transparant_group(row, column + col_offset) != group or \
+                    covered_coordinates[covered_row][covered_column + col_offset]:
                 break
             x_size += 1
         matrix_coordinate = [x_size, 0]
 
-        # skip the first row since this was checked already
-        block = None
-        for n_row, row in enumerate(block_matrix[1:]):
-            n_col = 0
-            for n_col, block in enumerate(row[:x_size + 1]):
-                if block.transparant_group != group or covered_coordinates[n_row][n_col]:
-                    break
-            if block.transparant_group != group or covered_coordinates[n_row][n_col]:
+        # skip the first row since this was checked already. Covered coordinates are checked one row behind
+        for row_offset in range(1, rows):
+            if any(self.matrix.transparant_group(row + row_offset, column + col_offset) != group or
+                   covered_coordinates[covered_row + row_offset - 1][covered_column + col_offset]
+                   for col_offset in range(x_size + 1)):
                 break
             matrix_coordinate[1] += 1
         return matrix_coordinate
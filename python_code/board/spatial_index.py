@@ -0,0 +1,130 @@
+import pygame
+import heapq
+from typing import Dict, Tuple, List, Set, Union, Callable, Any, ClassVar
+
+import utility.constants as con
+import utility.utilities as util
+
+
+class SpatialIndex:
+    """Items with a rect, like buildings and machines, saved in square buckets of the board. This allows finding the
+    items close to a point or overlapping a rectangle without checking every item"""
+    # width and height of a bucket in pixels
+    BUCKET_SIZE: ClassVar[int] = con.CHUNK_SIZE.width
+
+    __items: Dict[Any, Any]
+    __item_buckets: Dict[Any, List[Tuple[int, int]]]
+    __buckets: Dict[Tuple[int, int], Set[Any]]
+
+    def __init__(self):
+        self.__items = {}
+        # the buckets every item is saved in, an item is saved in every bucket its rect overlaps
+        self.__item_buckets = {}
+        self.__buckets = {}
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def __contains__(self, id_: Any) -> bool:
+        return id_ in self.__items
+
+    def add(
+        self,
+        id_: Any,
+        item: Any
+    ):
+        """Add an item that has a rect attribute"""
+        if id_ in self.__items:
+            raise util.GameException(f"Item with id {id_} is already in the spatial index")
+        self.__items[id_] = item
+        self.__item_buckets[id_] = self.__rect_buckets(item.rect)
+        for bucket in self.__item_buckets[id_]:
+            self.__buckets.setdefault(bucket, set()).add(id_)
+
+    def remove(self, id_: Any) -> Any:
+        item = self.__items.pop(id_)
+        for bucket in self.__item_buckets.pop(id_):
+            self.__buckets[bucket].discard(id_)
+            if len(self.__buckets[bucket]) == 0:
+                del self.__buckets[bucket]
+        return item
+
+    def update(self, id_: Any):
+        """Save an item in the buckets of its current rect, for when the rect of an item changed"""
+        self.add(id_, self.remove(id_))
+
+    def overlapping(self, rect: pygame.Rect) -> List[Any]:
+        """All items with a rect that overlaps rect"""
+        ids = set()
+        for bucket in self.__rect_buckets(rect):
+            ids.update(self.__buckets.get(bucket, ()))
+        return [self.__items[id_] for id_ in ids if self.__items[id_].rect.colliderect(rect)]
+
+    def nearest(
+        self,
+        point: Union[Tuple[int, int], List[int]],
+        condition: Union[Callable[[Any], bool], None] = None
+    ) -> Union[Any, None]:
+        """The item with the center closest to point in manhattan distance that fulfills the condition. Buckets are
+        checked from close to far away from the point until no bucket further away can contain a closer item"""
+        point_column, point_row = self.__bucket(point)
+        closest = [None, None]  # item and distance
+        checked_ids = set()
+
+        def check_bucket(bucket_: Tuple[int, int]):
+            for id_ in self.__buckets.get(bucket_, ()):
+                if id_ in checked_ids:
+                    continue
+                checked_ids.add(id_)
+                item = self.__items[id_]
+                if condition is not None and not condition(item):
+                    continue
+                distance = util.manhattan_distance(point, item.rect.center)
+                if closest[1] is None or distance < closest[1]:
+                    closest[0], closest[1] = item, distance
+
+        # check rings of buckets around the point while that is cheaper then going over all buckets with items. Items
+        # outside ring are further away then ring buckets in at least one direction
+        ring = 0
+        while (2 * ring + 1) ** 2 <= len(self.__buckets):
+            for bucket in self.__ring_buckets((point_column, point_row), ring):
+                check_bucket(bucket)
+            if closest[1] is not None and closest[1] <= ring * self.BUCKET_SIZE:
+                return closest[0]
+            ring += 1
+        # heap of the remaining buckets with items by the amount of buckets they are away from the point
+        buckets = [(max(abs(column - point_column), abs(row - point_row)), (column, row))
+                   for column, row in self.__buckets]
+        buckets = [bucket for bucket in buckets if bucket[0] >= ring]
+        heapq.heapify(buckets)
+        while buckets:
+            bucket_distance, bucket = heapq.heappop(buckets)
+            if closest[1] is not None and closest[1] <= (bucket_distance - 1) * self.BUCKET_SIZE:
+                break
+            check_bucket(bucket)
+        return closest[0]
+
+    def __bucket(self, point: Union[Tuple[int, int], List[int]]) -> Tuple[int, int]:
+        return int(point[0] // self.BUCKET_SIZE), int(point[1] // self.BUCKET_SIZE)
+
+    def __rect_buckets(self, rect: pygame.Rect) -> List[Tuple[int, int]]:
+        left, top = self.__bucket(rect.topleft)
+        right, bottom = self.__bucket((rect.right - 1, rect.bottom - 1))
+        return [(column, row) for row in range(top, bottom + 1) for column in range(left, right + 1)]
+
+    @staticmethod
+    def __ring_buckets(
+        center: Tuple[int, int],
+        ring: int
+    ) -> List[Tuple[int, int]]:
+        """The buckets that are exactly ring buckets away from center horizontally or vertically"""
+        if ring == 0:
+            return [center]
+        buckets = []
+        for column in range(center[0] - ring, center[0] + ring + 1):
+            buckets.append((column, center[1] - ring))
+            buckets.append((column, center[1] + ring))
+        for row in range(center[1] - ring + 1, center[1] + ring):
+            buckets.append((center[0] - ring, row))
+            buckets.append((center[0] + ring, row))
+        return buckets
@@ -1,12 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import List, Union, Set, Dict, TYPE_CHECKING, ClassVar, Type, Any
-from random import choices
+from typing import List, Union, Dict, TYPE_CHECKING, ClassVar, Type, Any, Iterable
+from random import choices, Random
+from itertools import accumulate
+from math import ceil, floor, exp
+from numpy import arange, meshgrid, floor as np_floor, clip, exp as np_exp
 
 from utility import utilities as util, constants as con, loading_saving
+from block_classes.materials import materials
 import block_classes.materials.environment_materials as environment_materials
 import block_classes.materials.ground_materials as ground_materials
 from board_generation.structures import base_structures, abandoned_mine, protected_vault
 if TYPE_CHECKING:
+    from numpy import ndarray
+    from pygame import Rect
     from block_classes.materials.materials import DepthMaterial
     from block_classes.materials.environment_materials import EnvironmentMaterial
 
@@ -14,12 +20,64 @@ if TYPE_CHECKING:
 all_biomes: List[type]
 
 
+class MaterialLikelyhoodTable:
+    """Cumulative likelyhoods of a list of materials for every depth row of the board. Choosing a material is a binary
+    search over the cached cumulative likelyhoods of the depth row. Material collections are kept as is so every
+    choice still gives a random name of the collection"""
+    __slots__ = "materials", "__cumulative_likelyhoods"
+
+    materials: List["DepthMaterial"]
+    __cumulative_likelyhoods: List[List[float]]
+
+    def __init__(self, materials: Iterable["DepthMaterial"]):
+        self.materials = list(materials)
+        self.__cumulative_likelyhoods = [self.__calculate_cumulative_likelyhoods(depth)
+                                         for depth in range(ceil(con.MAX_DEPTH))]
+
+    def __calculate_cumulative_likelyhoods(self, depth: int) -> List[float]:
+        # rounding is done to get rid of extremely small likelyhoods
+        return list(accumulate(round(material.get_lh_at_depth(depth), 10) for material in self.materials))
+
+    def cumulative_likelyhoods(self, depth: int) -> List[float]:
+        if 0 <= depth < len(self.__cumulative_likelyhoods):
+            return self.__cumulative_likelyhoods[depth]
+        return self.__calculate_cumulative_likelyhoods(depth)
+
+    def likelyhoods(self, depth: int) -> Dict[str, float]:
+        """Normalised likelyhoods of the material names at the given depth"""
+        cumulative_likelyhoods = self.cumulative_likelyhoods(depth)
+        total = cumulative_likelyhoods[-1] if len(cumulative_likelyhoods) > 0 else 0
+        material_likelyhoods = {}
+        previous = 0
+        for material, cumulative_lh in zip(self.materials, cumulative_likelyhoods):
+            lh = (cumulative_lh - previous) / total if total != 0 else 0
+            previous = cumulative_lh
+            name = material.name()
+            material_likelyhoods[name] = material_likelyhoods.get(name, 0) + lh
+        return material_likelyhoods
+
+    def choose(
+        self,
+        depth: int,
+        rng: Union[Random, None] = None
+    ) -> Union[str, None]:
+        """Choose a material name at the given depth, None if there are no materials. Use rng instead of the global
+        random state for reproducible choices"""
+        if len(self.materials) == 0:
+            return None
+        random_choices = rng.choices if rng is not None else choices
+        material = random_choices(self.materials, cum_weights=self.cumulative_likelyhoods(depth), k=1)[0]
+        return materials.material_name(material, rng)
+
+
 class Biome(loading_saving.Savable, loading_saving.Loadable, ABC):
     CLUSTER_LIKELYHOOD: float = 1 / 120
     # max distance of ores from the center of a cluster 49 max ores in a cluster
     MAX_CLUSTER_SIZE: int = 3
     # chance of a plant to occur when location is valid 10%
     FLORA_LIKELYHOOD = 0.1
+    # maximum error of interpolated log likelyhoods from the likelyhood raster
+    MAX_RASTER_ERROR: ClassVar[float] = 0.05
 
     DEPTH_DISTRIBUTION: ClassVar[util.Gaussian]
     FILLER_MATERIALS: ClassVar[List["DepthMaterial"]]
@@ -27,7 +85,13 @@ class Biome(loading_saving.Savable, loading_saving.Loadable, ABC):
     FLORA_MATERIALS: ClassVar[List["DepthMaterial"]]
     BACKGROUND_MATERIALS: ClassVar[List["DepthMaterial"]]
 
+    # material likelyhood tables per biome type, they only depend on the class variables
+    __material_tables: ClassVar[Dict[Type["Biome"], Dict[str, MaterialLikelyhoodTable]]] = {}
+
     distribution: util.TwoDimensionalGaussian
+    __raster: Union["ndarray", None]
+    __raster_rect: Union["Rect", None]
+    __raster_resolution: int
 
     def __init__(
         self,
@@ -37,9 +101,16 @@ class Biome(loading_saving.Savable, loading_saving.Loadable, ABC):
         covariance2: float = 0.0,
     ):
         self.distribution = util.TwoDimensionalGaussian(x_gaussian, y_gaussian, covariance1, covariance2)
+        # raster of log likelyhoods that is filled by build_likelyhood_raster
+        self.__raster = None
+        self.__raster_rect = None
+        self.__raster_resolution = 1
 
     def __init_load__(self, distribution=None):
         self.distribution = distribution
+        self.__raster = None
+        self.__raster_rect = None
+        self.__raster_resolution = 1
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -53,9 +124,61 @@ class Biome(loading_saving.Savable, loading_saving.Loadable, ABC):
         cls_type = globals()[dct["instance_name"]]
         return cls_type.load(distribution=distribution)
 
+    def build_likelyhood_raster(
+        self,
+        rect: "Rect",
+        max_resolution: int
+    ) -> None:
+        """Pre-calculate the log likelyhoods of this biome for a grid of points covering rect. Likelyhoods of
+        coordinates within rect are interpolated from this grid afterwards.
+
+        The log likelyhood is a quadratic surface, the cross term is interpolated exactly and the error of the squared
+        terms is at most (a + d) * resolution ** 2 / 8 where a and d are the diagonal of the inverse covariance
+        matrix. The resolution is a multiple of the block size so the raster is exact at block coordinates in the
+        worst case"""
+        inverse = self.distribution.inv_covariance_matrix
+        curvature = max(inverse[0][0] + inverse[1][1], 1e-12)
+        resolution = (8 * self.MAX_RASTER_ERROR / curvature) ** 0.5
+        resolution = min(max_resolution, max(1, floor(resolution / con.BLOCK_SIZE.width)) * con.BLOCK_SIZE.width)
+        x_coords = rect.left + arange(ceil(rect.width / resolution) + 1) * resolution
+        y_coords = rect.top + arange(ceil(rect.height / resolution) + 1) * resolution
+        x_grid, y_grid = meshgrid(x_coords, y_coords)
+        self.__raster = self.distribution.log_probabilities(x_grid, y_grid)
+        self.__raster_rect = rect
+        self.__raster_resolution = resolution
+
     def get_likelyhood_at_coord(self, x: int, y: int) -> float:
         """The likelyhood of the given coordinate being part of this biome"""
-        return self.distribution.probability(x, y)
+        if self.__raster is None or not self.__raster_rect.collidepoint(x, y):
+            return self.distribution.probability(x, y)
+        raster_x = (x - self.__raster_rect.left) / self.__raster_resolution
+        raster_y = (y - self.__raster_rect.top) / self.__raster_resolution
+        col = min(floor(raster_x), self.__raster.shape[1] - 2)
+        row = min(floor(raster_y), self.__raster.shape[0] - 2)
+        fraction_x = raster_x - col
+        fraction_y = raster_y - row
+        log_lh = self.__raster.item(row, col) * (1 - fraction_x) * (1 - fraction_y) + \
+            self.__raster.item(row, col + 1) * fraction_x * (1 - fraction_y) + \
+            self.__raster.item(row + 1, col) * (1 - fraction_x) * fraction_y + \
+            self.__raster.item(row + 1, col + 1) * fraction_x * fraction_y
+        return exp(log_lh)
+
+    def get_likelyhoods_at_coords(self, x: "ndarray", y: "ndarray") -> "ndarray":
+        """The likelyhoods of all coordinates in the x and y arrays being part of this biome"""
+        if self.__raster is None or x.min() < self.__raster_rect.left or x.max() >= self.__raster_rect.right or \
+                y.min() < self.__raster_rect.top or y.max() >= self.__raster_rect.bottom:
+            return self.distribution.probabilities(x, y)
+        raster_x = (x - self.__raster_rect.left) / self.__raster_resolution
+        raster_y = (y - self.__raster_rect.top) / self.__raster_resolution
+        cols = clip(np_floor(raster_x).astype(int), 0, self.__raster.shape[1] - 2)
+        rows = clip(np_floor(raster_y).astype(int), 0, self.__raster.shape[0] - 2)
+        fraction_x = raster_x - cols
+        fraction_y = raster_y - rows
+        log_lhs = self.__raster[rows, cols] * (1 - fraction_x) * (1 - fraction_y) + \
+            self.__raster[rows, cols + 1] * fraction_x * (1 - fraction_y) + \
+            self.__raster[rows + 1, cols] * (1 - fraction_x) * fraction_y + \
+            self.__raster[rows + 1, cols + 1] * fraction_x * fraction_y
+        return np_exp(log_lhs)
 
     @classmethod
     def get_likelyhood_at_depth(cls, depth: int) -> float:
@@ -96,49 +219,54 @@ class Biome(loading_saving.Savable, loading_saving.Loadable, ABC):
         pass
 
     def get_filler_lh_at_depth(self, depth: int) -> Dict[str, float]:
-        return self.__get_material_lh_at_depth(self.FILLER_MATERIALS, depth)
+        return self.__material_table("filler", self.FILLER_MATERIALS).likelyhoods(depth)
 
     def get_ore_lh_at_depth(self, depth) -> Dict[str, float]:
-        return self.__get_material_lh_at_depth(self.ORE_MATERIALS, depth)
+        return self.__material_table("ore", self.ORE_MATERIALS).likelyhoods(depth)
 
     def get_flora_lh_at_depth(self, depth) -> List[Dict[str, float]]:
         """Give likelyhoods for all growing directions"""
-        return [self.__get_material_lh_at_depth([m for m in self.FLORA_MATERIALS if m.START_DIRECTION == 0], depth),
-                self.__get_material_lh_at_depth([m for m in self.FLORA_MATERIALS if m.START_DIRECTION == 1], depth),
-                self.__get_material_lh_at_depth([m for m in self.FLORA_MATERIALS if m.START_DIRECTION == 2], depth),
-                self.__get_material_lh_at_depth([m for m in self.FLORA_MATERIALS if m.START_DIRECTION == 3], depth)]
+        return [self.__flora_table(direction).likelyhoods(depth) for direction in range(4)]
 
     def get_background_lh_at_depth(self, depth) -> Dict[str, float]:
-        return self.__get_material_lh_at_depth(self.BACKGROUND_MATERIALS, depth)
-
-    def __get_material_lh_at_depth(self, material_list: Union[List, Set], depth: int) -> Dict[str, float]:
-        """Get the likelyhood that a material in a collection is at a given depth given the gaussian function associated
-        with it
-
-        Args:
-            material_list (iterable): an iterable list of material types
-            depth (int): integer of the depth.
-
-        Returns:
-            Dictionary containing the material names linked to a normalised likelyhood that the material is at the
-            given depth
-        """
-        likelyhoods = []
-        material_list = list(material_list)
-        for material in material_list:
-            lh = material.get_lh_at_depth(depth)
-            likelyhoods.append(round(lh, 10))
-        norm_likelyhoods = util.normalize(likelyhoods)
-
-        # calculate accumulated probabilities when relevant
-        material_likelyhoods = {}
-        for index, lh in enumerate(norm_likelyhoods):
-            name = material_list[index].name()
-            if name in material_likelyhoods:
-                material_likelyhoods[name] += lh
-            else:
-                material_likelyhoods[name] = lh
-        return material_likelyhoods
+        return self.__material_table("background", self.BACKGROUND_MATERIALS).likelyhoods(depth)
+
+    @classmethod
+    def get_filler_at_depth(cls, depth: int, rng: Union[Random, None] = None) -> str:
+        """Choose a filler material name at the given depth"""
+        return cls.__material_table("filler", cls.FILLER_MATERIALS).choose(depth, rng)
+
+    @classmethod
+    def get_ore_at_depth(cls, depth: int, rng: Union[Random, None] = None) -> str:
+        """Choose an ore material name at the given depth"""
+        return cls.__material_table("ore", cls.ORE_MATERIALS).choose(depth, rng)
+
+    @classmethod
+    def get_flora_at_depth(cls, depth: int, direction: int, rng: Union[Random, None] = None) -> Union[str, None]:
+        """Choose a flora material name at the given depth growing in direction, None if there are no options"""
+        return cls.__flora_table(direction).choose(depth, rng)
+
+    @classmethod
+    def get_background_at_depth(cls, depth: int, rng: Union[Random, None] = None) -> str:
+        """Choose a background material name at the given depth"""
+        return cls.__material_table("background", cls.BACKGROUND_MATERIALS).choose(depth, rng)
+
+    @classmethod
+    def __flora_table(cls, direction: int) -> MaterialLikelyhoodTable:
+        return cls.__material_table(f"flora{direction}",
+                                    [m for m in cls.FLORA_MATERIALS if m.START_DIRECTION == direction])
+
+    @classmethod
+    def __material_table(
+        cls,
+        name: str,
+        materials: Iterable["DepthMaterial"]
+    ) -> MaterialLikelyhoodTable:
+        """Get the likelyhood table of this biome type with the given name, the table is created on first request"""
+        tables = Biome.__material_tables.setdefault(cls, {})
+        if name not in tables:
+            tables[name] = MaterialLikelyhoodTable(materials)
+        return tables[name]
 
 
 class NormalBiome(Biome):
@@ -246,21 +374,25 @@ class BiomeGenerationDefinition(loading_saving.Savable, loading_saving.Loadable,
     @classmethod
     def get_biome(
         cls,
-        depth: int
+        depth: int,
+        rng: Union[Random, None] = None
     ) -> Type[Biome]:
         """Calculate the likelyhood of a biome for a given depth based on the frequency of the biome overall and a
         likelyhood given the depth"""
+        random_choices = rng.choices if rng is not None else choices
         # noinspection PyUnresolvedReferences
         biome_lhs_at_depth = {biome: biome.get_likelyhood_at_depth(depth) * frequency
                               for biome, frequency in cls.BIOME_PROBABILITIES.items()}
-        biome_type = choices(list(biome_lhs_at_depth.keys()), list(biome_lhs_at_depth.values()), k=1)[0]
+        biome_type = random_choices(list(biome_lhs_at_depth.keys()), list(biome_lhs_at_depth.values()), k=1)[0]
         return biome_type
 
     @classmethod
     def get_structure(
         cls,
-        depth: int
+        depth: int,
+        rng: Union[Random, None] = None
     ) -> Union[Type[base_structures.Structure], None]:
+        random_choices = rng.choices if rng is not None else choices
         # noinspection PyTypeChecker
         if len(cls.STRUCTURE_PROBABILITIES) > 0:
             # noinspection PyUnresolvedReferences
@@ -269,7 +401,8 @@ class BiomeGenerationDefinition(loading_saving.Savable, loading_saving.Loadable,
             if sum(structure_lhs_at_depth.values()) == 0:
                 structure_lhs_at_depth = {structure: 1.0 for structure in structure_lhs_at_depth}
             # noinspection PyUnresolvedReferences
-            return choices(list(structure_lhs_at_depth.keys()), list(structure_lhs_at_depth.values()), k=1)[0]
+            return random_choices(list(structure_lhs_at_depth.keys()), list(structure_lhs_at_depth.values()),
+                                  k=1)[0]
         return None
 
 
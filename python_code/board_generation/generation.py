@@ -1,9 +1,15 @@
-from random import randint, choices, uniform, choice
+from random import randint, Random
 from math import pi, cos, sin, ceil, sqrt
-from typing import List, Dict, Union, ClassVar, Set, Tuple, Iterable, Any
+from typing import List, Dict, Union, ClassVar, Set, Tuple, Iterable, Any, Type
+from threading import Lock
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from os import cpu_count
+from numpy import arange, unique, nonzero, meshgrid, stack, cumsum, where, errstate, ndarray, array, zeros, \
+    uint16, iinfo
 from pygame import Rect
 
-from utility import constants as con, utilities as util, loading_saving
+from utility import constants as con, utilities as util, loading_saving, game_timing
 import interfaces.windows.interface_utility as interface_util
 from block_classes import block_utility as block_util
 from block_classes.materials import ground_materials
@@ -34,6 +40,8 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
     # determines the standard deviation of the biomes, high values means very broad distributions
     BIOME_BLEND: ClassVar[Dict[str, int]] = \
         {"very low": 1, "low": 5, "normal": 15, "severe": 30, "extreme": 50, "what are biomes?": 100}
+    # maximum distance in pixels between the points of the pre-calculated biome likelyhood rasters
+    MAX_BIOME_RASTER_RESOLUTION: ClassVar[int] = 200
 
     # CAVE values
     MAX_CAVES: ClassVar[Dict[str, int]] = \
@@ -51,8 +59,13 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
     BORDER_SPREAD_LIKELYHOOD: ClassVar[util.Gaussian] = util.Gaussian(0, 2)
     MAX_BORDER_SPREAD_DISTANCE: ClassVar[int] = 4
 
+    # number of processes that generate filler blocks, when 1 or lower the filler blocks are generated in process
+    NR_GENERATION_PROCESSES: ClassVar[int] = max(1, (cpu_count() or 1) - 1)
+
+    __seed: int
+    __lock: Lock
     __environment_material_names: Set[str]
-    __generated_chunks_matrix: List[List[int]]
+    __generated_chunks: Dict[Tuple[int, int], int]
     __predefined_blocks: "PredefinedBlocks"
     __minimum_generation_length: int
     __generation_rect: Rect
@@ -76,12 +89,15 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         cave_broadness: Union[str, float] = "normal",
         progress_var: Union[None, List[str]] = None,
     ):
+        # all random generation is derived from this seed and the location that is generated
+        self.__seed = con.SEED if con.USE_SEED else randint(0, 2 ** 32)
+        # make sure only one thread is changing the state of the generator
+        self.__lock = Lock()
         self.__environment_material_names = {mat.name() for mat in block_util.environment_materials}
 
-        # for tracking what chunks have been covered by generation 0 is not covered 1 is covered by ores and environment
-        # 2 is covered with filler blocks
-        self.__generated_chunks_matrix = [[0 for _ in range(ceil(con.ORIGINAL_BOARD_SIZE.width / con.CHUNK_SIZE.width))]
-                                          for _ in range(ceil(con.ORIGINAL_BOARD_SIZE.height / con.CHUNK_SIZE.height))]
+        # for tracking what chunks have been covered by generation by chunk coordinate 1 is covered by ores and
+        # environment 2 is covered with filler blocks. Chunks that are not covered are not present
+        self.__generated_chunks = {}
         # structure for efficiently storing a variable number of blocks from a matrix that are not neccesairily
         # consecutive
         self.__predefined_blocks = PredefinedBlocks()
@@ -115,14 +131,16 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         self.__generate_biomes(self.__generation_rect, progress_var)
         self.__generate_surroundings(self.__generation_rect, progress_var)
 
-    def __init_load__(self, generated_chunk_matrix=None, predefined_blocks=None, minimum_generation_length=None,
+    def __init_load__(self, generated_chunks=None, predefined_blocks=None, minimum_generation_length=None,
                       generation_rect=None, cave_lenght=None, cave_quadrant_size=None, cave_stop_spread_chance=None,
-                      biome_size=None, biome_blend=None, biome_matrix=None, biome_definition=None):
+                      biome_size=None, biome_blend=None, biome_matrix=None, biome_definition=None, seed=None):
+        self.__seed = seed
+        self.__lock = Lock()
         self.__environment_material_names = {mat.name() for mat in block_util.environment_materials}
 
-        # for tracking what chunks have been covered by generation 0 is not covered 1 is covered by ores and environment
-        # 2 is covered with filler blocks
-        self.__generated_chunks_matrix = generated_chunk_matrix
+        # for tracking what chunks have been covered by generation by chunk coordinate 1 is covered by ores and
+        # environment 2 is covered with filler blocks. Chunks that are not covered are not present
+        self.__generated_chunks = generated_chunks
         # structure for efficiently storing a variable number of blocks from a matrix that are not neccesairily
         # consecutive
         self.__predefined_blocks = predefined_blocks
@@ -143,10 +161,17 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         self.__biome_blend = self.BIOME_BLEND.get(biome_blend, biome_blend)
         # fill the biome matrix with empty values
         self.__biome_matrix = biome_matrix
+        # likelyhood rasters are not saved so recalculate them
+        for row_i, row in enumerate(self.__biome_matrix):
+            for col_i, biome in enumerate(row):
+                if biome is not None:
+                    biome.build_likelyhood_raster(self.__biome_raster_rect(col_i, row_i),
+                                                  self.MAX_BIOME_RASTER_RESOLUTION)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
-            "generated_chunk_matrix": self.__generated_chunks_matrix,
+            "seed": self.__seed,
+            "generated_chunks": [[*coord, value] for coord, value in self.__generated_chunks.items()],
             "predefined_blocks": self.__predefined_blocks.to_dict(),
             "minimum_generation_length": self.__minimum_generation_length,
             "generation_rect": (self.__generation_rect.left, self.__generation_rect.top,
@@ -173,38 +198,90 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         biome_matrix = [[biome_classes.Biome.from_dict(biome_d)if biome_d is not None else None for biome_d in row]
                         for row in dct["biome_matrix"]]
 
-        return cls.load(generated_chunk_matrix=dct["generated_chunk_matrix"], predefined_blocks=predefined_blocks,
+        if "generated_chunks" in dct:
+            generated_chunks = {(col_i, row_i): value for col_i, row_i, value in dct["generated_chunks"]}
+        else:
+            # generated chunks used to be saved as a matrix of values
+            generated_chunks = {(col_i, row_i): value for row_i, row in enumerate(dct["generated_chunk_matrix"])
+                                for col_i, value in enumerate(row) if value != 0}
+        return cls.load(generated_chunks=generated_chunks, predefined_blocks=predefined_blocks,
                         minimum_generation_length=dct["minimum_generation_length"], generation_rect=generation_rect,
                         cave_lenght=dct["cave_lenght"], cave_quadrant_size=cave_quadrant_size,
                         cave_stop_spread_chance=dct["cave_stop_spread"], biome_size=biome_size,
-                        biome_blend=dct["biome_blend"], biome_matrix=biome_matrix, biome_definition=biome_definition)
+                        biome_blend=dct["biome_blend"], biome_matrix=biome_matrix, biome_definition=biome_definition,
+                        seed=dct.get("seed", con.SEED))
 
     def generate_chunk(
         self,
         topleft: Union[Tuple[int, int], List[int]]
     ) -> Tuple[Union[None, List[List]], Union[None, List[List]]]:
         """Generate a chunk with the given topleft"""
-        matrix = [[None for _ in range(interface_util.p_to_c(con.CHUNK_SIZE.width))]
-                  for _ in range(interface_util.p_to_r(con.CHUNK_SIZE.height))]
-        background_matrix = [[None for _ in range(interface_util.p_to_c(con.CHUNK_SIZE.width))]
-                             for _ in range(interface_util.p_to_r(con.CHUNK_SIZE.height))]
+        return self.generate_chunks([topleft])[0]
+
+    def generate_chunks(
+        self,
+        toplefts: List[Union[Tuple[int, int], List[int]]]
+    ) -> List[Tuple[Union[None, List[List]], Union[None, List[List]]]]:
+        """Generate multiple chunks at once. The generation that is shared between chunks is done first for all chunks
+        after which the filler blocks of all chunks are generated in parallel.
+
+        Every chunk and region is generated with its own random stream derived from the seed and the location so the
+        result does not depend on the process that generates it"""
+        filler_arguments = []
+        with self.__lock:
+            for topleft in toplefts:
+                filler_arguments.append(self.__generate_shared_layers(topleft))
+        executor = _get_filler_executor(self.NR_GENERATION_PROCESSES)
+        if executor is None:
+            return [self._generate_filler_layer(*arguments) if arguments is not None else (None, None)
+                    for arguments in filler_arguments]
+        futures = [executor.submit(self._generate_filler_layer, *arguments) if arguments is not None else None
+                   for arguments in filler_arguments]
+        return [future.result() if future is not None else (None, None) for future in futures]
+
+    def __generate_shared_layers(
+        self,
+        topleft: Union[Tuple[int, int], List[int]]
+    ) -> Union[Tuple, None]:
+        """Generate layer 1 and 2 for a chunk and collect the arguments to generate the filler layer for the chunk.
+        Returns None if the chunk was already generated"""
         chunk_rect = Rect((topleft[0], topleft[1], con.CHUNK_SIZE.width, con.CHUNK_SIZE.height))
         chunk_coord = interface_util.p_to_cp(topleft)
 
         # if the chunk was already generated do not do it again
-        if self.__generated_chunks_matrix[chunk_coord[1]][chunk_coord[0]] == 2:
-            return None, None
+        if self.__generated_chunks.get(chunk_coord, 0) == 2:
+            return None
+        matrix = [[None for _ in range(interface_util.p_to_c(con.CHUNK_SIZE.width))]
+                  for _ in range(interface_util.p_to_r(con.CHUNK_SIZE.height))]
         # extend structures as caves and biomes when needed
         self.__extend_surrounding_generation(chunk_rect)
         # generate ores and environment one chunk out from the generated boundary to allow generation over chunks
         self.__add_special_blocks(chunk_coord)
         # add all blocks that have been pre-defined by surrounding generation and ore and environment
         self.__add_pre_defined_blocks(chunk_rect, matrix)
-        self.__add_filler_blocks(chunk_rect, matrix, background_matrix)
-        self.__add_border(matrix, topleft)
+        biome_grid, cum_weight_grid = self.__chunk_biome_liklyhoods(chunk_rect)
 
         # save that this chunk was covered by generation
-        self.__generated_chunks_matrix[chunk_coord[1]][chunk_coord[0]] = 2
+        self.__generated_chunks[chunk_coord] = 2
+        return (chunk_rect.topleft, matrix, biome_grid, cum_weight_grid,
+                self.__random_seed("filler", *chunk_coord))
+
+    @classmethod
+    def _generate_filler_layer(
+        cls,
+        topleft: Tuple[int, int],
+        matrix: List[List],
+        biome_grid: List[List[List[Type[biome_classes.Biome]]]],
+        cum_weight_grid: List[List[List[float]]],
+        seed: str
+    ) -> Tuple[List[List], List[List]]:
+        """Add filler blocks, background blocks and a border to a chunk. This only depends on the arguments so it can
+        be run in a separate process"""
+        rng = Random(seed)
+        background_matrix = [[None for _ in range(interface_util.p_to_c(con.CHUNK_SIZE.width))]
+                             for _ in range(interface_util.p_to_r(con.CHUNK_SIZE.height))]
+        cls.__add_filler_blocks(topleft, matrix, background_matrix, biome_grid, cum_weight_grid, rng)
+        cls.__add_border(matrix, topleft, rng)
         return matrix, background_matrix
 
 # LAYER1: cave biome and structure generation
@@ -266,6 +343,7 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         self.__generate_surroundings(rect)
         self.__generation_rect.union_ip(rect)
 
+    @game_timing.time_function("world generation", "biomes", background=True)
     def __generate_biomes(
         self,
         rect: Rect,
@@ -283,18 +361,21 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
                     progress_var[0] = f"Generating biome {current_biome_nr} out of {total_biomes}..."
                 row_i += row_start
                 col_i += col_start
+                rng = self.__random("biome", col_i, row_i)
                 # allow the shapes of the distributions to be a bit different (more oval)
-                sd_x = self.__biome_size.width * self.__biome_blend * uniform(0.6, 1.4)
-                sd_y = self.__biome_size.height * self.__biome_blend * uniform(0.6, 1.4)
+                sd_x = self.__biome_size.width * self.__biome_blend * rng.uniform(0.6, 1.4)
+                sd_y = self.__biome_size.height * self.__biome_blend * rng.uniform(0.6, 1.4)
                 # allow the distribution to be tilted
-                cov1 = uniform(-sd_x, sd_x)
-                cov2 = uniform(-sd_y, sd_y)
+                cov1 = rng.uniform(-sd_x, sd_x)
+                cov2 = rng.uniform(-sd_y, sd_y)
                 mean_x = col_i * self.__biome_size.width + 0.5 * self.__biome_size.width
                 mean_y = row_i * self.__biome_size.height + 0.5 * self.__biome_size.height
 
                 # check depths in blocks
-                biome_type = self.__biome_definition.get_biome(int(mean_y / con.BLOCK_SIZE.height))
+                biome_type = self.__biome_definition.get_biome(int(mean_y / con.BLOCK_SIZE.height), rng)
                 biome_instance = biome_type(util.Gaussian(mean_x, sd_x), util.Gaussian(mean_y, sd_y), cov1, cov2)
+                biome_instance.build_likelyhood_raster(self.__biome_raster_rect(col_i, row_i),
+                                                       self.MAX_BIOME_RASTER_RESOLUTION)
                 self.__biome_matrix[row_i][col_i] = biome_instance
 
     def __generate_surroundings(
@@ -314,25 +395,28 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
                     progress_var[0] = f"Carving out cave {current_cave_nr} out of {total_caves}..."
                 row_i += row_start
                 col_i += col_start
-                x_coord = randint(int(col_i * self.__cave_quadrant_size.height),
-                                  int((col_i + 1) * self.__cave_quadrant_size.height))
-                y_coord = randint(int(row_i * self.__cave_quadrant_size.width),
-                                  int((row_i + 1) * self.__cave_quadrant_size.width))
-                self.__generate_cave([x_coord, y_coord])
-                x_coord = randint(int(col_i * self.__cave_quadrant_size.height),
-                                  int((col_i + 1) * self.__cave_quadrant_size.height))
-                y_coord = randint(int(row_i * self.__cave_quadrant_size.width),
-                                  int((row_i + 1) * self.__cave_quadrant_size.width))
-                self.__generate_structure((x_coord, y_coord))
+                rng = self.__random("surroundings", col_i, row_i)
+                x_coord = rng.randint(int(col_i * self.__cave_quadrant_size.height),
+                                      int((col_i + 1) * self.__cave_quadrant_size.height))
+                y_coord = rng.randint(int(row_i * self.__cave_quadrant_size.width),
+                                      int((row_i + 1) * self.__cave_quadrant_size.width))
+                self.__generate_cave([x_coord, y_coord], rng)
+                x_coord = rng.randint(int(col_i * self.__cave_quadrant_size.height),
+                                      int((col_i + 1) * self.__cave_quadrant_size.height))
+                y_coord = rng.randint(int(row_i * self.__cave_quadrant_size.width),
+                                      int((row_i + 1) * self.__cave_quadrant_size.width))
+                self.__generate_structure((x_coord, y_coord), rng)
 
+    @game_timing.time_function("world generation", "structures", background=True)
     def __generate_structure(
         self,
-        coord: Tuple[int, int]
+        coord: Tuple[int, int],
+        rng: Random
     ):
-        structure_class = self.__biome_definition.get_structure(coord[1])
+        structure_class = self.__biome_definition.get_structure(coord[1], rng)
         if structure_class is None:
             return
-        structure_instance = structure_class()
+        structure_instance = structure_class(rng)
         structure_matrix = structure_instance.get_structure_matrix()
         matrix_coord = int(coord[0] / con.BLOCK_SIZE.width), int(coord[1] / con.BLOCK_SIZE.height)
         for r_index, row in enumerate(structure_matrix):
@@ -341,12 +425,16 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
                     continue
                 self.__predefined_blocks.add((matrix_coord[0] + c_index, matrix_coord[1] + r_index), material)
 
+    @game_timing.time_function("world generation", "caves", background=True)
     def __generate_cave(
         self,
-        start_point: Union[Tuple[int, int], List[int]]
+        start_point: Union[Tuple[int, int], List[int]],
+        rng: Random
     ) -> None:
         """Add air spaces to the PredefinedBlocks instance"""
-        cave_points = self.__get_cave_points(start_point)
+        cave_points = self.__get_cave_points(start_point, rng)
+        # coordinates made air by this cave, saves checking the predefined blocks
+        carved = set()
         # get the line between the points
         for index1 in range(1, len(cave_points)):
             point1 = cave_points[index1 - 1]
@@ -366,56 +454,82 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
                 y = int(y_values[index2])
                 matrix_y = min(y, int(con.ORIGINAL_BOARD_SIZE.height / con.BLOCK_SIZE.height) - 1)
                 self.__predefined_blocks.add((matrix_x, matrix_y), "Air")
-                surrounding_coords = \
-                    [coord for coord in self.__get_surrounding_block_coords(x, y) if coord is not None
-                     and not self.__predefined_blocks.check(coord, ["Air"])]
-                # extend the cave around the direct line at random.
-                while len(surrounding_coords) > 0:
-                    if uniform(0, 1) < self.__cave_stop_spread_chance:
-                        break
-                    remove_coord = choice(surrounding_coords)
-                    surrounding_coords.remove(remove_coord)
-                    self.__predefined_blocks.add(remove_coord, "Air")
-                    additional_surrounding_coords = \
-                        [coord for coord in self.__get_surrounding_block_coords(*remove_coord) if coord is not None
-                         and not self.__predefined_blocks.check(coord, ["Air"])]
-                    surrounding_coords.extend(additional_surrounding_coords)
+                carved.add((matrix_x, matrix_y))
+                self.__spread_cave((x, y), carved, rng)
+
+    def __spread_cave(
+        self,
+        coord: Tuple[int, int],
+        carved: Set[Tuple[int, int]],
+        rng: Random
+    ) -> None:
+        """Extend the cave around a coordinate at random. Coordinates can be in the frontier multiple times, making
+        coordinates next to more air more likely to be chosen. A chosen coordinate is swapped with the last one before
+        removing it so every step takes constant time"""
+        frontier = []
+        self.__extend_cave_frontier(frontier, coord, carved)
+        while len(frontier) > 0:
+            if rng.uniform(0, 1) < self.__cave_stop_spread_chance:
+                break
+            index = rng.randrange(len(frontier))
+            remove_coord = frontier[index]
+            frontier[index] = frontier[-1]
+            frontier.pop()
+            self.__predefined_blocks.add(remove_coord, "Air")
+            carved.add(remove_coord)
+            self.__extend_cave_frontier(frontier, remove_coord, carved)
+
+    def __extend_cave_frontier(
+        self,
+        frontier: List[Tuple[int, int]],
+        coord: Tuple[int, int],
+        carved: Set[Tuple[int, int]]
+    ) -> None:
+        """Add the surrounding coordinates of coord that are within the board and not air yet"""
+        for surrounding_coord in self.__get_surrounding_block_coords(*coord):
+            if surrounding_coord is None:
+                continue
+            surrounding_coord = tuple(surrounding_coord)
+            if surrounding_coord in carved or self.__predefined_blocks.check(surrounding_coord, ["Air"]):
+                continue
+            frontier.append(surrounding_coord)
 
     def __get_cave_points(
         self,
-        start_point: Union[Tuple[int, int], List[int]]
+        start_point: Union[Tuple[int, int], List[int]],
+        rng: Random
     ) -> List[List[int]]:
         """Get points from a start point within the con.BOARD_SIZE and shaped nicely"""
         cave_points = [start_point]
-        prev_direction = uniform(0, 2 * pi)
-        amnt_points = randint(int(max(self.__cave_length / 2, 1)), self.__cave_length)
+        # for fast checking of double points
+        used_points = {tuple(start_point)}
+        prev_direction = rng.uniform(0, 2 * pi)
+        amnt_points = rng.randint(int(max(self.__cave_length / 2, 1)), self.__cave_length)
         while len(cave_points) < amnt_points:
-            radius = randint(max(1, int(self.MAX_POINT_DISTANCE / 2)), self.MAX_POINT_DISTANCE)
-            prev_direction = uniform(prev_direction - 0.5 * pi, prev_direction + 0.5 * pi)
+            radius = rng.randint(max(1, int(self.MAX_POINT_DISTANCE / 2)), self.MAX_POINT_DISTANCE)
+            prev_direction = rng.uniform(prev_direction - 0.5 * pi, prev_direction + 0.5 * pi)
             new_x = min(max(int(cave_points[-1][0] + cos(prev_direction) * radius), 0), con.ORIGINAL_BOARD_SIZE.width)
             new_y = min(max(int(cave_points[-1][1] + sin(prev_direction) * radius), 0), con.ORIGINAL_BOARD_SIZE.height)
             # make sure no double points and no straight lines
-            if [new_x, new_y] in cave_points or \
+            if (new_x, new_y) in used_points or \
                     int(new_x / con.BLOCK_SIZE.width) == int(cave_points[-1][0] / con.BLOCK_SIZE.width) or \
                     int(new_y / con.BLOCK_SIZE.height) == int(cave_points[-1][1] / con.BLOCK_SIZE.height):
                 continue
             cave_points.append([new_x, new_y])
+            used_points.add((new_x, new_y))
         return [[int(x / con.BLOCK_SIZE.width), int(y / con.BLOCK_SIZE.height)] for x, y in cave_points]
 
+    @game_timing.time_function("world generation", "predefined blocks", background=True)
     def __add_pre_defined_blocks(
         self, rect: Rect,
         matrix: List[List]
     ) -> None:
-        """Get all predefined blocks in a rectangle and add them to matrix"""
-        for row_i in range(int(rect.height / con.BLOCK_SIZE.height)):
-            for col_i in range(int(rect.width / con.BLOCK_SIZE.width)):
-                block_x_coord = int(rect.left / con.BLOCK_SIZE.width) + col_i
-                block_y_coord = int(rect.top / con.BLOCK_SIZE.height) + row_i
-                # add pre_defined_blocks
-                if (block_x_coord, block_y_coord) in self.__predefined_blocks:
-                    matrix[row_i][col_i] = self.__predefined_blocks.pop((block_x_coord, block_y_coord))
+        """Get all predefined blocks of the chunk in rect and add them to matrix"""
+        for (col_i, row_i), material in self.__predefined_blocks.pop_chunk(interface_util.p_to_cp(rect.topleft)):
+            matrix[row_i][col_i] = material
 
 # LAYER2: special block generation that can cross chunk borders
+    @game_timing.time_function("world generation", "special blocks", background=True)
     def __add_special_blocks(
         self,
         chunk_coord: Union[Tuple[int, int], List[int]]
@@ -428,35 +542,35 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
             for chunk_col in \
                     range(max(0, chunk_coord[0] - 1),
                           min(chunk_coord[0] + 2, ceil(con.ORIGINAL_BOARD_SIZE.width / con.CHUNK_SIZE.width) - 1)):
-                if self.__generated_chunks_matrix[chunk_row][chunk_col] != 0:
+                if (chunk_col, chunk_row) in self.__generated_chunks:
                     continue
                 rect = Rect((chunk_col * con.CHUNK_SIZE.width, chunk_row * con.CHUNK_SIZE.height,
                              con.CHUNK_SIZE.width, con.CHUNK_SIZE.height))
+                rng = self.__random("special", chunk_col, chunk_row)
+                biome_grid, cum_weight_grid = self.__biome_liklyhoods_from_rect(rect)
                 for row_i in range(int(rect.height / con.BLOCK_SIZE.height)):
                     for col_i in range(int(rect.width / con.BLOCK_SIZE.width)):
                         block_x_coord = int(rect.left / con.BLOCK_SIZE.width) + col_i
                         block_y_coord = int(rect.top / con.BLOCK_SIZE.height) + row_i
                         # determine biome based on coordinate
-
-                        biome_liklyhoods = self.__biome_liklyhoods_from_point(block_x_coord * con.BLOCK_SIZE.width,
-                                                                              block_y_coord * con.BLOCK_SIZE.height)
-                        biome = choices(list(biome_liklyhoods.keys()), list(biome_liklyhoods.values()), k=1)[0]
+                        biome = rng.choices(biome_grid[row_i][col_i], cum_weights=cum_weight_grid[row_i][col_i],
+                                            k=1)[0]
                         # only add plants in caves
                         if self.__predefined_blocks.check((block_x_coord, block_y_coord), ["Air"]) \
-                                and uniform(0, 1) < biome.FLORA_LIKELYHOOD:
-                            flora_likelyhoods = biome.get_flora_lh_at_depth(block_y_coord)
-                            self.__add_environment(block_x_coord, block_y_coord, flora_likelyhoods)
-                        elif uniform(0, 1) < biome.CLUSTER_LIKELYHOOD:
-                            ore_likelyhoods = biome.get_ore_lh_at_depth(block_y_coord)
-                            self.__add_ore_cluster(block_x_coord, block_y_coord, ore_likelyhoods,
-                                                   biome.MAX_CLUSTER_SIZE)
-                self.__generated_chunks_matrix[chunk_row][chunk_col] = 1
+                                and rng.uniform(0, 1) < biome.FLORA_LIKELYHOOD:
+                            self.__add_environment(block_x_coord, block_y_coord, biome, rng)
+                        elif rng.uniform(0, 1) < biome.CLUSTER_LIKELYHOOD:
+                            self.__add_ore_cluster(block_x_coord, block_y_coord,
+                                                   biome.get_ore_at_depth(block_y_coord, rng), biome.MAX_CLUSTER_SIZE,
+                                                   rng)
+                self.__generated_chunks[(chunk_col, chunk_row)] = 1
 
     def __add_environment(
         self,
         block_x_coord: int,
         block_y_coord: int,
-        flora_likelyhoods: List[Dict[str, float]]
+        biome: Type[biome_classes.Biome],
+        rng: Random
     ) -> None:
         """Add environment blocks like plants"""
         s_coords = self.__get_surrounding_block_coords(block_x_coord, block_y_coord)
@@ -472,24 +586,23 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         # if direction cant have a flora return
         if len(elligable_indexes) == 0:
             return
-        chosen_index = s_coords.index(choice(elligable_indexes))
+        chosen_index = s_coords.index(rng.choice(elligable_indexes))
+        flora = biome.get_flora_at_depth(block_y_coord, chosen_index, rng)
         # if the chosen index has no plant options return
-        if len(flora_likelyhoods[chosen_index]) == 0:
+        if flora is None:
             return
-        flora = choices(list(flora_likelyhoods[chosen_index].keys()),
-                        list(flora_likelyhoods[chosen_index].values()), k=1)[0]
         self.__predefined_blocks.add((block_x_coord, block_y_coord), flora)
 
     def __add_ore_cluster(
         self,
         block_x_coord: int,
         block_y_coord: int,
-        ore_likelyhoods: Dict[str, float],
-        max_cluster_size: int
+        ore: str,
+        max_cluster_size: int,
+        rng: Random
     ) -> None:
         """Add ores in a cluster"""
-        ore = choices(list(ore_likelyhoods.keys()), list(ore_likelyhoods.values()), k=1)[0]
-        ore_locations = self.__create_ore_cluster(ore, (block_x_coord, block_y_coord), max_cluster_size)
+        ore_locations = self.__create_ore_cluster(ore, (block_x_coord, block_y_coord), max_cluster_size, rng)
         ore_locations.append([block_x_coord, block_y_coord])
         for loc in ore_locations:
             if self.__predefined_blocks.check((block_x_coord, block_y_coord), ["Air"]):
@@ -500,100 +613,120 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         self,
         ore: str,
         center: Union[Tuple[int, int], List[int]],
-        max_cluster_size: int
+        max_cluster_size: int,
+        rng: Random
     ) -> List[List[int]]:
         """Create a cluster of ores around a center up until a certain size is reached"""
-        size = getattr(ground_materials, ore).get_cluster_size()  # -> this number is a random return
+        size = getattr(ground_materials, ore).get_cluster_size(rng)  # -> this number is a random return
         ore_locations = []
         while len(ore_locations) <= size:
             location = [0, 0]
             for index in range(2):
-                pos = choice([-1, 1])
+                pos = rng.choice([-1, 1])
                 # assert index is bigger then 0
-                location[index] = max(0, pos * randint(0, max_cluster_size) + center[index])
+                location[index] = max(0, pos * rng.randint(0, max_cluster_size) + center[index])
             if location not in ore_locations:
                 ore_locations.append(location)
         return ore_locations
 
 # LAYER3: filler blocks that fill in the rest of the chunk
+    @classmethod
+    @game_timing.time_function("world generation", "filler", background=True)
     def __add_filler_blocks(
-        self,
-        rect: Rect,
+        cls,
+        topleft: Tuple[int, int],
         matrix: List[List],
-        background_matrix: List[List]
+        background_matrix: List[List],
+        biome_grid: List[List[List[Type[biome_classes.Biome]]]],
+        cum_weight_grid: List[List[List[float]]],
+        rng: Random
     ) -> None:
-        """Add blocks to all unfilled places in the matrix and to the background matrix"""
-        for row_i in range(int(rect.height / con.BLOCK_SIZE.height)):
-            for col_i in range(int(rect.width / con.BLOCK_SIZE.width)):
-                block_x_coord = int(rect.left / con.BLOCK_SIZE.width) + col_i
-                block_y_coord = int(rect.top / con.BLOCK_SIZE.height) + row_i
-                block = matrix[row_i][col_i]
-                # determine biome based on coordinate
-                biome_liklyhoods = self.__biome_liklyhoods_from_point(block_x_coord * con.BLOCK_SIZE.width,
-                                                                      block_y_coord * con.BLOCK_SIZE.height)
-                biome = choices(list(biome_liklyhoods.keys()), list(biome_liklyhoods.values()), k=1)[0]
-                if block is None:
-                    filler_likelyhoods = biome.get_filler_lh_at_depth(block_y_coord)
-                    filler = choices(list(filler_likelyhoods.keys()), list(filler_likelyhoods.values()), k=1)[0]
-                    matrix[row_i][col_i] = block_util.MCD(filler)
+        """Add blocks to all unfilled places in the matrix and to the background matrix using the biome likelyhoods
+        calculated for the whole chunk"""
+        for row_i, (biome_row, cum_weight_row) in enumerate(zip(biome_grid, cum_weight_grid)):
+            block_y_coord = int(topleft[1] / con.BLOCK_SIZE.height) + row_i
+            for col_i, (biomes, cum_weights) in enumerate(zip(biome_row, cum_weight_row)):
+                biome = rng.choices(biomes, cum_weights=cum_weights, k=1)[0]
+                if matrix[row_i][col_i] is None:
+                    matrix[row_i][col_i] = block_util.MCD(biome.get_filler_at_depth(block_y_coord, rng))
                 # reget the biome to get slightly different front and backgrounds
-                biome = choices(list(biome_liklyhoods.keys()), list(biome_liklyhoods.values()), k=1)[0]
-                background_likelyhoods = biome.get_background_lh_at_depth(block_y_coord)
-                background_mat = choices(list(background_likelyhoods.keys()),
-                                         list(background_likelyhoods.values()), k=1)[0]
-                background_matrix[row_i][col_i] = block_util.MCD(background_mat)
+                biome = rng.choices(biomes, cum_weights=cum_weights, k=1)[0]
+                background_matrix[row_i][col_i] = block_util.MCD(biome.get_background_at_depth(block_y_coord, rng))
 
+    @classmethod
+    @game_timing.time_function("world generation", "border", background=True)
     def __add_border(
-        self,
+        cls,
         matrix: List[List],
-        topleft: Union[Tuple[int, int], List[int]]
+        topleft: Union[Tuple[int, int], List[int]],
+        rng: Random
     ) -> None:
         """add a border if neccesairy and determine the direction of set border"""
         if topleft[1] <= 0:
-            self.__add_directional_border(matrix, "north")
+            cls.__add_directional_border(matrix, "north", rng)
         elif topleft[1] + con.CHUNK_SIZE.height >= con.ORIGINAL_BOARD_SIZE.height:
-            self.__add_directional_border(matrix, "south")
+            cls.__add_directional_border(matrix, "south", rng)
         if topleft[0] <= 0:
-            self.__add_directional_border(matrix, "west")
+            cls.__add_directional_border(matrix, "west", rng)
         elif topleft[0] + con.CHUNK_SIZE.width >= con.ORIGINAL_BOARD_SIZE.width:
-            self.__add_directional_border(matrix, "east")
+            cls.__add_directional_border(matrix, "east", rng)
 
+    @classmethod
     def __add_directional_border(
-        self,
+        cls,
         matrix: List[List],
-        direction: str
+        direction: str,
+        rng: Random
     ) -> None:
         """Add a border for a certain direction"""
         if direction == "north":
-            rows = matrix[0:self.MAX_BORDER_SPREAD_DISTANCE]
+            rows = matrix[0:cls.MAX_BORDER_SPREAD_DISTANCE]
             for row_i in range(len(rows)):
-                border_block_chance = self.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(row_i)
+                border_block_chance = cls.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(row_i)
                 for col_i in range(len(matrix[row_i])):
-                    if uniform(0, 1) < border_block_chance:
+                    if rng.uniform(0, 1) < border_block_chance:
                         matrix[row_i][col_i] = block_util.MCD("BorderMaterial")
         elif direction == "south":
-            rows = matrix[- (self.MAX_BORDER_SPREAD_DISTANCE + 1):-1]
+            rows = matrix[- (cls.MAX_BORDER_SPREAD_DISTANCE + 1):-1]
             for row_i in range(len(rows)):
-                border_block_chance = self.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(row_i)
+                border_block_chance = cls.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(row_i)
                 for col_i in range(len(matrix[row_i])):
-                    if uniform(0, 1) < border_block_chance:
+                    if rng.uniform(0, 1) < border_block_chance:
                         matrix[-(row_i + 1)][- (col_i + 1)] = block_util.MCD("BorderMaterial")
         elif direction == "west":
             for row_i in range(len(matrix)):
-                for col_i in range(len(matrix[row_i][0:self.MAX_BORDER_SPREAD_DISTANCE])):
-                    border_block_chance = self.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(col_i)
-                    if uniform(0, 1) < border_block_chance:
+                for col_i in range(len(matrix[row_i][0:cls.MAX_BORDER_SPREAD_DISTANCE])):
+                    border_block_chance = cls.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(col_i)
+                    if rng.uniform(0, 1) < border_block_chance:
                         matrix[row_i][col_i] = block_util.MCD("BorderMaterial")
         elif direction == "east":
             for row_i in range(len(matrix)):
-                for col_i in range(len(matrix[row_i][- (self.MAX_BORDER_SPREAD_DISTANCE + 1):-1])):
-                    border_block_chance = self.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(col_i)
-                    if uniform(0, 1) < border_block_chance:
+                for col_i in range(len(matrix[row_i][- (cls.MAX_BORDER_SPREAD_DISTANCE + 1):-1])):
+                    border_block_chance = cls.BORDER_SPREAD_LIKELYHOOD.cumulative_probability(col_i)
+                    if rng.uniform(0, 1) < border_block_chance:
                         matrix[- (row_i + 1)][- (col_i + 1)] = block_util.MCD("BorderMaterial")
         else:
             raise util.GameException("Unrecognized direction for border: {}".format(direction))
 
 # utility methods
+    def __random(
+        self,
+        layer: str,
+        col: int,
+        row: int
+    ) -> Random:
+        """A random stream for a layer of the generation at a location"""
+        return Random(self.__random_seed(layer, col, row))
+
+    def __random_seed(
+        self,
+        layer: str,
+        col: int,
+        row: int
+    ) -> str:
+        # strings are hashed with sha512 by Random, which is the same in every process
+        return f"{self.__seed}-{layer}-{col}-{row}"
+
     def __determine_cave_quadrant_size(
         self,
         caves_nr: int
@@ -605,13 +738,73 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
         cave_quadrant_side = int(sqrt((con.ORIGINAL_BOARD_SIZE.width * con.ORIGINAL_BOARD_SIZE.height) / total_caves))
         return util.Size(cave_quadrant_side, cave_quadrant_side)
 
-    def __biome_liklyhoods_from_point(
+    def __biome_raster_rect(
         self,
-        x: int,
-        y: int
-    ) -> Dict[biome_classes.Biome, float]:
-        biome_matrix_col = int(x / self.__biome_size.width)
-        biome_matrix_row = int(y / self.__biome_size.height)
+        biome_matrix_col: int,
+        biome_matrix_row: int
+    ) -> Rect:
+        """The area where the likelyhood of a biome can be requested, the biome matrix cell of the biome and the
+        cells directly around it"""
+        left = max(0, (biome_matrix_col - 1) * self.__biome_size.width)
+        top = max(0, (biome_matrix_row - 1) * self.__biome_size.height)
+        right = min(con.ORIGINAL_BOARD_SIZE.width, (biome_matrix_col + 2) * self.__biome_size.width)
+        bottom = min(con.ORIGINAL_BOARD_SIZE.height, (biome_matrix_row + 2) * self.__biome_size.height)
+        return Rect((left, top, right - left, bottom - top))
+
+    @game_timing.time_function("world generation", "biome likelyhoods", background=True)
+    def __chunk_biome_liklyhoods(
+        self,
+        chunk_rect: Rect
+    ) -> Tuple[List[List[List[Type[biome_classes.Biome]]]], List[List[List[float]]]]:
+        """Biome likelyhoods of a generated chunk. Only timed here, the special blocks time their own calls"""
+        return self.__biome_liklyhoods_from_rect(chunk_rect)
+
+    def __biome_liklyhoods_from_rect(
+        self,
+        rect: Rect
+    ) -> Tuple[List[List[List[Type[biome_classes.Biome]]]], List[List[List[float]]]]:
+        """Calculate the biome likelyhoods for all blocks in a rectangle at once.
+
+        Returns:
+            a matrix with the list of possible biome types for each block and a matrix with the cumulative normalised
+            likelyhoods of these biomes.
+        """
+        block_xs = (int(rect.left / con.BLOCK_SIZE.width) + arange(int(rect.width / con.BLOCK_SIZE.width))) * \
+            con.BLOCK_SIZE.width
+        block_ys = (int(rect.top / con.BLOCK_SIZE.height) + arange(int(rect.height / con.BLOCK_SIZE.height))) * \
+            con.BLOCK_SIZE.height
+        biome_cols = (block_xs / self.__biome_size.width).astype(int)
+        biome_rows = (block_ys / self.__biome_size.height).astype(int)
+
+        biome_grid = [[None for _ in range(len(block_xs))] for _ in range(len(block_ys))]
+        cum_weight_grid = [[None for _ in range(len(block_xs))] for _ in range(len(block_ys))]
+        # blocks that share a biome matrix cell share the same surrounding biomes so calculate them per cell
+        for biome_row in unique(biome_rows):
+            row_indexes = nonzero(biome_rows == biome_row)[0]
+            for biome_col in unique(biome_cols):
+                col_indexes = nonzero(biome_cols == biome_col)[0]
+                surrounding_biomes = self.__surrounding_biomes(biome_col, biome_row)
+                surrounding_biome_types = [type(b) for b in surrounding_biomes]
+                x_coords, y_coords = meshgrid(block_xs[col_indexes], block_ys[row_indexes])
+                likelyhoods = stack([b.get_likelyhoods_at_coords(x_coords, y_coords) for b in surrounding_biomes],
+                                    axis=-1)
+                # cumsum sums in order, equal to the sum in util.normalize
+                totals = cumsum(likelyhoods, axis=-1)[..., -1:]
+                with errstate(divide="ignore", invalid="ignore"):
+                    wheights = where(totals != 0, likelyhoods / totals, 0)
+                cum_weights = cumsum(wheights, axis=-1).tolist()
+                for local_row_i, row_i in enumerate(row_indexes):
+                    for local_col_i, col_i in enumerate(col_indexes):
+                        biome_grid[row_i][col_i] = surrounding_biome_types
+                        cum_weight_grid[row_i][col_i] = cum_weights[local_row_i][local_col_i]
+        return biome_grid, cum_weight_grid
+
+    def __surrounding_biomes(
+        self,
+        biome_matrix_col: int,
+        biome_matrix_row: int
+    ) -> List[biome_classes.Biome]:
+        """Collect the biome at a biome matrix coordinate and the biomes directly around it"""
         main_biome = self.__biome_matrix[biome_matrix_row][biome_matrix_col]
         surrounding_biomes = [main_biome]
         # collect all surrounding biomes
@@ -621,10 +814,7 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
                     or surrounding_coord[1] >= len(self.__biome_matrix) - 1 or surrounding_coord[1] < 0:
                 continue
             surrounding_biomes.append(self.__biome_matrix[surrounding_coord[1]][surrounding_coord[0]])
-        surrounding_biomes = [b for b in surrounding_biomes if b is not None]
-        wheights = util.normalize([b.get_likelyhood_at_coord(x, y) for b in surrounding_biomes])
-        biome_likelyhoods = {biome: wheights[index] for index, biome in enumerate(surrounding_biomes)}
-        return biome_likelyhoods
+        return [b for b in surrounding_biomes if b is not None]
 
     def __get_surrounding_block_coords(
         self,
@@ -646,64 +836,217 @@ class BoardGenerator(loading_saving.Savable, loading_saving.Loadable):
 
 class PredefinedBlocks(loading_saving.Savable, loading_saving.Loadable):
     """Save at what coordinate there are pre_defined materials for blocks generated outside the matrixes directly
-    generated"""
-    __internal_tree: Dict[int, Dict[int, block_util.MCD]]
+    generated. The materials are saved per chunk in an array of material ids, where 0 means no material. Materials that
+    are only a name are saved as the registry id of the material. Materials with arguments get an id above the registry
+    ids that points to a side table shared by all chunks, ids of the side table that are no longer used by any chunk are
+    reused"""
+    __chunks: Dict[Tuple[int, int], ndarray]
+    __registry_materials: Dict[int, block_util.MCD]
+    __argument_materials: List[Union[block_util.MCD, None]]
+    __argument_counts: List[int]
+    __free_ids: List[int]
+    __argument_ids: Dict[block_util.MCD, int]
 
     def __init__(self):
-        self.__internal_tree = {}
+        self.__chunks = {}
+        # one definition per registry id that is returned for all blocks of the material
+        self.__registry_materials = {}
+        self.__argument_materials = []
+        # the number of blocks that use every id of the side table
+        self.__argument_counts = []
+        self.__free_ids = []
+        self.__argument_ids = {}
 
-    def __init_load__(self, internal_tree=None):
-        self.__internal_tree = internal_tree
+    def __init_load__(self, chunks=None, materials=None):
+        self.__chunks = chunks
+        self.__registry_materials = {}
+        self.__argument_materials = []
+        self.__argument_counts = []
+        self.__free_ids = []
+        self.__argument_ids = {}
+        first_argument_id = self.__first_argument_id()
+        for material in materials:
+            # ids that where free when saving are saved as None
+            if material is None:
+                self.__argument_materials.append(None)
+                self.__argument_counts.append(0)
+            else:
+                self.__add_material(material)
+        for material_ids in chunks.values():
+            for material_id, amount in zip(*unique(material_ids[material_ids >= first_argument_id],
+                                                   return_counts=True)):
+                self.__argument_counts[material_id - first_argument_id] += int(amount)
+        for index in range(len(self.__argument_materials)):
+            if self.__argument_counts[index] == 0:
+                self.__free_id(first_argument_id + index)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
-            "internal_tree": {outer_name: {name: value.to_dict() for name, value in inner_dict.items()}
-                              for outer_name, inner_dict in self.__internal_tree.items()}
+            "materials": [material.to_dict() if material is not None else None
+                          for material in self.__argument_materials],
+            "chunks": [{"coordinate": coord, "material_ids": material_ids.tolist()}
+                       for coord, material_ids in self.__chunks.items()]
         }
 
     @classmethod
     def from_dict(cls, dct):
-        internal_tree = {int(outer_name): {int(name): block_util.MCD.from_dict(value)
-                                           for name, value in inner_dict.items()}
-                         for outer_name, inner_dict in dct["internal_tree"].items()}
-        return cls.load(internal_tree=internal_tree)
+        chunks = {tuple(chunk_dct["coordinate"]): array(chunk_dct["material_ids"], dtype=uint16)
+                  for chunk_dct in dct["chunks"]}
+        materials = [block_util.MCD.from_dict(material_dct) if material_dct is not None else None
+                     for material_dct in dct["materials"]]
+        return cls.load(chunks=chunks, materials=materials)
 
     def add(
         self,
         coord: Union[Tuple[int, int], List[int]],
-        value: str,
+        value: Union[str, block_util.MCD],
         overwrite=True
     ) -> None:
-        if coord[1] in self.__internal_tree:
-            # do not overwrite if requested
-            if not overwrite and coord[0] in self.__internal_tree[coord[1]]:
-                return
-            self.__internal_tree[coord[1]][coord[0]] = block_util.MCD(value)
-        else:
-            if coord[1] > con.MAX_DEPTH and con.DEBUG.WARNINGS:
+        if not 0 <= coord[1] <= con.MAX_DEPTH:
+            if con.DEBUG.WARNINGS:
                 print("Carefull {} is outside the board".format(coord))
-                return
-            self.__internal_tree[coord[1]] = {coord[0]: block_util.MCD(value)}
+            return
+        chunk_coord = (coord[0] // self.__chunk_columns(), coord[1] // self.__chunk_rows())
+        if chunk_coord not in self.__chunks:
+            self.__chunks[chunk_coord] = zeros((self.__chunk_rows(), self.__chunk_columns()), dtype=uint16)
+        material_ids = self.__chunks[chunk_coord]
+        local_row, local_column = coord[1] % self.__chunk_rows(), coord[0] % self.__chunk_columns()
+        # do not overwrite if requested
+        previous_id = int(material_ids[local_row, local_column])
+        if not overwrite and previous_id != 0:
+            return
+        material_id = self.__material_id(value)
+        if material_id == previous_id:
+            return
+        material_ids[local_row, local_column] = material_id
+        if material_id >= self.__first_argument_id():
+            self.__argument_counts[material_id - self.__first_argument_id()] += 1
+        if previous_id != 0:
+            self.__release_ids(previous_id, 1)
 
-    def pop(
+    def pop_chunk(
         self,
-        coord: Union[Tuple[int, int], List[int]]
-    ) -> str:
-        """Get and remove an item from this collection, for checking use check or 'in'"""
-        item = self.__internal_tree[coord[1]].pop(coord[0])
-        if len(self.__internal_tree[coord[1]]) == 0:
-            del self.__internal_tree[coord[1]]
-        return item
+        chunk_coord: Union[Tuple[int, int], List[int]]
+    ) -> List[Tuple[Tuple[int, int], block_util.MCD]]:
+        """Get and remove all materials of a chunk as ((column, row), material) with the column and row within the
+        chunk. The materials are shared and should not be changed"""
+        material_ids = self.__chunks.pop(tuple(chunk_coord), None)
+        if material_ids is None:
+            return []
+        rows, columns = nonzero(material_ids)
+        materials = [((column, row), self.__material(material_id)) for row, column, material_id in
+                     zip(rows.tolist(), columns.tolist(), material_ids[rows, columns].tolist())]
+        argument_ids = material_ids[material_ids >= self.__first_argument_id()]
+        for material_id, amount in zip(*unique(argument_ids, return_counts=True)):
+            self.__release_ids(int(material_id), int(amount))
+        return materials
 
     def check(
         self,
         coord: Union[Tuple[int, int], List[int]],
         values: Iterable
     ) -> bool:
-        return coord in self and any(value == self.__internal_tree[coord[1]][coord[0]].name() for value in values)
+        material_id = self.__get_material_id(coord)
+        return material_id != 0 and self.__material(material_id).name() in values
 
     def __contains__(
         self,
         item: Union[Tuple[int, int], List[int]]
     ) -> bool:
-        return item[1] in self.__internal_tree and item[0] in self.__internal_tree[item[1]]
+        return self.__get_material_id(item) != 0
+
+    @staticmethod
+    def __chunk_columns() -> int:
+        return interface_util.p_to_c(con.CHUNK_SIZE.width)
+
+    @staticmethod
+    def __chunk_rows() -> int:
+        return interface_util.p_to_r(con.CHUNK_SIZE.height)
+
+    @staticmethod
+    def __first_argument_id() -> int:
+        """The first id after the registry ids, the ids of the side table start here"""
+        return len(block_util.material_classes_by_id)
+
+    def __get_material_id(
+        self,
+        coord: Union[Tuple[int, int], List[int]]
+    ) -> int:
+        material_ids = self.__chunks.get((coord[0] // self.__chunk_columns(), coord[1] // self.__chunk_rows()), None)
+        if material_ids is None:
+            return 0
+        return int(material_ids[coord[1] % self.__chunk_rows(), coord[0] % self.__chunk_columns()])
+
+    def __material(self, material_id: int) -> block_util.MCD:
+        if material_id >= self.__first_argument_id():
+            return self.__argument_materials[material_id - self.__first_argument_id()]
+        if material_id not in self.__registry_materials:
+            self.__registry_materials[material_id] = \
+                block_util.MCD(block_util.material_class_from_id(material_id).name())
+        return self.__registry_materials[material_id]
+
+    def __material_id(
+        self,
+        value: Union[str, block_util.MCD]
+    ) -> int:
+        """Id of a material, materials that are only a name get their registry id, other materials are distinguished
+        by instance"""
+        if isinstance(value, str):
+            return block_util.material_id(value)
+        if value.is_plain():
+            return block_util.material_id(value.name())
+        if value not in self.__argument_ids:
+            return self.__add_material(value)
+        return self.__argument_ids[value]
+
+    def __add_material(
+        self,
+        material: block_util.MCD
+    ) -> int:
+        """Give a material with arguments an id in the side table"""
+        if len(self.__free_ids) > 0:
+            material_id = self.__free_ids.pop()
+            self.__argument_materials[material_id - self.__first_argument_id()] = material
+        else:
+            material_id = self.__first_argument_id() + len(self.__argument_materials)
+            if material_id > iinfo(uint16).max:
+                raise util.GameException("Too many different predefined materials")
+            self.__argument_materials.append(material)
+            self.__argument_counts.append(0)
+        self.__argument_ids[material] = material_id
+        return material_id
+
+    def __release_ids(
+        self,
+        material_id: int,
+        amount: int
+    ):
+        """Lower the number of blocks that use an id of the side table by amount and free the id when no block uses
+        it. Registry ids are never freed"""
+        if material_id < self.__first_argument_id():
+            return
+        index = material_id - self.__first_argument_id()
+        self.__argument_counts[index] -= amount
+        if self.__argument_counts[index] == 0:
+            self.__free_id(material_id)
+
+    def __free_id(self, material_id: int):
+        index = material_id - self.__first_argument_id()
+        if self.__argument_materials[index] is not None:
+            del self.__argument_ids[self.__argument_materials[index]]
+        self.__argument_materials[index] = None
+        self.__free_ids.append(material_id)
+
+
+_filler_executor: Union[ProcessPoolExecutor, None] = None
+
+
+def _get_filler_executor(nr_processes: int) -> Union[ProcessPoolExecutor, None]:
+    """Process pool shared by all generators, None when generation should not use separate processes"""
+    global _filler_executor
+    if nr_processes <= 1:
+        return None
+    if _filler_executor is None:
+        # spawn to not copy the state of running threads into the worker processes
+        _filler_executor = ProcessPoolExecutor(nr_processes, mp_context=get_context("spawn"))
+    return _filler_executor
@@ -1,22 +1,28 @@
 from abc import ABC, abstractmethod
-from typing import ClassVar, Union, List, TYPE_CHECKING, Tuple, Type
-from random import randint, choice
+from typing import ClassVar, Union, List, Tuple, Type
+from random import randint, choice, Random
 import pygame
 
 import utility.utilities as util
 import utility.constants as con
-
-if TYPE_CHECKING:
-    from block_classes import materials
+from block_classes.materials import materials
 
 
 class Structure(ABC):
     STRUCTURE_START_PARTS: ClassVar[List["StructurePart"]]
     MAX_PARTS: ClassVar[int]
     DEPTH_DISTRIBUTION: ClassVar[util.Gaussian]
+    # size in blocks of the grid cells used for checking if parts overlap
+    COLLISION_CELL_SIZE: ClassVar[int] = 8
+
+    __rng: Union[Random, None]
+    __total_parts: int
 
-    def __init__(self):
-        self.__total_parts = max(1, randint(int(self.MAX_PARTS * 0.66), self.MAX_PARTS))
+    def __init__(self, rng: Union[Random, None] = None):
+        # use rng instead of the global random state for reproducible structures
+        self.__rng = rng
+        random_randint = rng.randint if rng is not None else randint
+        self.__total_parts = max(1, random_randint(int(self.MAX_PARTS * 0.66), self.MAX_PARTS))
 
     # noinspection PyPep8Naming
     @property
@@ -47,18 +53,23 @@ class Structure(ABC):
         pass
 
     def get_structure_matrix(self):
-        start_class = choice(self.STRUCTURE_START_PARTS)
+        random_choice = self.__rng.choice if self.__rng is not None else choice
+        start_class = random_choice(self.STRUCTURE_START_PARTS)
         start_instance = start_class((0, 0))
-        extend_parts = {start_instance}
+        # lists instead of sets to make sure that the parts are always extended in the same order
+        extend_parts = [start_instance]
         rectangles = [start_instance.rect]
-        all_parts = {start_instance}
+        placed_rectangles = util.SpatialHash(self.COLLISION_CELL_SIZE)
+        placed_rectangles.add(start_instance.rect)
+        all_parts = [start_instance]
         count = 0
         while count <= self.__total_parts and len(extend_parts) != 0:
-            for part in extend_parts.copy():
+            new_parts = []
+            for part in extend_parts:
                 for index, connection_options in enumerate(part.CONNECTION_DIRECIONS):
                     if len(connection_options) == 0:
                         continue
-                    str_part, start_index = choice(connection_options)
+                    str_part, start_index = random_choice(connection_options)
                     part_class = self._str_to_part_class(str_part)
                     if index == 0:
                         pos = (start_index + part.rect.left, part.rect.top - part_class.size().height)
@@ -69,19 +80,20 @@ class Structure(ABC):
                     else:
                         pos = (part.rect.left - part_class.size().width, start_index + part.rect.top)
                     part_instance = part_class(pos)
-                    if part_instance.rect.collidelist(rectangles) != -1:
+                    if placed_rectangles.collides(part_instance.rect):
                         count += 1
                         continue
-                    extend_parts.add(part_instance)
-                    all_parts.add(part_instance)
+                    new_parts.append(part_instance)
+                    all_parts.append(part_instance)
                     rectangles.append(part_instance.rect)
+                    placed_rectangles.add(part_instance.rect)
                     count += 1
-                extend_parts.remove(part)
+            extend_parts = new_parts
         full_rect = self.union_rect(rectangles)
         full_material_matrix = [[None for _ in range(full_rect.width)] for _ in range(full_rect.height)]
         for part in all_parts:
             matrix_coord = [part.rect.left - full_rect.left, part.rect.top - full_rect.top]
-            material_matrix = part.get_material_matrix()
+            material_matrix = part.get_material_matrix(self.__rng)
             for row in material_matrix:
                 for material in row:
                     full_material_matrix[matrix_coord[1]][matrix_coord[0]] = material
@@ -141,7 +153,7 @@ class StructurePart(ABC):
         """
         pass
 
-    def get_material_matrix(self) -> List[List[str]]:
+    def get_material_matrix(self, rng: Union[Random, None] = None) -> List[List[str]]:
         final_matrix = []
         for row in self.FORM_DEFINITION:
             matrix_row = []
@@ -149,7 +161,7 @@ class StructurePart(ABC):
                 if isinstance(value, str):
                     matrix_row.append(value)
                 else:
-                    matrix_row.append(value.name())
+                    matrix_row.append(materials.material_name(value, rng))
             final_matrix.append(matrix_row)
         return final_matrix
 
@@ -325,6 +325,11 @@ class CameraCentre(MovingEntity, event_handling.EventHandler):
     """
     The camera center where the camera centers on
     """
+    # weight of the movement of the last frame in the smoothed velocity
+    VELOCITY_SMOOTHING: ClassVar[float] = 0.2
+
+    velocity: pygame.Vector2
+
     def __init__(
         self,
         pos: Union[List[int], Tuple[int, int]],
@@ -334,10 +339,12 @@ class CameraCentre(MovingEntity, event_handling.EventHandler):
     ):
         MovingEntity.__init__(self, pos, size, 1000, pausable=False, *groups, **kwargs)
         event_handling.EventHandler.__init__(self, [con.RIGHT, con.LEFT, con.UP, con.DOWN])
+        self.velocity = pygame.Vector2(0, 0)  # in pixels per second on the unzoomed board
 
     def __init_load__(self, max_speed=None, **kwargs):
         super().__init_load__(max_speed=max_speed, speed=pygame.Vector2(0, 0), exact_movement_values=[0, 0], **kwargs)
         event_handling.EventHandler.__init__(self, [con.RIGHT, con.LEFT, con.UP, con.DOWN])
+        self.velocity = pygame.Vector2(0, 0)
 
     def to_dict(self):
         d = super().to_dict()
@@ -351,6 +358,19 @@ class CameraCentre(MovingEntity, event_handling.EventHandler):
         return cls.load(layer=dct["layer"], visible=dct["visible"], static=dct["static"], orig_rect=orig_rect,
                         max_speed=dct["max_speed"], pausable=dct["pausable"])
 
+    def update(self, *args):
+        previous_center = self.orig_rect.center
+        super().update(*args)
+        elapsed_time = con.GAME_TIME.get_time()
+        if elapsed_time == 0:
+            return
+        frame_velocity = (pygame.Vector2(self.orig_rect.center) - previous_center) * (1000 / elapsed_time)
+        self.velocity += (frame_velocity - self.velocity) * self.VELOCITY_SMOOTHING
+
+    def predicted_center(self, seconds: float) -> Tuple[float, float]:
+        """Where the center of the camera will be after a number of seconds when moving at the current velocity"""
+        return self.orig_rect.centerx + self.velocity.x * seconds, self.orig_rect.centery + self.velocity.y * seconds
+
     def handle_events(
         self,
         events: List["pygame.event.Event"],
@@ -39,19 +39,11 @@ class Machine:
 
     def add_block(self, block):
         # it is very important that this block is connected, always make sure to check before with can_add()
+        # the rect has to contain all blocks, the board finds machines by their rect
+        self.rect.union_ip(block.rect)
         if block.coord[1] in self._blocks:
-            if block.rect.left < self.rect.left:
-                self.rect.width += self.rect.left - block.rect.left
-                self.rect.left = block.rect.left
-            elif block.rect.right > self.rect.right:
-                self.rect.width += block.rect.right - self.rect.right
             self._blocks[block.coord[1]][block.coord[0]] = block
         else:
-            if block.rect.top < self.rect.top:
-                self.rect.height += self.rect.top - block.rect.top
-                self.rect.top = block.rect.top
-            elif block.rect.bottom > self.rect.bottom:
-                self.rect.height += block.rect.bottom - self.rect.bottom
             self._blocks[block.coord[1]] = {block.coord[0]: block}
         if isinstance(block, block_classes.machine_blocks.MachineTerminalBlock):
             if self.terminal_block is None:
@@ -81,7 +81,7 @@ class Scene(event_handling.EventHandler, ABC):
         self.__counter += 1
         if self.__counter == 500 and con.DEBUG.PRINT_TIMING_BREAKDOWN:
             self.__counter = 0
-            print(game_timing.TIMINGS.get_time_summary())
+            print(game_timing.get_full_time_summary())
 
     def get_events(self):
         """Starting point for event handling"""
@@ -568,6 +568,11 @@ class Game(loading_saving.Savable, Scene):
                                                                   self.sprite_group)
         self.reset_globals()
 
+    def exit(self):
+        # the board is not used after leaving the game
+        if self.board is not None:
+            self.board.stop()
+
     def reset_globals(self):
         from interfaces.windows.other_interfaces import reset_selected_widget
         reset_selected_widget()
@@ -597,11 +602,8 @@ class Game(loading_saving.Savable, Scene):
                 self.board.add_rectangle(rect, (0,0,0), layer=1, border=2)
 
     def __draw_chunk_borders(self):
-        for row in self.board.chunk_matrix:
-            for chunk in row:
-                if chunk is None:
-                    continue
-                self.board.add_rectangle(chunk.rect, (255, 255, 255), layer=0, border=2)
+        for chunk in self.board.chunk_index:
+            self.board.add_rectangle(chunk.rect, (255, 255, 255), layer=0, border=2)
 
     def draw(self):
         super().draw()
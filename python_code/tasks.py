@@ -138,6 +138,7 @@ class TaskControl(loading_saving.Savable, loading_saving.Loadable):
                     for task in tasks:
                         if isinstance(task, BuildTask):
                             block.transparant_group = task.original_group
+                            self.board.chunk_from_point(block.coord).update_blocks(block)
 
     def __check_surrounding_tasks(
         self,
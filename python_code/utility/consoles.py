@@ -217,7 +217,7 @@ class MainConsole(Console):
             start_argument_index = 2
             check_dictionary = check_dictionary[arguments[2]]
         elif arguments[1] == "timings":
-            return game_timing.TIMINGS.get_time_summary()[:-1], False
+            return game_timing.get_full_time_summary()[:-1], False
         else:
             raise util.GameException(f"Unexpected value to print from; {arguments[1]}")
 
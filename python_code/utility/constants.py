@@ -75,6 +75,9 @@ else:
     TOTAL_START_CHUNKS = ((START_CHUNK_POS[0] + 3) - (START_CHUNK_POS[0] - 2)) * \
                          ((START_CHUNK_POS[1] + 3) - (START_CHUNK_POS[1] - 2))
 
+# megabytes that chunks in memory are allowed to use, chunks that are not used are written to disk above this
+CHUNK_MEMORY_BUDGET = 64 if TESTING else 1024
+
 BLOCK_SIZE = util.Size(20, 20)
 TRANSPORT_BLOCK_SIZE = util.Size(int(BLOCK_SIZE.width * 0.6), int(BLOCK_SIZE.height * 0.6))
 MAX_DEPTH = BOARD_SIZE.height / BLOCK_SIZE.height  # in blocks
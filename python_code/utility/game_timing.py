@@ -1,14 +1,18 @@
 import time
+import threading
 from typing import Callable, Dict, List, Union, Any
 
 
 TIMINGS: Union[None, "Timings"] = None
+# timings of work done next to the frames like world generation in the generation threads
+BACKGROUND_TIMINGS: Union[None, "Timings"] = None
 
 
 def config_timings_value():
-    """Innitialise the TIMINGS value"""
-    global TIMINGS
+    """Innitialise the TIMINGS and BACKGROUND_TIMINGS value"""
+    global TIMINGS, BACKGROUND_TIMINGS
     TIMINGS = Timings()
+    BACKGROUND_TIMINGS = Timings()
 
 
 class Timings:
@@ -19,10 +23,13 @@ class Timings:
     __named_timing: "_TimedValue"
     named_timings: Dict[str, "Timings"]
     __frame_number: int
+    __lock: threading.RLock
 
-    def __init__(self, timing=None):
+    def __init__(self, timing=None, lock=None):
         self.named_timing = timing
         self.named_timings = dict()
+        # shared by all nested timings, values can be added from other threads while a summary is made
+        self.__lock = lock if lock is not None else threading.RLock()
 
     def add(
         self,
@@ -30,16 +37,25 @@ class Timings:
         *names: str
     ):
         """Add a value to a named timing"""
-        if len(names) == 0:
-            self.named_timing.add_value(value, self.FRAME_NUMBER)
-            return
-        name = names[0]
-        if name in self.named_timings:
-            self.named_timings[name].add(value, *names[1:])
-        else:
-            self.named_timings[name] = Timings(_TimedValue())
+        with self.__lock:
+            if len(names) == 0:
+                self.named_timing.add_value(value, self.FRAME_NUMBER)
+                return
+            name = names[0]
+            if name not in self.named_timings:
+                self.named_timings[name] = Timings(_TimedValue(), self.__lock)
             self.named_timings[name].add(value, *names[1:])
 
+    def get_named_timings(self) -> Dict[str, "Timings"]:
+        """Copy of the named timings that can be iterated while other threads add timings"""
+        with self.__lock:
+            return self.named_timings.copy()
+
+    def get_average_values(self) -> Dict[str, float]:
+        """Get the average value of all the named timings"""
+        with self.__lock:
+            return {name: timing.named_timing.get_average_value() for name, timing in self.named_timings.items()}
+
     def increase_frame_count(self):
         Timings.FRAME_NUMBER += 1
 
@@ -47,9 +63,10 @@ class Timings:
         """Get the percentages of all the named timings that are saved"""
         summary = ""
         timings = {}
-        for name, timing in self.named_timings.items():
-            average_time = timing.named_timing.get_average_value()
-            timings[name] = (average_time, timing.get_time_summary(average_time))
+        with self.__lock:
+            for name, timing in self.named_timings.items():
+                average_time = timing.named_timing.get_average_value()
+                timings[name] = (average_time, timing.get_time_summary(average_time))
         total_time_timed = sum(value[0] for value in timings.values()) if total_upper_time is None else total_upper_time
         if total_time_timed == 0:
             return ""
@@ -62,6 +79,18 @@ class Timings:
         return summary
 
 
+def get_full_time_summary() -> str:
+    """Summary of the frame timings followed by a summary per group of background timings"""
+    summary = TIMINGS.get_time_summary()
+    for name, timings in BACKGROUND_TIMINGS.get_named_timings().items():
+        summary += f"{name} (background):\n"
+        for line in timings.get_time_summary().split("\n"):
+            if len(line) == 0:
+                continue
+            summary += f" - {line}\n"
+    return summary
+
+
 class _TimedValue:
     """Track a list of a certain length of time it took to run a function per frame. All calls in one frame are put
     together"""
@@ -95,18 +124,27 @@ class _TimedValue:
     def get_average_value(self) -> float:
         """Get the average value of the time_values"""
         valid_values = [value for value in self.time_values if value is not None]
+        if len(valid_values) == 0:
+            return 0
         return sum(valid_values) / len(valid_values)
 
 
-def time_function(*time_names: str) -> Any:
-    """Time a function decorated with this"""
+def time_function(
+    *time_names: str,
+    background: bool = False
+) -> Any:
+    """Time a function decorated with this, nothing is timed when the TIMINGS are not configured. For example in
+    separate processes. Background functions are added to the BACKGROUND_TIMINGS to not be part of the frame
+    timings"""
     def function_decorator(func: Callable):
         def wrapper(*args, **kwargs):
+            timings = BACKGROUND_TIMINGS if background else TIMINGS
+            if timings is None:
+                return func(*args, **kwargs)
             start = time.time()
             result = func(*args, **kwargs)
             end = time.time()
-            global TIMINGS
-            TIMINGS.add(end - start, *time_names)
+            timings.add(end - start, *time_names)
             return result
         return wrapper
     return function_decorator
@@ -1,10 +1,10 @@
 from pygame import Rect
-from typing import Set, TYPE_CHECKING
+from typing import Set, Dict, List, Tuple, TYPE_CHECKING
 import types
 from math import pi, e, sqrt, erfc
 from abc import ABC
 from time import time_ns
-from numpy import array, linalg, exp
+from numpy import array, linalg, exp, log
 import inspect
 import uuid
 
@@ -329,6 +329,55 @@ class TwoDimensionalGaussian:
         part2 = -0.5 * (x_mu.T.dot(self.inv_covariance_matrix).dot(x_mu))
         return float(self.norm_constant * exp(part2))
 
+    def probabilities(self, x, y):
+        """Vectorised version of probability for numpy arrays of x and y coordinates of the same shape"""
+        x_mu = x - self.means[0][0]
+        y_mu = y - self.means[1][0]
+        # same order of operations as x_mu.T.dot(inv).dot(x_mu) for a single point
+        part1 = x_mu * self.inv_covariance_matrix[0][0] + y_mu * self.inv_covariance_matrix[1][0]
+        part2 = x_mu * self.inv_covariance_matrix[0][1] + y_mu * self.inv_covariance_matrix[1][1]
+        return self.norm_constant * exp(-0.5 * (part1 * x_mu + part2 * y_mu))
+
+    def log_probabilities(self, x, y):
+        """Natural logarithm of the probabilities, this does not underflow far away from the mean"""
+        x_mu = x - self.means[0][0]
+        y_mu = y - self.means[1][0]
+        part1 = x_mu * self.inv_covariance_matrix[0][0] + y_mu * self.inv_covariance_matrix[1][0]
+        part2 = x_mu * self.inv_covariance_matrix[0][1] + y_mu * self.inv_covariance_matrix[1][1]
+        return log(self.norm_constant) - 0.5 * (part1 * x_mu + part2 * y_mu)
+
+
+class SpatialHash:
+    """Rectangles saved in the square cells of a grid they overlap with, so only the rectangles in the same cells have
+    to be checked for collisions instead of all rectangles"""
+    __slots__ = "cell_size", "__cells"
+
+    cell_size: int
+    __cells: Dict[Tuple[int, int], List[Rect]]
+
+    def __init__(self, cell_size: int):
+        self.cell_size = cell_size
+        self.__cells = {}
+
+    def add(self, rect: Rect):
+        for cell in self.__rect_cells(rect):
+            if cell in self.__cells:
+                self.__cells[cell].append(rect)
+            else:
+                self.__cells[cell] = [rect]
+
+    def collides(self, rect: Rect) -> bool:
+        """If rect collides with any of the rectangles that where added"""
+        for cell in self.__rect_cells(rect):
+            if cell in self.__cells and rect.collidelist(self.__cells[cell]) != -1:
+                return True
+        return False
+
+    def __rect_cells(self, rect: Rect):
+        for row in range(rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size + 1):
+            for column in range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1):
+                yield column, row
+
 
 def is_abstract(cls):
     """Check if a class is abstract by checking for attribute __abstractmethods__,